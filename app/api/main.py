@@ -1,12 +1,15 @@
-from fastapi import FastAPI, HTTPException, Depends, status
+from fastapi import APIRouter, FastAPI, HTTPException, Depends, status, BackgroundTasks, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
-from sqlalchemy.orm import Session
-from sqlalchemy import func
-from app.core.database import test_database_connection, get_db, engine
+from fastapi.responses import StreamingResponse
+from fastapi.security import HTTPAuthorizationCredentials
+from sqlalchemy.orm import Session, joinedload, contains_eager
+from app.core.database import test_database_connection, get_db, get_pool_metrics
+from app.core.token_revocation import revocation_store
 from app.models.models import (
-    Base, User, Doctor, DoctorProfile, UserRole,
+    User, Doctor, DoctorProfile, UserRole,
     Appointment, DoctorAvailability, AppointmentHistory,
-    AppointmentStatus, AppointmentType, AppointmentPriority
+    AppointmentStatus, AppointmentType, AppointmentPriority, EspecialidadMedica,
+    ACTIVE_APPOINTMENT_STATUSES
 )
 from app.schemas.schemas import (
     UserRegister, UserLogin, UserResponse, Token, HomePageResponse,
@@ -14,33 +17,34 @@ from app.schemas.schemas import (
     # Appointment schemas
     DoctorAvailabilityCreate, DoctorAvailabilityResponse,
     AppointmentCreate, AppointmentUpdate, AppointmentResponse,
-    AppointmentDetailedResponse, AppointmentListResponse,
-    AppointmentAvailabilityRequest, AppointmentTimeSlot, AppointmentAvailabilityResponse
+    AppointmentDetailedResponse, AppointmentExpandedResponse, AppointmentListResponse,
+    AppointmentAvailabilityRequest, AppointmentTimeSlot, AppointmentAvailabilityResponse,
+    DayAvailability, DoctorRangeAvailability, AppointmentAvailabilityRangeResponse,
+    NextAvailableSlot, NextAvailableResponse
 )
-from app.core.auth import get_password_hash, verify_password, create_access_token, require_admin, get_current_user
-from datetime import timedelta, datetime
-from typing import List
-
-app = FastAPI(
-    title="Hospital Appointment System",
-    description="A FastAPI application for managing doctor appointments",
-    version="1.0.0"
+from app.utils.stats import BACKOFFICE_BREAKDOWNS, get_backoffice_stats_snapshot
+from app.utils.pagination import paginate_keyset
+from app.utils.directory import cached_directory_response, serialize_doctors, serialize_doctor
+from app.utils.etag import ETagMiddleware, check_not_modified, get_resource_versions, resource_etag
+from app.utils.serialization import DefaultJSONResponse, serialized_response
+from app.utils.compression import CompressionMiddleware
+from app.utils.export import EXPORT_FORMATS, appointment_export_query, stream_appointment_export
+from app.utils.scheduling import MIN_BOOKING_NOTICE, load_day_slots, find_next_free_slots
+from app.core.auth import (
+    create_access_token, require_admin, password_hash_pool,
+    password_needs_rehash, upgrade_password_hash,
+    principal_token_claims, revoke_token, optional_security,
+    AuthenticatedUser, get_current_principal, get_token_principal
 )
+from datetime import date, timedelta, datetime
+from typing import List, Optional
+import os
 
-# Create database tables
-Base.metadata.create_all(bind=engine)
-
-# Add CORS middleware to allow frontend connections
-app.add_middleware(
-    CORSMiddleware,
-    allow_origins=["*"],  # In production, replace with specific domains
-    allow_credentials=True,
-    allow_methods=["*"],
-    allow_headers=["*"],
-)
+# orjson renders the same JSON as json.dumps, faster (app/scripts/bench_serialization.py)
+router = APIRouter(default_response_class=DefaultJSONResponse)
 
 # HOME PAGE
-@app.get("/", response_model=HomePageResponse)
+@router.get("/", response_model=HomePageResponse)
 async def home_page():
     return HomePageResponse(
         mensaje="¡Bienvenido al Sistema de Citas Médicas!",
@@ -49,14 +53,24 @@ async def home_page():
     )
 
 # HEALTH CHECK
-@app.get("/health")
-async def health_check():
-    db_status = await test_database_connection()
+@router.get("/health")
+def health_check():
+    db_status = test_database_connection()
     return {"status": "healthy", "database": db_status}
 
+# METRICS
+@router.get("/metrics")
+async def metrics():
+    """Connection pool, password hashing and token revocation metrics for this worker"""
+    return {
+        "database_pool": get_pool_metrics(),
+        "password_hashing": password_hash_pool.stats(),
+        "token_revocation": revocation_store.stats(),
+    }
+
 # USER REGISTRATION
-@app.post("/register", response_model=Token, status_code=status.HTTP_201_CREATED)
-async def register_user(user_data: UserRegister, db: Session = Depends(get_db)):
+@router.post("/register", response_model=Token, status_code=status.HTTP_201_CREATED)
+def register_user(user_data: UserRegister, db: Session = Depends(get_db)):
     # Check if user already exists (by email or DNI)
     existing_user = db.query(User).filter(
         (User.email == user_data.email) | (User.dni == user_data.dni)
@@ -75,7 +89,7 @@ async def register_user(user_data: UserRegister, db: Session = Depends(get_db)):
             )
     
     # Create new user
-    hashed_password = get_password_hash(user_data.password)
+    hashed_password = password_hash_pool.hash(user_data.password)
     db_user = User(
         dni=user_data.dni,
         nombre=user_data.nombre,
@@ -94,7 +108,7 @@ async def register_user(user_data: UserRegister, db: Session = Depends(get_db)):
     # Create access token
     access_token_expires = timedelta(minutes=30)
     access_token = create_access_token(
-        data={"sub": db_user.email}, expires_delta=access_token_expires
+        data=principal_token_claims(db_user), expires_delta=access_token_expires
     )
     
     return Token(
@@ -104,12 +118,12 @@ async def register_user(user_data: UserRegister, db: Session = Depends(get_db)):
     )
 
 # USER LOGIN
-@app.post("/login", response_model=Token)
-async def login_user(user_credentials: UserLogin, db: Session = Depends(get_db)):
+@router.post("/login", response_model=Token)
+def login_user(user_credentials: UserLogin, background_tasks: BackgroundTasks, db: Session = Depends(get_db)):
     # Find user by email
     user = db.query(User).filter(User.email == user_credentials.email).first()
     
-    if not user or not verify_password(user_credentials.password, user.hashed_password):
+    if not user or not password_hash_pool.verify(user_credentials.password, user.hashed_password):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Email o contraseña incorrectos"
@@ -121,10 +135,16 @@ async def login_user(user_credentials: UserLogin, db: Session = Depends(get_db))
             detail="Usuario inactivo"
         )
     
+    # Move old hashes to the configured scheme/cost after the response is sent
+    if password_needs_rehash(user.hashed_password):
+        background_tasks.add_task(
+            upgrade_password_hash, user.id, user_credentials.password, user.hashed_password
+        )
+    
     # Create access token
     access_token_expires = timedelta(minutes=30)
     access_token = create_access_token(
-        data={"sub": user.email}, expires_delta=access_token_expires
+        data=principal_token_claims(user), expires_delta=access_token_expires
     )
     
     return Token(
@@ -133,14 +153,17 @@ async def login_user(user_credentials: UserLogin, db: Session = Depends(get_db))
         user=UserResponse.model_validate(user)
     )
 
-# USER LOGOUT (placeholder for now)
-@app.post("/logout")
-async def logout_user():
+# USER LOGOUT
+@router.post("/logout")
+def logout_user(credentials: Optional[HTTPAuthorizationCredentials] = Depends(optional_security)):
+    """Revoke the bearer token sent with the request"""
+    if credentials:
+        revoke_token(credentials.credentials)
     return {"message": "Logout exitoso", "detail": "Token invalidado correctamente"}
 
 # ADMIN ENDPOINTS
-@app.post("/admin/create-user", response_model=UserResponse)
-async def admin_create_user(
+@router.post("/admin/create-user", response_model=UserResponse)
+def admin_create_user(
     user_data: AdminCreateUser, 
     db: Session = Depends(get_db),
     admin_user = Depends(require_admin)
@@ -158,7 +181,7 @@ async def admin_create_user(
         )
     
     # Create new admin user
-    hashed_password = get_password_hash(user_data.password)
+    hashed_password = password_hash_pool.hash(user_data.password)
     db_user = User(
         dni=user_data.dni,
         nombre=user_data.nombre,
@@ -177,8 +200,8 @@ async def admin_create_user(
     
     return UserResponse.model_validate(db_user)
 
-@app.post("/admin/register-doctor", response_model=DoctorResponse)
-async def admin_register_doctor(
+@router.post("/admin/register-doctor", response_model=DoctorResponse)
+def admin_register_doctor(
     doctor_data: DoctorRegister,
     db: Session = Depends(get_db),
     admin_user = Depends(require_admin)
@@ -214,10 +237,9 @@ async def admin_register_doctor(
         db_user = existing_user
     else:
         # Create new user with patient and doctor roles
-        from ..core.auth import get_password_hash
         import secrets
         temp_password = secrets.token_urlsafe(12)  # Generate temporary password
-        hashed_password = get_password_hash(temp_password)
+        hashed_password = password_hash_pool.hash(temp_password)
         
         db_user = User(
             dni=doctor_data.dni,
@@ -290,41 +312,58 @@ async def admin_register_doctor(
     
     return DoctorResponse(**doctor_response_data)
 
-@app.get("/admin/backoffice", response_model=BackofficeStats)
-async def get_backoffice_stats(
+@router.get("/admin/backoffice", response_model=BackofficeStats)
+def get_backoffice_stats(
     db: Session = Depends(get_db),
-    admin_user = Depends(require_admin)
+    admin_user = Depends(require_admin),
+    include: Optional[str] = None,
+    days: int = 30
 ):
-    """Get backoffice statistics"""
-    # Get counts using new role system
-    all_users = db.query(User).all()
-    total_patients = sum(1 for user in all_users if user.has_role("patient"))
-    total_doctors = db.query(DoctorProfile).count()  # Count doctor profiles
-    total_admins = sum(1 for user in all_users if user.has_role("admin"))
-    
-    # Recent registrations (last 7 days)
-    seven_days_ago = datetime.now() - timedelta(days=7)
-    recent_registrations = db.query(User).filter(User.created_at >= seven_days_ago).count()
-    
-    return BackofficeStats(
-        total_patients=total_patients,
-        total_doctors=total_doctors,
-        total_admins=total_admins,
-        recent_registrations=recent_registrations
-    )
+    """Get backoffice statistics (?include=status,specialty,day adds appointment breakdowns)"""
+    breakdowns = {item.strip() for item in include.split(',') if item.strip()} if include else set()
+    invalid = breakdowns - set(BACKOFFICE_BREAKDOWNS)
+    if invalid:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Desglose no válido: {', '.join(sorted(invalid))}. Opciones: {', '.join(BACKOFFICE_BREAKDOWNS)}"
+        )
+    
+    if days < 1 or days > 365:
+        raise HTTPException(status_code=400, detail="El parámetro days debe estar entre 1 y 365")
+    
+    # Aggregate SQL only, served from a snapshot refreshed on writes or after the TTL
+    return BackofficeStats(**get_backoffice_stats_snapshot(db, breakdowns, days))
 
-@app.get("/admin/doctors", response_model=list[DoctorResponse])
-async def get_all_doctors(
+def set_cursor_headers(response: Response, next_cursor: Optional[str], prev_cursor: Optional[str]):
+    """Keyset cursors for list endpoints whose body is a bare list"""
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
+    if prev_cursor:
+        response.headers["X-Prev-Cursor"] = prev_cursor
+
+@router.get("/admin/doctors", response_model=list[DoctorResponse])
+def get_all_doctors(
+    response: Response,
     db: Session = Depends(get_db),
     admin_user = Depends(require_admin),
+    cursor: Optional[str] = None,
+    include_total: bool = False,
     skip: int = 0,
     limit: int = 100
 ):
-    """Get all doctors (admin only)"""
+    """Get all doctors (admin only); X-Next-Cursor / X-Prev-Cursor headers page by id"""
     # Join User and DoctorProfile tables
-    doctor_profiles = db.query(DoctorProfile).join(User, DoctorProfile.user_id == User.id).filter(
+    query = db.query(DoctorProfile).join(User, DoctorProfile.user_id == User.id).filter(
         DoctorProfile.is_active == True
-    ).offset(skip).limit(limit).all()
+    )
+    
+    if include_total:
+        response.headers["X-Total-Count"] = str(query.count())
+    
+    doctor_profiles, next_cursor, prev_cursor = paginate_keyset(
+        query.options(contains_eager(DoctorProfile.user)), [DoctorProfile.id], limit, cursor=cursor, skip=skip
+    )
+    set_cursor_headers(response, next_cursor, prev_cursor)
     
     doctors = []
     for profile in doctor_profiles:
@@ -361,42 +400,64 @@ async def get_all_doctors(
     
     return doctors
 
-@app.get("/admin/users", response_model=list[UserResponse])
-async def get_all_users(
+@router.get("/admin/users", response_model=list[UserResponse])
+def get_all_users(
+    response: Response,
     db: Session = Depends(get_db),
     admin_user = Depends(require_admin),
+    cursor: Optional[str] = None,
+    include_total: bool = False,
     skip: int = 0,
     limit: int = 100
 ):
-    """Get all users (admin only)"""
-    users = db.query(User).offset(skip).limit(limit).all()
-    return [UserResponse.model_validate(user) for user in users]
+    """Get all users (admin only); X-Next-Cursor / X-Prev-Cursor headers page by id"""
+    query = db.query(User)
+    
+    if include_total:
+        response.headers["X-Total-Count"] = str(query.count())
+    
+    users, next_cursor, prev_cursor = paginate_keyset(query, [User.id], limit, cursor=cursor, skip=skip)
+    set_cursor_headers(response, next_cursor, prev_cursor)
+    return serialized_response(list[UserResponse], [UserResponse.model_validate(user) for user in users], response)
 
 # PUBLIC DOCTOR ENDPOINTS (for patients)
-@app.get("/doctors", response_model=list[DoctorResponse])
-async def get_doctors_public(
+@router.get("/doctors", response_model=list[DoctorResponse])
+def get_doctors_public(
+    request: Request,
     db: Session = Depends(get_db),
     especialidad: str = None,
     skip: int = 0,
     limit: int = 20
 ):
-    """Get doctors list (public endpoint for patients)"""
-    query = db.query(DoctorProfile).join(User, DoctorProfile.user_id == User.id).filter(
-        DoctorProfile.is_active == True,
-        User.is_active == True
-    )
-    
+    """Get doctors list (public endpoint for patients, cached per especialidad/page with an ETag)"""
+    especialidad_enum = None
     if especialidad:
         try:
-            from models import EspecialidadMedica
             especialidad_enum = EspecialidadMedica(especialidad)
-            query = query.filter(DoctorProfile.especialidad == especialidad_enum)
         except ValueError:
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
                 detail="Especialidad no válida"
             )
     
+    return cached_directory_response(
+        request,
+        db,
+        ("list", especialidad_enum, skip, limit),
+        lambda: serialize_doctors(build_doctor_directory(db, especialidad_enum, skip, limit))
+    )
+
+def build_doctor_directory(db: Session, especialidad_enum: Optional[EspecialidadMedica], skip: int, limit: int):
+    query = db.query(DoctorProfile).join(User, DoctorProfile.user_id == User.id).options(
+        contains_eager(DoctorProfile.user)
+    ).filter(
+        DoctorProfile.is_active == True,
+        User.is_active == True
+    )
+    
+    if especialidad_enum:
+        query = query.filter(DoctorProfile.especialidad == especialidad_enum)
+    
     doctor_profiles = query.offset(skip).limit(limit).all()
     
     doctors = []
@@ -434,9 +495,14 @@ async def get_doctors_public(
     
     return doctors
 
-@app.get("/doctors/{doctor_id}", response_model=DoctorResponse)
-async def get_doctor_by_id(doctor_id: int, db: Session = Depends(get_db)):
-    """Get doctor details by ID"""
+@router.get("/doctors/{doctor_id}", response_model=DoctorResponse)
+def get_doctor_by_id(doctor_id: int, request: Request, db: Session = Depends(get_db)):
+    """Get doctor details by ID (cached with an ETag)"""
+    return cached_directory_response(
+        request, db, ("doctor", doctor_id), lambda: serialize_doctor(build_doctor_detail(db, doctor_id))
+    )
+
+def build_doctor_detail(db: Session, doctor_id: int):
     # doctor_id now refers to user.id
     user = db.query(User).filter(User.id == doctor_id, User.is_active == True).first()
     if not user or not user.has_role("doctor"):
@@ -489,16 +555,9 @@ async def get_doctor_by_id(doctor_id: int, db: Session = Depends(get_db)):
 
 # APPOINTMENT MANAGEMENT ENDPOINTS
 
-def get_current_user_object(current_user_email: str = Depends(get_current_user), db: Session = Depends(get_db)):
-    """Helper function to get full user object from email"""
-    user = db.query(User).filter(User.email == current_user_email).first()
-    if not user:
-        raise HTTPException(status_code=404, detail="Usuario no encontrado")
-    return user
-
 # DOCTOR AVAILABILITY MANAGEMENT
-@app.post("/admin/doctor-availability", response_model=DoctorAvailabilityResponse)
-async def create_doctor_availability(
+@router.post("/admin/doctor-availability", response_model=DoctorAvailabilityResponse)
+def create_doctor_availability(
     availability_data: DoctorAvailabilityCreate,
     db: Session = Depends(get_db),
     admin_user = Depends(require_admin)
@@ -533,12 +592,20 @@ async def create_doctor_availability(
     
     return DoctorAvailabilityResponse.model_validate(availability)
 
-@app.get("/doctor-availability/{doctor_profile_id}", response_model=List[DoctorAvailabilityResponse])
-async def get_doctor_availability(
+@router.get("/doctor-availability/{doctor_profile_id}", response_model=List[DoctorAvailabilityResponse])
+def get_doctor_availability(
     doctor_profile_id: int,
+    request: Request,
+    response: Response,
     db: Session = Depends(get_db)
 ):
-    """Get doctor availability schedule"""
+    """Get doctor availability schedule (304 while the schedule is unchanged)"""
+    resource = f"availability:{doctor_profile_id}"
+    etag = resource_etag(request, get_resource_versions(db, resource))
+    not_modified = check_not_modified(request, response, etag, cache_control="public, no-cache")
+    if not_modified:
+        return not_modified
+    
     availabilities = db.query(DoctorAvailability).filter(
         DoctorAvailability.doctor_profile_id == doctor_profile_id,
         DoctorAvailability.is_active == True
@@ -547,11 +614,11 @@ async def get_doctor_availability(
     return [DoctorAvailabilityResponse.model_validate(avail) for avail in availabilities]
 
 # APPOINTMENT BOOKING
-@app.post("/appointments", response_model=AppointmentResponse)
-async def create_appointment(
+@router.post("/appointments", response_model=AppointmentResponse)
+def create_appointment(
     appointment_data: AppointmentCreate,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user_object)
+    current_user: AuthenticatedUser = Depends(get_current_principal)
 ):
     """Create new appointment (patient only)"""
     # Verify user has patient role
@@ -561,11 +628,9 @@ async def create_appointment(
             detail="Solo los pacientes pueden crear citas"
         )
     
-    # Verify doctor profile exists and is active
-    doctor_profile = db.query(DoctorProfile).filter(
-        DoctorProfile.id == appointment_data.doctor_profile_id,
-        DoctorProfile.is_active == True
-    ).first()
+    # Verify doctor profile exists and is active, locking the doctor's schedule until commit
+    # so two concurrent bookings cannot both pass the conflict check
+    doctor_profile = Appointment.lock_doctor_schedule(db, appointment_data.doctor_profile_id)
     
     if not doctor_profile:
         raise HTTPException(status_code=404, detail="Médico no encontrado")
@@ -577,27 +642,15 @@ async def create_appointment(
             detail="Los médicos no pueden programar citas consigo mismos"
         )
     
-    # Check for appointment conflicts
+    # Check for appointment conflicts (single indexed overlap query)
     appointment_end = appointment_data.appointment_date + timedelta(minutes=appointment_data.duration_minutes)
     
-    # Get all appointments for this doctor and check conflicts in Python
-    existing_appointments = db.query(Appointment).filter(
-        Appointment.doctor_profile_id == appointment_data.doctor_profile_id,
-        Appointment.status.in_([AppointmentStatus.SCHEDULED, AppointmentStatus.CONFIRMED, AppointmentStatus.IN_PROGRESS]),
-        Appointment.appointment_date >= appointment_data.appointment_date - timedelta(hours=6),  # Look 6 hours before
-        Appointment.appointment_date <= appointment_end + timedelta(hours=6)  # Look 6 hours after
-    ).all()
-    
-    # Check for time conflicts in Python
-    conflicting_appointments = None
-    for existing in existing_appointments:
-        existing_end = existing.appointment_date + timedelta(minutes=existing.duration_minutes)
-        if (existing.appointment_date < appointment_end and 
-            existing_end > appointment_data.appointment_date):
-            conflicting_appointments = existing
-            break
+    conflicting_appointment = Appointment.find_conflicts(
+        db, appointment_data.doctor_profile_id, appointment_data.appointment_date, appointment_end,
+        for_update=True
+    ).first()
     
-    if conflicting_appointments:
+    if conflicting_appointment:
         raise HTTPException(
             status_code=400,
             detail="El médico ya tiene una cita programada en ese horario"
@@ -636,15 +689,65 @@ async def create_appointment(
         created_at=None  # We don't have this without reading from DB
     )
 
-@app.get("/appointments", response_model=AppointmentListResponse)
-async def get_user_appointments(
+APPOINTMENT_EXPANSIONS = {"patient", "doctor"}
+
+# Listing order (newest first); id breaks ties so keyset cursors are exact
+APPOINTMENT_LIST_ORDER = [Appointment.appointment_date, Appointment.id]
+
+def parse_appointment_expand(expand: Optional[str]) -> set:
+    """Parse the ?expand= parameter of appointment listings ("patient,doctor")"""
+    if not expand:
+        return set()
+    
+    expansions = {item.strip() for item in expand.split(',') if item.strip()}
+    invalid = expansions - APPOINTMENT_EXPANSIONS
+    if invalid:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Expansión no válida: {', '.join(sorted(invalid))}. Opciones: patient, doctor"
+        )
+    return expansions
+
+def apply_appointment_expansions(query, expansions: set):
+    """Eager load the expanded relationships so a page costs one query instead of one per row"""
+    if "patient" in expansions:
+        query = query.options(joinedload(Appointment.patient))
+    if "doctor" in expansions:
+        query = query.options(joinedload(Appointment.doctor_profile).joinedload(DoctorProfile.user))
+    return query
+
+def build_expanded_appointment(appointment: Appointment, expansions: set) -> AppointmentExpandedResponse:
+    """Build a list item with the requested patient/doctor details (relationships must be eager loaded)"""
+    item = AppointmentExpandedResponse.model_validate(appointment)
+    
+    if "patient" in expansions and appointment.patient:
+        item.patient_name = f"{appointment.patient.nombre} {appointment.patient.apellidos}"
+        item.patient_dni = appointment.patient.dni
+        item.patient_email = appointment.patient.email
+    
+    if "doctor" in expansions and appointment.doctor_profile:
+        doctor_user = appointment.doctor_profile.user
+        item.doctor_user_id = appointment.doctor_profile.user_id
+        item.doctor_name = f"{doctor_user.nombre} {doctor_user.apellidos}" if doctor_user else None
+        item.doctor_specialidad = appointment.doctor_profile.especialidad
+    
+    return item
+
+@router.get("/appointments", response_model=AppointmentListResponse)
+def get_user_appointments(
+    request: Request,
+    response: Response,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user_object),
+    current_user: AuthenticatedUser = Depends(get_token_principal),
     status_filter: AppointmentStatus = None,
+    expand: Optional[str] = None,
+    cursor: Optional[str] = None,
+    include_total: bool = True,
     skip: int = 0,
     limit: int = 20
 ):
-    """Get appointments for current user"""
+    """Get appointments for current user (?expand=patient,doctor adds names in the same response)"""
+    expansions = parse_appointment_expand(expand)
     query = db.query(Appointment)
     
     if current_user.has_role("doctor"):
@@ -656,31 +759,45 @@ async def get_user_appointments(
         
         if doctor_profile:
             query = query.filter(Appointment.doctor_profile_id == doctor_profile.id)
+            resource = f"appointments:doctor:{doctor_profile.id}"
         else:
             # No doctor profile found, return empty
             return AppointmentListResponse(appointments=[], total=0, page=skip//limit + 1, size=limit)
     else:
         # Get appointments where user is the patient
         query = query.filter(Appointment.patient_id == current_user.id)
+        resource = f"appointments:patient:{current_user.id}"
+    
+    # Before the count and page queries: an unchanged list costs one primary key lookup
+    etag = resource_etag(request, current_user.id, resource, get_resource_versions(db, resource))
+    not_modified = check_not_modified(request, response, etag)
+    if not_modified:
+        return not_modified
     
     if status_filter:
         query = query.filter(Appointment.status == status_filter)
     
-    total = query.count()
-    appointments = query.order_by(Appointment.appointment_date.desc()).offset(skip).limit(limit).all()
+    total = query.count() if include_total else None
     
-    return AppointmentListResponse(
-        appointments=[AppointmentResponse.model_validate(apt) for apt in appointments],
-        total=total,
-        page=skip//limit + 1,
-        size=limit
+    query = apply_appointment_expansions(query, expansions)
+    appointments, next_cursor, prev_cursor = paginate_keyset(
+        query, APPOINTMENT_LIST_ORDER, limit, cursor=cursor, descending=True, skip=skip
     )
+    
+    return serialized_response(AppointmentListResponse, AppointmentListResponse(
+        appointments=[build_expanded_appointment(apt, expansions) for apt in appointments],
+        total=total,
+        page=skip//limit + 1 if cursor is None else None,
+        size=limit,
+        next_cursor=next_cursor,
+        prev_cursor=prev_cursor
+    ), response)
 
-@app.get("/appointments/{appointment_id}", response_model=AppointmentDetailedResponse)
-async def get_appointment(
+@router.get("/appointments/{appointment_id}", response_model=AppointmentDetailedResponse)
+def get_appointment(
     appointment_id: int,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user_object)
+    current_user: AuthenticatedUser = Depends(get_current_principal)
 ):
     """Get appointment details"""
     appointment = db.query(Appointment).filter(Appointment.id == appointment_id).first()
@@ -728,12 +845,12 @@ async def get_appointment(
     
     return AppointmentDetailedResponse(**response_data)
 
-@app.put("/appointments/{appointment_id}", response_model=AppointmentResponse)
-async def update_appointment(
+@router.put("/appointments/{appointment_id}", response_model=AppointmentResponse)
+def update_appointment(
     appointment_id: int,
     update_data: AppointmentUpdate,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user_object)
+    current_user: AuthenticatedUser = Depends(get_current_principal)
 ):
     """Update appointment"""
     appointment = db.query(Appointment).filter(Appointment.id == appointment_id).first()
@@ -767,6 +884,26 @@ async def update_appointment(
     # Update fields
     update_dict = update_data.model_dump(exclude_unset=True)
     
+    # Rescheduling (or reactivating) must not overlap the doctor's other active appointments
+    new_status = update_dict.get("status") or appointment.status
+    rescheduling = bool(update_dict.get("appointment_date") or update_dict.get("duration_minutes"))
+    reactivating = appointment.status not in ACTIVE_APPOINTMENT_STATUSES
+    
+    if new_status in ACTIVE_APPOINTMENT_STATUSES and (rescheduling or reactivating):
+        new_start = update_dict.get("appointment_date") or appointment.appointment_date
+        new_end = new_start + timedelta(minutes=update_dict.get("duration_minutes") or appointment.duration_minutes)
+        
+        Appointment.lock_doctor_schedule(db, appointment.doctor_profile_id)
+        conflicting_appointment = Appointment.find_conflicts(
+            db, appointment.doctor_profile_id, new_start, new_end,
+            exclude_appointment_id=appointment.id, for_update=True
+        ).first()
+        if conflicting_appointment:
+            raise HTTPException(
+                status_code=400,
+                detail="El médico ya tiene una cita programada en ese horario"
+            )
+    
     for field, value in update_dict.items():
         if hasattr(appointment, field):
             setattr(appointment, field, value)
@@ -783,12 +920,12 @@ async def update_appointment(
     
     return AppointmentResponse.model_validate(appointment)
 
-@app.delete("/appointments/{appointment_id}")
-async def cancel_appointment(
+@router.delete("/appointments/{appointment_id}")
+def cancel_appointment(
     appointment_id: int,
     cancellation_reason: str = None,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user_object)
+    current_user: AuthenticatedUser = Depends(get_current_principal)
 ):
     """Cancel appointment"""
     appointment = db.query(Appointment).filter(Appointment.id == appointment_id).first()
@@ -830,16 +967,20 @@ async def cancel_appointment(
     return {"message": "Cita cancelada exitosamente"}
 
 # ADMIN APPOINTMENT MANAGEMENT
-@app.get("/admin/appointments", response_model=AppointmentListResponse)
-async def get_all_appointments(
+@router.get("/admin/appointments", response_model=AppointmentListResponse)
+def get_all_appointments(
     db: Session = Depends(get_db),
     admin_user = Depends(require_admin),
     status_filter: AppointmentStatus = None,
     doctor_id: int = None,
+    expand: Optional[str] = None,
+    cursor: Optional[str] = None,
+    include_total: bool = True,
     skip: int = 0,
     limit: int = 50
 ):
     """Get all appointments (admin only)"""
+    expansions = parse_appointment_expand(expand)
     query = db.query(Appointment)
     
     if status_filter:
@@ -853,25 +994,64 @@ async def get_all_appointments(
         if doctor_profile:
             query = query.filter(Appointment.doctor_profile_id == doctor_profile.id)
     
-    total = query.count()
-    appointments = query.order_by(Appointment.appointment_date.desc()).offset(skip).limit(limit).all()
+    total = query.count() if include_total else None
     
-    return AppointmentListResponse(
-        appointments=[AppointmentResponse.model_validate(apt) for apt in appointments],
+    query = apply_appointment_expansions(query, expansions)
+    appointments, next_cursor, prev_cursor = paginate_keyset(
+        query, APPOINTMENT_LIST_ORDER, limit, cursor=cursor, descending=True, skip=skip
+    )
+    
+    return serialized_response(AppointmentListResponse, AppointmentListResponse(
+        appointments=[build_expanded_appointment(apt, expansions) for apt in appointments],
         total=total,
-        page=skip//limit + 1,
-        size=limit
+        page=skip//limit + 1 if cursor is None else None,
+        size=limit,
+        next_cursor=next_cursor,
+        prev_cursor=prev_cursor
+    ))
+
+@router.get("/admin/appointments/export")
+def export_appointments(
+    db: Session = Depends(get_db),
+    admin_user = Depends(require_admin),
+    format: str = "ndjson",
+    date_from: Optional[date] = None,
+    date_to: Optional[date] = None,
+    doctor_id: int = None,
+    status_filter: AppointmentStatus = None
+):
+    """Stream every matching appointment as NDJSON or CSV (admin only); date_to is inclusive"""
+    if format not in EXPORT_FORMATS:
+        raise HTTPException(status_code=400, detail="Formato no válido (ndjson o csv)")
+    if date_from and date_to and date_to < date_from:
+        raise HTTPException(status_code=400, detail="date_to debe ser igual o posterior a date_from")
+    
+    doctor_profile_id = None
+    if doctor_id:
+        # Unlike the paged listing, an unknown doctor must not silently export everything
+        doctor_profile = db.query(DoctorProfile).filter(DoctorProfile.user_id == doctor_id).first()
+        if not doctor_profile:
+            raise HTTPException(status_code=404, detail="Médico no encontrado")
+        doctor_profile_id = doctor_profile.id
+    
+    statement = appointment_export_query(date_from, date_to, doctor_profile_id, status_filter)
+    filename = f"citas_{datetime.now():%Y%m%d_%H%M%S}.{format}"
+    return StreamingResponse(
+        stream_appointment_export(statement, format),
+        media_type=EXPORT_FORMATS[format],
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'}
     )
 
 # APPOINTMENT SCHEDULING AND AVAILABILITY
-@app.post("/appointments/availability", response_model=AppointmentAvailabilityResponse)
-async def get_appointment_availability(
+MAX_AVAILABILITY_RANGE_DAYS = 31
+MAX_SEARCH_HORIZON_DAYS = 90
+
+@router.post("/appointments/availability", response_model=AppointmentAvailabilityResponse)
+def get_appointment_availability(
     availability_request: AppointmentAvailabilityRequest,
     db: Session = Depends(get_db)
 ):
     """Get available appointment slots for a doctor on a specific date"""
-    from datetime import datetime, timedelta
-    
     # Verify doctor profile exists
     doctor_profile = db.query(DoctorProfile).filter(
         DoctorProfile.id == availability_request.doctor_profile_id,
@@ -888,88 +1068,31 @@ async def get_appointment_availability(
         raise HTTPException(status_code=400, detail="Formato de fecha inválido")
     
     # Don't allow appointments in the past
-    if requested_date <= datetime.now().date():
-        return AppointmentAvailabilityResponse(
-            doctor_profile_id=availability_request.doctor_profile_id,
-            date=availability_request.date,
-            available_slots=[]
-        )
-    
-    # Get day of week (0=Monday, 6=Sunday)
-    day_of_week = requested_date.weekday()
-    
-    # Get doctor's availability for this day of week
-    availability = db.query(DoctorAvailability).filter(
-        DoctorAvailability.doctor_profile_id == availability_request.doctor_profile_id,
-        DoctorAvailability.day_of_week == day_of_week,
-        DoctorAvailability.is_active == True
-    ).first()
+    day_slots = None
+    if requested_date > datetime.now().date():
+        day_slots = load_day_slots(db, [doctor_profile.id], [requested_date])[(doctor_profile.id, requested_date)]
     
-    if not availability:
+    if not day_slots:
         return AppointmentAvailabilityResponse(
             doctor_profile_id=availability_request.doctor_profile_id,
             date=availability_request.date,
             available_slots=[]
         )
     
-    # Generate time slots based on availability
-    start_hour, start_min = map(int, availability.start_time.split(':'))
-    end_hour, end_min = map(int, availability.end_time.split(':'))
-    
-    start_time = datetime.combine(requested_date, datetime.min.time().replace(
-        hour=start_hour, minute=start_min
-    ))
-    end_time = datetime.combine(requested_date, datetime.min.time().replace(
-        hour=end_hour, minute=end_min
-    ))
-    
-    # Get existing appointments for this doctor on this date
-    existing_appointments = db.query(Appointment).filter(
-        Appointment.doctor_profile_id == availability_request.doctor_profile_id,
-        Appointment.status.in_([
-            AppointmentStatus.SCHEDULED, 
-            AppointmentStatus.CONFIRMED, 
-            AppointmentStatus.IN_PROGRESS
-        ]),
-        func.date(Appointment.appointment_date) == requested_date
-    ).all()
-    
-    # Generate all possible time slots
+    # Don't allow appointments too close to current time (2 hours minimum)
+    min_advance_time = datetime.now() + MIN_BOOKING_NOTICE
     available_slots = []
-    current_time = start_time
-    slot_duration = timedelta(minutes=availability.slot_duration_minutes)
-    buffer_time = timedelta(minutes=availability.buffer_minutes)
-    
-    while current_time + slot_duration <= end_time:
-        slot_end = current_time + slot_duration
-        is_available = True
-        reason = None
-        
-        # Check if this slot conflicts with existing appointments
-        for appointment in existing_appointments:
-            apt_start = appointment.appointment_date
-            apt_end = apt_start + timedelta(minutes=appointment.duration_minutes)
-            
-            # Check for overlap (with buffer time)
-            if (current_time < apt_end + buffer_time and 
-                slot_end + buffer_time > apt_start):
-                is_available = False
-                reason = "Cita ya programada"
-                break
-        
-        # Don't allow appointments too close to current time (2 hours minimum)
-        min_advance_time = datetime.now() + timedelta(hours=2)
-        if current_time < min_advance_time:
-            is_available = False
+    for index, bit in enumerate(day_slots.bitmap):
+        slot_start = day_slots.slot_start(index)
+        reason = None if bit == "1" else "Cita ya programada"
+        if slot_start < min_advance_time:
             reason = "Debe programar con al menos 2 horas de anticipación"
         
         available_slots.append(AppointmentTimeSlot(
-            time=current_time.strftime('%H:%M'),
-            available=is_available,
+            time=slot_start.strftime('%H:%M'),
+            available=reason is None,
             reason=reason
         ))
-        
-        current_time += slot_duration + buffer_time
     
     return AppointmentAvailabilityResponse(
         doctor_profile_id=availability_request.doctor_profile_id,
@@ -977,14 +1100,119 @@ async def get_appointment_availability(
         available_slots=available_slots
     )
 
-@app.get("/appointments/conflicts/{doctor_profile_id}")
-async def check_appointment_conflicts(
+@router.get("/appointments/availability/range", response_model=AppointmentAvailabilityRangeResponse)
+def get_appointment_availability_range(
+    date_from: date,
+    date_to: date,
+    doctor_profile_id: Optional[int] = None,
+    especialidad: Optional[EspecialidadMedica] = None,
+    db: Session = Depends(get_db)
+):
+    """Free slots of one doctor or every doctor of a specialty over several days, as a bitmap per day"""
+    if doctor_profile_id is None and especialidad is None:
+        raise HTTPException(status_code=400, detail="Debe indicar doctor_profile_id o especialidad")
+    
+    if date_to < date_from:
+        raise HTTPException(status_code=400, detail="date_to debe ser igual o posterior a date_from")
+    
+    if (date_to - date_from).days >= MAX_AVAILABILITY_RANGE_DAYS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"El rango no puede superar {MAX_AVAILABILITY_RANGE_DAYS} días"
+        )
+    
+    doctors_query = db.query(DoctorProfile.id).filter(DoctorProfile.is_active == True)
+    if doctor_profile_id is not None:
+        doctors_query = doctors_query.filter(DoctorProfile.id == doctor_profile_id)
+    if especialidad is not None:
+        doctors_query = doctors_query.filter(DoctorProfile.especialidad == especialidad)
+    doctor_ids = [row.id for row in doctors_query.order_by(DoctorProfile.id)]
+    
+    if doctor_profile_id is not None and not doctor_ids:
+        raise HTTPException(status_code=404, detail="Médico no encontrado")
+    
+    # Past days and today have no bookable slots
+    first_day = max(date_from, datetime.now().date() + timedelta(days=1))
+    days = [first_day + timedelta(days=offset) for offset in range((date_to - first_day).days + 1)]
+    grid = load_day_slots(db, doctor_ids, days)
+    
+    min_advance_time = datetime.now() + MIN_BOOKING_NOTICE
+    doctors = []
+    for doctor_id in doctor_ids:
+        doctor_days = []
+        for day in days:
+            day_slots = grid[(doctor_id, day)]
+            if not day_slots:
+                continue
+            day_slots = day_slots.with_notice(min_advance_time)
+            doctor_days.append(DayAvailability(
+                date=day.isoformat(),
+                first_slot=day_slots.first_slot.strftime('%H:%M'),
+                step_minutes=day_slots.step_minutes,
+                slot_duration_minutes=day_slots.slot_duration_minutes,
+                bitmap=day_slots.bitmap
+            ))
+        doctors.append(DoctorRangeAvailability(doctor_profile_id=doctor_id, days=doctor_days))
+    
+    return AppointmentAvailabilityRangeResponse(
+        date_from=date_from.isoformat(),
+        date_to=date_to.isoformat(),
+        doctors=doctors
+    )
+
+@router.get("/appointments/availability/next", response_model=NextAvailableResponse)
+def get_next_available_slots(
+    especialidad: EspecialidadMedica,
+    date_from: Optional[date] = None,
+    horizon_days: int = 60,
+    limit: int = 5,
+    db: Session = Depends(get_db)
+):
+    """Earliest free slots across every active doctor of a specialty"""
+    if not 1 <= limit <= 50:
+        raise HTTPException(status_code=400, detail="limit debe estar entre 1 y 50")
+    
+    if not 1 <= horizon_days <= MAX_SEARCH_HORIZON_DAYS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"horizon_days debe estar entre 1 y {MAX_SEARCH_HORIZON_DAYS}"
+        )
+    
+    doctors = dict(
+        (row.id, f"{row.nombre} {row.apellidos}")
+        for row in db.query(DoctorProfile.id, User.nombre, User.apellidos)
+        .join(User, DoctorProfile.user_id == User.id)
+        .filter(DoctorProfile.is_active == True, DoctorProfile.especialidad == especialidad)
+        .order_by(DoctorProfile.id)
+    )
+    
+    # Past days and today have no bookable slots
+    first_day = max(date_from or date.min, datetime.now().date() + timedelta(days=1))
+    slots = find_next_free_slots(
+        db, list(doctors), first_day, horizon_days, limit, datetime.now() + MIN_BOOKING_NOTICE
+    )
+    
+    return NextAvailableResponse(
+        especialidad=especialidad,
+        slots=[
+            NextAvailableSlot(
+                doctor_profile_id=doctor_id,
+                doctor_name=doctors[doctor_id],
+                start=start,
+                duration_minutes=duration_minutes
+            )
+            for start, doctor_id, duration_minutes in slots
+        ]
+    )
+
+@router.get("/appointments/conflicts/{doctor_profile_id}")
+def check_appointment_conflicts(
     doctor_profile_id: int,
     appointment_date: str,  # ISO format: 2024-01-15T10:30:00
     duration_minutes: int = 30,
     exclude_appointment_id: int = None,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user_object)
+    current_user: AuthenticatedUser = Depends(get_current_principal)
 ):
     """Check for appointment conflicts before booking"""
     try:
@@ -1004,31 +1232,17 @@ async def check_appointment_conflicts(
     # Check for conflicts
     appointment_end = appointment_datetime + timedelta(minutes=duration_minutes)
     
-    query = db.query(Appointment).filter(
-        Appointment.doctor_profile_id == doctor_profile_id,
-        Appointment.status.in_([
-            AppointmentStatus.SCHEDULED, 
-            AppointmentStatus.CONFIRMED, 
-            AppointmentStatus.IN_PROGRESS
-        ]),
-        Appointment.appointment_date < appointment_end,
-        func.date_add(
-            Appointment.appointment_date, 
-            func.interval(Appointment.duration_minutes, "MINUTE")
-        ) > appointment_datetime
-    )
-    
-    if exclude_appointment_id:
-        query = query.filter(Appointment.id != exclude_appointment_id)
-    
-    conflicts = query.all()
+    conflicts = Appointment.find_conflicts(
+        db, doctor_profile_id, appointment_datetime, appointment_end,
+        exclude_appointment_id=exclude_appointment_id
+    ).options(joinedload(Appointment.patient)).all()
     
     has_conflicts = len(conflicts) > 0
     conflict_details = []
     
     for conflict in conflicts:
         conflict_end = conflict.appointment_date + timedelta(minutes=conflict.duration_minutes)
-        patient = db.query(User).filter(User.id == conflict.patient_id).first()
+        patient = conflict.patient
         
         conflict_details.append({
             "appointment_id": conflict.id,
@@ -1052,13 +1266,13 @@ async def check_appointment_conflicts(
     }
 
 # APPOINTMENT STATUS MANAGEMENT
-@app.patch("/appointments/{appointment_id}/status")
-async def update_appointment_status(
+@router.patch("/appointments/{appointment_id}/status")
+def update_appointment_status(
     appointment_id: int,
     new_status: AppointmentStatus,
     reason: str = None,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user_object)
+    current_user: AuthenticatedUser = Depends(get_current_principal)
 ):
     """Update appointment status with proper validations"""
     appointment = db.query(Appointment).filter(Appointment.id == appointment_id).first()
@@ -1153,11 +1367,11 @@ async def update_appointment_status(
         "updated_at": datetime.now().isoformat()
     }
 
-@app.post("/appointments/{appointment_id}/confirm")
-async def confirm_appointment(
+@router.post("/appointments/{appointment_id}/confirm")
+def confirm_appointment(
     appointment_id: int,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user_object)
+    current_user: AuthenticatedUser = Depends(get_current_principal)
 ):
     """Confirm a scheduled appointment (doctor or admin only)"""
     appointment = db.query(Appointment).filter(Appointment.id == appointment_id).first()
@@ -1203,12 +1417,12 @@ async def confirm_appointment(
     
     return {"message": "Cita confirmada exitosamente", "status": "confirmed"}
 
-@app.post("/appointments/{appointment_id}/complete")
-async def complete_appointment(
+@router.post("/appointments/{appointment_id}/complete")
+def complete_appointment(
     appointment_id: int,
     notes: str = None,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user_object)
+    current_user: AuthenticatedUser = Depends(get_current_principal)
 ):
     """Mark appointment as completed (doctor or admin only)"""
     appointment = db.query(Appointment).filter(Appointment.id == appointment_id).first()
@@ -1258,11 +1472,11 @@ async def complete_appointment(
     
     return {"message": "Cita completada exitosamente", "status": "completed"}
 
-@app.post("/appointments/{appointment_id}/no-show")
-async def mark_no_show(
+@router.post("/appointments/{appointment_id}/no-show")
+def mark_no_show(
     appointment_id: int,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user_object)
+    current_user: AuthenticatedUser = Depends(get_current_principal)
 ):
     """Mark appointment as no-show (doctor or admin only)"""
     appointment = db.query(Appointment).filter(Appointment.id == appointment_id).first()
@@ -1308,11 +1522,13 @@ async def mark_no_show(
     
     return {"message": "Cita marcada como 'no show' exitosamente", "status": "no_show"}
 
-@app.get("/appointments/{appointment_id}/history")
-async def get_appointment_history(
+@router.get("/appointments/{appointment_id}/history")
+def get_appointment_history(
     appointment_id: int,
+    request: Request,
+    response: Response,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user_object)
+    current_user: AuthenticatedUser = Depends(get_current_principal)
 ):
     """Get appointment change history"""
     appointment = db.query(Appointment).filter(Appointment.id == appointment_id).first()
@@ -1337,6 +1553,12 @@ async def get_appointment_history(
     if not can_view:
         raise HTTPException(status_code=403, detail="No tiene permisos para ver el historial de esta cita")
     
+    resource = f"appointment:{appointment_id}"
+    etag = resource_etag(request, get_resource_versions(db, resource))
+    not_modified = check_not_modified(request, response, etag)
+    if not_modified:
+        return not_modified
+    
     history = db.query(AppointmentHistory).filter(
         AppointmentHistory.appointment_id == appointment_id
     ).order_by(AppointmentHistory.changed_at.desc()).all()
@@ -1359,6 +1581,54 @@ async def get_appointment_history(
         "history": history_records
     }
 
+# APPLICATION FACTORY
+# Responses smaller than this are sent uncompressed (not worth the CPU or the gzip header)
+GZIP_MINIMUM_SIZE = int(os.getenv('GZIP_MINIMUM_SIZE', '1024'))
+# 1-9; 6 compresses JSON almost as well as 9 at a fraction of the CPU
+GZIP_COMPRESS_LEVEL = int(os.getenv('GZIP_COMPRESS_LEVEL', '6'))
+
+def create_app() -> FastAPI:
+    """Build the application (`uvicorn --factory app.api.main:create_app`); no database access happens here"""
+    application = FastAPI(
+        title="Hospital Appointment System",
+        description="A FastAPI application for managing doctor appointments",
+        version="1.0.0",
+        # Reuse the routes built at import; include_router() would rebuild every one of them
+        routes=list(router.routes)
+    )
+
+    # ETags (and 304s) for the GET endpoints that do not compute their own
+    application.add_middleware(ETagMiddleware)
+
+    # Compress outside the ETag middleware, so the (weak) tag is computed on the plain body
+    application.add_middleware(CompressionMiddleware, minimum_size=GZIP_MINIMUM_SIZE, compresslevel=GZIP_COMPRESS_LEVEL)
+
+    # Add CORS middleware to allow frontend connections
+    application.add_middleware(
+        CORSMiddleware,
+        allow_origins=["*"],  # In production, replace with specific domains
+        allow_credentials=True,
+        allow_methods=["*"],
+        allow_headers=["*"],
+        expose_headers=["X-Next-Cursor", "X-Prev-Cursor", "X-Total-Count", "ETag", "Content-Disposition"],
+    )
+
+    return application
+
+
+_app = None
+
+
+def __getattr__(name):
+    # `from app.api.main import app` (and uvicorn app.api.main:app) builds the app on first access
+    global _app
+    if name == "app":
+        if _app is None:
+            _app = create_app()
+        return _app
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
 if __name__ == "__main__":
     import uvicorn
-    uvicorn.run(app, host="0.0.0.0", port=8000)
\ No newline at end of file
+    uvicorn.run(create_app(), host="0.0.0.0", port=8000)
\ No newline at end of file
@@ -1,13 +1,31 @@
-from .database import test_database_connection, get_db, engine, Base
-from .auth import get_password_hash, verify_password, create_access_token, require_admin
+from .database import test_database_connection, get_db, get_engine, Base, create_db_engine, get_pool_metrics
+from .token_revocation import revocation_store
+from .auth import (
+    get_password_hash, verify_password, password_needs_rehash, upgrade_password_hash,
+    create_access_token, require_admin,
+    AuthenticatedUser, get_current_principal, get_token_principal, invalidate_user_cache,
+    password_hash_pool, decode_token_claims, revoke_token
+)
 
 __all__ = [
     "test_database_connection",
     "get_db", 
-    "engine",
+    "get_engine",
     "Base",
+    "create_db_engine",
+    "get_pool_metrics",
     "get_password_hash",
     "verify_password", 
+    "password_needs_rehash",
+    "upgrade_password_hash",
     "create_access_token",
-    "require_admin"
+    "require_admin",
+    "AuthenticatedUser",
+    "get_current_principal",
+    "get_token_principal",
+    "invalidate_user_cache",
+    "password_hash_pool",
+    "decode_token_claims",
+    "revoke_token",
+    "revocation_store"
 ]
\ No newline at end of file
@@ -1,12 +1,25 @@
 from datetime import datetime, timedelta
-from typing import Optional
-from jose import JWTError, jwt
-from passlib.context import CryptContext
+from typing import Optional, TYPE_CHECKING
 from fastapi import HTTPException, status, Depends
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
-from sqlalchemy.orm import Session
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session, object_session
+from dataclasses import dataclass
+from concurrent.futures import ThreadPoolExecutor
+import hashlib
 import os
+import threading
+import time
+import uuid
 from dotenv import load_dotenv
+from .database import get_db, SessionLocal
+from .token_revocation import revocation_store
+from ..models.models import User
+from ..utils.cache import TTLCache
+from ..utils.etag import get_resource_versions, principal_resource
+
+if TYPE_CHECKING:
+    from passlib.context import CryptContext
 
 # Load environment variables
 load_dotenv()
@@ -16,77 +29,283 @@ SECRET_KEY = os.getenv('SECRET_KEY', 'your-secret-key-change-in-production')
 ALGORITHM = os.getenv('ALGORITHM', 'HS256')
 ACCESS_TOKEN_EXPIRE_MINUTES = int(os.getenv('ACCESS_TOKEN_EXPIRE_MINUTES', '30'))
 
-# Password hashing
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+# Password hashing: the first scheme hashes new passwords; the others are still accepted and
+# hashes that are not on the current scheme/cost are upgraded after the next successful login
+PASSWORD_SCHEMES = [scheme.strip() for scheme in os.getenv('PASSWORD_SCHEMES', 'bcrypt').split(',') if scheme.strip()]
+BCRYPT_ROUNDS = int(os.getenv('BCRYPT_ROUNDS', '12'))
+PBKDF2_SHA256_ROUNDS = int(os.getenv('PBKDF2_SHA256_ROUNDS', '29000'))
+ARGON2_TIME_COST = int(os.getenv('ARGON2_TIME_COST', '2'))
+ARGON2_MEMORY_COST = int(os.getenv('ARGON2_MEMORY_COST', '65536'))  # KiB; argon2 needs argon2-cffi
+
+def build_password_context(
+    schemes,
+    bcrypt_rounds: int = BCRYPT_ROUNDS,
+    pbkdf2_sha256_rounds: int = PBKDF2_SHA256_ROUNDS,
+    argon2_time_cost: int = ARGON2_TIME_COST,
+    argon2_memory_cost: int = ARGON2_MEMORY_COST
+) -> "CryptContext":
+    """Password context for the given schemes (first one is the default) and cost parameters"""
+    # Imported here: passlib is only needed once a password is hashed or checked, not to start a worker
+    from passlib.context import CryptContext
+
+    return CryptContext(
+        schemes=list(schemes),
+        deprecated="auto",
+        bcrypt__rounds=bcrypt_rounds,
+        pbkdf2_sha256__rounds=pbkdf2_sha256_rounds,
+        argon2__time_cost=argon2_time_cost,
+        argon2__memory_cost=argon2_memory_cost,
+    )
+
+_pwd_context = None
+
+def get_password_context():
+    """The configured password context, built on first use"""
+    global _pwd_context
+    if _pwd_context is None:
+        _pwd_context = build_password_context(PASSWORD_SCHEMES)
+    return _pwd_context
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     """Verify a password against its hash"""
-    return pwd_context.verify(plain_password, hashed_password)
+    return get_password_context().verify(plain_password, hashed_password)
 
 def get_password_hash(password: str) -> str:
     """Hash a password"""
-    return pwd_context.hash(password)
+    return get_password_context().hash(password)
+
+def password_needs_rehash(hashed_password: str) -> bool:
+    """True when the hash uses a deprecated scheme or different cost settings"""
+    return get_password_context().needs_update(hashed_password)
+
+# Password hashing pool: bcrypt releases the GIL, so worker threads hash in parallel while
+# the number of hashes in flight stays bounded. PASSWORD_HASH_WORKERS=0 hashes inline.
+PASSWORD_HASH_WORKERS = int(os.getenv('PASSWORD_HASH_WORKERS', str(min(4, os.cpu_count() or 1))))
+PASSWORD_HASH_MAX_PENDING = int(os.getenv('PASSWORD_HASH_MAX_PENDING', '32'))
+PASSWORD_HASH_RETRY_AFTER_SECONDS = int(os.getenv('PASSWORD_HASH_RETRY_AFTER_SECONDS', '1'))
+
+class PasswordHashPool:
+    """Bounded pool for password hashing that answers 503 once max_pending hashes are queued or running"""
+    
+    def __init__(self, workers: int, max_pending: int):
+        self.workers = workers
+        self.max_pending = max_pending
+        self._executor = (
+            ThreadPoolExecutor(max_workers=workers, thread_name_prefix="password-hash") if workers > 0 else None
+        )
+        self._slots = threading.BoundedSemaphore(max_pending)
+        self._lock = threading.Lock()
+        self.pending = 0
+        self.completed = 0
+        self.rejected = 0
+    
+    def run(self, fn, *args):
+        if not self._slots.acquire(blocking=False):
+            with self._lock:
+                self.rejected += 1
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Servidor ocupado, inténtelo de nuevo en unos segundos",
+                headers={"Retry-After": str(PASSWORD_HASH_RETRY_AFTER_SECONDS)},
+            )
+        
+        with self._lock:
+            self.pending += 1
+        try:
+            if self._executor is None:
+                return fn(*args)
+            return self._executor.submit(fn, *args).result()
+        finally:
+            with self._lock:
+                self.pending -= 1
+                self.completed += 1
+            self._slots.release()
+    
+    def verify(self, plain_password: str, hashed_password: str) -> bool:
+        return self.run(verify_password, plain_password, hashed_password)
+    
+    def hash(self, password: str) -> str:
+        return self.run(get_password_hash, password)
+    
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "workers": self.workers,
+                "max_pending": self.max_pending,
+                "pending": self.pending,
+                "completed": self.completed,
+                "rejected": self.rejected,
+            }
+
+password_hash_pool = PasswordHashPool(PASSWORD_HASH_WORKERS, PASSWORD_HASH_MAX_PENDING)
+
+def upgrade_password_hash(user_id: int, plain_password: str, old_hash: str):
+    """Background task: store a hash with the current settings unless the password changed meanwhile"""
+    try:
+        new_hash = password_hash_pool.hash(plain_password)
+    except HTTPException:
+        return  # Pool saturated; the next login tries again
+    
+    db = SessionLocal()
+    try:
+        db.query(User).filter(
+            User.id == user_id,
+            User.hashed_password == old_hash
+        ).update({User.hashed_password: new_hash}, synchronize_session=False)
+        db.commit()
+    finally:
+        db.close()
 
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     """Create a JWT access token"""
+    from jose import jwt  # Deferred: jose loads the cryptography backend, which slows worker startup
+
     to_encode = data.copy()
     if expires_delta:
         expire = datetime.utcnow() + expires_delta
     else:
         expire = datetime.utcnow() + timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
     
-    to_encode.update({"exp": expire})
+    to_encode.update({"exp": expire, "iat": datetime.utcnow(), "jti": uuid.uuid4().hex})
     encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
     return encoded_jwt
 
-def verify_token(token: str):
-    """Verify and decode a JWT token"""
-    try:
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-        email: str = payload.get("sub")
-        if email is None:
+# Decoded token claims cache (sha256(token) -> claims); entries live until the token expires
+TOKEN_CACHE_MAX_SIZE = int(os.getenv('TOKEN_CACHE_MAX_SIZE', '4096'))
+# Embed uid/roles in new tokens so get_token_principal can skip the user query (opt-in)
+TOKEN_EMBED_PRINCIPAL = os.getenv('TOKEN_EMBED_PRINCIPAL', 'false').lower() == 'true'
+
+token_claims_cache = TTLCache(maxsize=TOKEN_CACHE_MAX_SIZE, ttl=ACCESS_TOKEN_EXPIRE_MINUTES * 60)
+
+def token_cache_key(token: str) -> str:
+    return hashlib.sha256(token.encode()).hexdigest()
+
+def principal_token_claims(user) -> dict:
+    """Claims for a new access token of `user` (a persistent instance, to embed the principal)"""
+    claims = {"sub": user.email}
+    db = object_session(user)
+    if TOKEN_EMBED_PRINCIPAL and db is not None:
+        # "pv": the user's principal version; any later change to the user or its roles bumps it
+        version, = get_resource_versions(db, principal_resource(user.id))
+        claims.update({"uid": user.id, "roles": user.get_roles(), "pv": version})
+    return claims
+
+def token_revocation_id(token: str, claims: dict) -> str:
+    """jti of the token; tokens issued without one are revoked by their hash"""
+    return claims.get("jti") or token_cache_key(token)
+
+def decode_token_claims(token: str) -> dict:
+    """Validate a JWT and return its claims, reusing the cached claims of tokens seen before"""
+    key = token_cache_key(token)
+    claims = token_claims_cache.get(key)
+    if claims is None:
+        from jose import JWTError, jwt  # Deferred, see create_access_token()
+
+        try:
+            claims = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+        except JWTError:
+            raise HTTPException(
+                status_code=status.HTTP_401_UNAUTHORIZED,
+                detail="Token inválido"
+            )
+        if claims.get("sub") is None:
             raise HTTPException(
                 status_code=status.HTTP_401_UNAUTHORIZED,
-                detail="Token inválido",
-                headers={"WWW-Authenticate": "Bearer"},
+                detail="Token inválido"
             )
-        return email
-    except JWTError:
+        if "exp" in claims:
+            token_claims_cache.set(key, claims, ttl=claims["exp"] - time.time())
+        else:
+            token_claims_cache.set(key, claims)
+    
+    # In-memory bloom filter check; only possible matches query revoked_tokens
+    if revocation_store.is_revoked(token_revocation_id(token, claims)):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="Token inválido",
-            headers={"WWW-Authenticate": "Bearer"},
+            detail="Token revocado"
         )
+    
+    return claims
+
+def revoke_token(token: str):
+    """Reject this token in every worker until it expires (logout)"""
+    try:
+        claims = decode_token_claims(token)
+    except HTTPException:
+        return  # Already invalid, expired or revoked
+    
+    expires_at = (
+        datetime.utcfromtimestamp(claims["exp"]) if "exp" in claims
+        else datetime.utcnow() + timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
+    )
+    revocation_store.revoke(token_revocation_id(token, claims), expires_at, claims["sub"])
+    token_claims_cache.pop(token_cache_key(token))
+
+def verify_token(token: str):
+    """Verify and decode a JWT token"""
+    return decode_token_claims(token)["sub"]
 
 # Security scheme
 security = HTTPBearer()
+optional_security = HTTPBearer(auto_error=False)
 
 def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(security)):
     """Get current authenticated user"""
-    try:
-        payload = jwt.decode(credentials.credentials, SECRET_KEY, algorithms=[ALGORITHM])
-        email: str = payload.get("sub")
-        if email is None:
-            raise HTTPException(
-                status_code=status.HTTP_401_UNAUTHORIZED,
-                detail="Token inválido"
-            )
-    except JWTError:
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="Token inválido"
-        )
-    return email
+    return decode_token_claims(credentials.credentials)["sub"]
+
+# Authenticated user cache (email -> principal version, user); an entry is only used while the
+# user's principal version in resource_versions, shared by every worker, is unchanged
+USER_CACHE_TTL_SECONDS = float(os.getenv('USER_CACHE_TTL_SECONDS', '30'))
+USER_CACHE_MAX_SIZE = int(os.getenv('USER_CACHE_MAX_SIZE', '1024'))
 
-def require_admin(current_user_email: str = Depends(get_current_user)):
-    """Require admin role - returns admin user"""
-    from sqlalchemy.orm import Session
-    from .database import SessionLocal
-    from ..models.models import User
+@dataclass(frozen=True)
+class AuthenticatedUser:
+    """Lightweight view of the authenticated user shared by the auth dependencies"""
+    id: int
+    email: str
+    roles: tuple
+    is_active: bool
     
-    # Get user from database
-    db = SessionLocal()
-    try:
+    def get_roles(self):
+        return list(self.roles)
+    
+    def has_role(self, role):
+        return role in self.roles
+
+user_cache = TTLCache(maxsize=USER_CACHE_MAX_SIZE, ttl=USER_CACHE_TTL_SECONDS)
+
+def invalidate_user_cache(email: str):
+    """Drop a cached user (call when roles or is_active change)"""
+    user_cache.pop(email)
+
+@event.listens_for(User, "after_update")
+def _invalidate_user_on_change(mapper, connection, target):
+    """Invalidate the cached entry when a flush changes roles, is_active or email"""
+    state = inspect(target)
+    if not any(state.attrs[name].history.has_changes() for name in ("roles", "is_active", "email")):
+        return
+    invalidate_user_cache(target.email)
+    for old_email in state.attrs.email.history.deleted:
+        invalidate_user_cache(old_email)
+
+@event.listens_for(User, "after_delete")
+def _invalidate_user_on_delete(mapper, connection, target):
+    invalidate_user_cache(target.email)
+
+def get_current_principal(
+    current_user_email: str = Depends(get_current_user),
+    db: Session = Depends(get_db)
+) -> AuthenticatedUser:
+    """Decode the JWT once and load the user once per request (cached while its principal version holds)"""
+    entry = user_cache.get(current_user_email)
+    principal = None
+    if entry is not None:
+        cached_version, cached = entry
+        version, = get_resource_versions(db, principal_resource(cached.id))
+        if version == cached_version:
+            principal = cached
+    
+    if principal is None:
         user = db.query(User).filter(User.email == current_user_email).first()
         if not user:
             raise HTTPException(
@@ -94,12 +313,51 @@ def require_admin(current_user_email: str = Depends(get_current_user)):
                 detail="Usuario no encontrado"
             )
         
-        if not user.has_role("admin"):
-            raise HTTPException(
-                status_code=status.HTTP_403_FORBIDDEN,
-                detail="Se requieren permisos de administrador"
-            )
-        
-        return user
-    finally:
-        db.close()
\ No newline at end of file
+        # Same transaction as the user query, so the version matches what was read
+        version, = get_resource_versions(db, principal_resource(user.id))
+        principal = AuthenticatedUser(
+            id=user.id,
+            email=user.email,
+            roles=tuple(user.get_roles()),
+            is_active=bool(user.is_active)
+        )
+        user_cache.set(current_user_email, (version, principal))
+    
+    if not principal.is_active:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Usuario inactivo"
+        )
+    
+    return principal
+
+def get_token_principal(
+    credentials: HTTPAuthorizationCredentials = Depends(security),
+    db: Session = Depends(get_db)
+) -> AuthenticatedUser:
+    """Principal for read-only endpoints that only return the caller's own data.
+    
+    Trusts the uid/roles embedded in the token (one resource_versions lookup instead of the
+    user query) while the user's principal version, shared by every worker, still matches the
+    one in the token, and only for patient-only tokens. Anything else goes through
+    get_current_principal; endpoints that read other users' data must use that directly.
+    """
+    claims = decode_token_claims(credentials.credentials)
+    email = claims["sub"]
+    
+    if "uid" in claims and "pv" in claims and claims.get("roles") == ["patient"]:
+        version, = get_resource_versions(db, principal_resource(claims["uid"]))
+        if version == claims["pv"]:
+            return AuthenticatedUser(id=claims["uid"], email=email, roles=("patient",), is_active=True)
+    
+    return get_current_principal(email, db)
+
+def require_admin(current_user: AuthenticatedUser = Depends(get_current_principal)):
+    """Require admin role - returns the authenticated admin user"""
+    if not current_user.has_role("admin"):
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Se requieren permisos de administrador"
+        )
+    
+    return current_user
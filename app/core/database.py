@@ -1,8 +1,11 @@
-from sqlalchemy import create_engine, text
+from sqlalchemy import create_engine, event, text
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
-import pymysql
+from sqlalchemy.pool import QueuePool
 import os
+import threading
+import time
 from dotenv import load_dotenv
 
 # Load environment variables
@@ -15,24 +18,176 @@ DB_NAME = os.getenv('DB_NAME', 'hospital')
 DB_USER = os.getenv('DB_USER', 'root')
 DB_PASSWORD = os.getenv('DB_PASSWORD', '')
 
-DATABASE_URL = f"mysql+pymysql://{DB_USER}:{DB_PASSWORD}@{DB_HOST}:{DB_PORT}/{DB_NAME}?charset=utf8mb4"
-
-# Create SQLAlchemy engine
-engine = create_engine(
-    DATABASE_URL,
-    echo=True,  # This will log all SQL queries - useful for debugging
-    pool_pre_ping=True,  # Verify connections before use
-    pool_recycle=300,  # Refresh connections every 5 minutes
-    connect_args={"charset": "utf8mb4"}  # Ensure UTF-8 encoding for special characters
+# DATABASE_URL overrides the MySQL settings above (e.g. sqlite:///./hospital.db for benchmarks)
+DATABASE_URL = os.getenv(
+    'DATABASE_URL',
+    f"mysql+pymysql://{DB_USER}:{DB_PASSWORD}@{DB_HOST}:{DB_PORT}/{DB_NAME}?charset=utf8mb4"
 )
 
+# Engine and pool settings
+DB_ECHO = os.getenv('DB_ECHO', 'false').lower() == 'true'  # Log every SQL query (debugging only)
+DB_POOL_SIZE = int(os.getenv('DB_POOL_SIZE', '10'))
+DB_MAX_OVERFLOW = int(os.getenv('DB_MAX_OVERFLOW', '20'))
+DB_POOL_TIMEOUT = float(os.getenv('DB_POOL_TIMEOUT', '30'))  # Seconds to wait for a free connection
+DB_POOL_RECYCLE = int(os.getenv('DB_POOL_RECYCLE', '300'))  # Refresh connections every 5 minutes
+# Pre-ping costs a round trip on every checkout; pool_recycle already retires
+# connections before MySQL's wait_timeout, so it is off unless requested
+DB_POOL_PRE_PING = os.getenv('DB_POOL_PRE_PING', 'false').lower() == 'true'
+
+# Checkout wait histogram buckets (seconds)
+POOL_WAIT_BUCKETS = (0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0)
+
+
+class PoolMetrics:
+    """Thread-safe counters for connection pool activity (exposed by /metrics)"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.checkouts = 0
+            self.checkins = 0
+            self.connections_created = 0
+            self.invalidations = 0
+            self.timeouts = 0
+            self.wait_seconds_total = 0.0
+            self.wait_seconds_max = 0.0
+            self.wait_buckets = [0] * (len(POOL_WAIT_BUCKETS) + 1)
+
+    def record_wait(self, seconds):
+        with self._lock:
+            self.checkouts += 1
+            self.wait_seconds_total += seconds
+            self.wait_seconds_max = max(self.wait_seconds_max, seconds)
+            for index, bound in enumerate(POOL_WAIT_BUCKETS):
+                if seconds <= bound:
+                    self.wait_buckets[index] += 1
+                    break
+            else:
+                self.wait_buckets[-1] += 1
+
+    def increment(self, counter):
+        with self._lock:
+            setattr(self, counter, getattr(self, counter) + 1)
+
+    def snapshot(self, pool=None):
+        with self._lock:
+            buckets = {f"le_{bound}": count for bound, count in zip(POOL_WAIT_BUCKETS, self.wait_buckets)}
+            buckets["le_inf"] = self.wait_buckets[-1]
+            data = {
+                "checkouts": self.checkouts,
+                "checkins": self.checkins,
+                "checked_out": self.checkouts - self.checkins,
+                "connections_created": self.connections_created,
+                "invalidations": self.invalidations,
+                "timeouts": self.timeouts,
+                "wait_seconds_total": round(self.wait_seconds_total, 6),
+                "wait_seconds_avg": round(self.wait_seconds_total / self.checkouts, 6) if self.checkouts else 0.0,
+                "wait_seconds_max": round(self.wait_seconds_max, 6),
+                "wait_histogram": buckets,
+            }
+        if isinstance(pool, QueuePool):
+            data.update({
+                "pool_size": pool.size(),
+                "pool_idle": pool.checkedin(),
+                "pool_overflow": pool.overflow(),
+            })
+        return data
+
+
+pool_metrics = PoolMetrics()
+
+
+class TimedQueuePool(QueuePool):
+    """QueuePool that records how long each checkout waits for a connection"""
+
+    def connect(self):
+        start = time.perf_counter()
+        try:
+            connection = super().connect()
+        except PoolTimeoutError:
+            pool_metrics.increment("timeouts")
+            raise
+        pool_metrics.record_wait(time.perf_counter() - start)
+        return connection
+
+
+def create_db_engine(database_url: str = DATABASE_URL, **overrides):
+    """Create the SQLAlchemy engine from the DB_* settings (keyword arguments override them)"""
+    options = {
+        "echo": DB_ECHO,
+        "pool_pre_ping": DB_POOL_PRE_PING,
+        "pool_recycle": DB_POOL_RECYCLE,
+    }
+
+    if database_url.startswith("mysql"):
+        # Ensure UTF-8 encoding for special characters
+        options["connect_args"] = {"charset": "utf8mb4"}
+
+    # In-memory SQLite needs its single-connection pool; everything else gets the timed pool
+    in_memory = database_url.rstrip("/").endswith("sqlite:") or ":memory:" in database_url
+    if not in_memory:
+        options.update({
+            "poolclass": TimedQueuePool,
+            "pool_size": DB_POOL_SIZE,
+            "max_overflow": DB_MAX_OVERFLOW,
+            "pool_timeout": DB_POOL_TIMEOUT,
+        })
+
+    options.update(overrides)
+    new_engine = create_engine(database_url, **options)
+
+    event.listen(new_engine, "connect", lambda dbapi_conn, record: pool_metrics.increment("connections_created"))
+    event.listen(new_engine, "checkin", lambda dbapi_conn, record: pool_metrics.increment("checkins"))
+    event.listen(new_engine, "invalidate", lambda dbapi_conn, record, exception: pool_metrics.increment("invalidations"))
+
+    return new_engine
+
+
+# The engine (and with it the MySQL driver) is created on first use, not at import,
+# so a new worker starts serving sooner and importing the app never touches the database
+_engine = None
+_engine_lock = threading.Lock()
+
+
+def get_engine():
+    """Return the process-wide engine, creating it on the first call"""
+    global _engine
+    if _engine is None:
+        with _engine_lock:
+            if _engine is None:
+                _engine = create_db_engine()
+                SessionLocal.configure(bind=_engine)
+    return _engine
+
+
+def __getattr__(name):
+    # `database.engine` / `from app.core.database import engine` keep working
+    if name == "engine":
+        return get_engine()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+class LazySessionMaker(sessionmaker):
+    """sessionmaker that binds itself to get_engine() when the first session is opened"""
+
+    def __call__(self, **local_kw):
+        if self.kw.get("bind") is None:
+            get_engine()
+        return super().__call__(**local_kw)
+
+
 # Create SessionLocal class
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+SessionLocal = LazySessionMaker(autocommit=False, autoflush=False)
 
 # Create Base class for models
 Base = declarative_base()
 
 # Dependency to get database session
+# The session is blocking, so endpoints that use it are declared with plain `def`:
+# FastAPI runs them in its worker threadpool instead of on the event loop.
 def get_db():
     db = SessionLocal()
     try:
@@ -40,11 +195,15 @@ def get_db():
     finally:
         db.close()
 
-# Test database connection
-async def test_database_connection():
+# Test database connection (blocking, call it from a `def` endpoint)
+def test_database_connection():
     try:
-        with engine.connect() as connection:
+        with get_engine().connect() as connection:
             result = connection.execute(text("SELECT 1"))
             return {"status": "connected", "result": result.fetchone()[0]}
     except Exception as e:
-        return {"status": "failed", "error": str(e)}
\ No newline at end of file
+        return {"status": "failed", "error": str(e)}
+
+# Pool metrics for the /metrics endpoint
+def get_pool_metrics():
+    return pool_metrics.snapshot(_engine.pool if _engine is not None else None)
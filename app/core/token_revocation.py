@@ -0,0 +1,149 @@
+from datetime import datetime
+import logging
+import os
+import threading
+import time
+
+from sqlalchemy import delete, select
+from sqlalchemy.exc import IntegrityError, SQLAlchemyError
+
+from .database import SessionLocal
+from ..models.models import RevokedToken
+from ..utils.bloom import BloomFilter
+from ..utils.cache import TTLCache
+
+logger = logging.getLogger(__name__)
+
+# How often each worker loads newly revoked tokens (other workers see a logout within this delay)
+REVOCATION_REFRESH_SECONDS = float(os.getenv('REVOCATION_REFRESH_SECONDS', '5'))
+# How often expired rows are deleted and the filter is rebuilt
+REVOCATION_PURGE_SECONDS = float(os.getenv('REVOCATION_PURGE_SECONDS', '3600'))
+REVOCATION_BLOOM_CAPACITY = int(os.getenv('REVOCATION_BLOOM_CAPACITY', '100000'))
+REVOCATION_BLOOM_ERROR_RATE = float(os.getenv('REVOCATION_BLOOM_ERROR_RATE', '0.001'))
+
+# Rows re-read on each refresh, so ids committed out of order are not skipped
+REFRESH_OVERLAP_ROWS = 256
+
+
+class TokenRevocationStore:
+    """jti denylist backed by the revoked_tokens table with an in-memory bloom filter in front.
+
+    is_revoked() answers from memory unless the filter reports a hit; only hits query the table.
+    """
+
+    def __init__(self, session_factory=SessionLocal, capacity=REVOCATION_BLOOM_CAPACITY,
+                 error_rate=REVOCATION_BLOOM_ERROR_RATE, refresh_seconds=REVOCATION_REFRESH_SECONDS,
+                 purge_seconds=REVOCATION_PURGE_SECONDS):
+        self.session_factory = session_factory
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.refresh_seconds = refresh_seconds
+        self.purge_seconds = purge_seconds
+        self._bloom = BloomFilter(capacity, error_rate)
+        self._last_id = 0
+        self._recent_ids = set()  # ids loaded within the last REFRESH_OVERLAP_ROWS
+        self._loaded_rows = 0  # distinct rows in the filter
+        self._next_refresh = 0.0
+        self._next_purge = 0.0
+        self._refresh_lock = threading.Lock()
+        self._lookups = TTLCache(maxsize=4096, ttl=refresh_seconds)  # jti -> revoked? for bloom hits
+        self.db_lookups = 0
+        self.refreshes = 0
+
+    def _load(self, db, bloom, after_id):
+        """Add the rows with id > after_id to `bloom`, each row once; returns the highest id seen
+
+        The overlap window means most rows of an incremental refresh were loaded before. Only
+        rows not in `_recent_ids` are added and counted in `_loaded_rows`, because the filter's
+        own count grows on every add() and would trigger early rebuilds.
+        """
+        last_id = after_id
+        rows = db.execute(
+            select(RevokedToken.id, RevokedToken.jti)
+            .where(RevokedToken.id > after_id)
+            .order_by(RevokedToken.id)
+        )
+        for row_id, jti in rows:
+            if row_id not in self._recent_ids:
+                bloom.add(jti)
+                self._recent_ids.add(row_id)
+                self._loaded_rows += 1
+            last_id = row_id
+        # Only ids inside the next overlap window can be read again
+        self._recent_ids = {row_id for row_id in self._recent_ids if row_id > last_id - REFRESH_OVERLAP_ROWS}
+        return last_id
+
+    def _purge_and_rebuild(self, db):
+        db.execute(delete(RevokedToken).where(RevokedToken.expires_at < datetime.utcnow()))
+        db.commit()
+
+        # Fill the new filter before swapping it in so lookups never see a partial one
+        remaining = db.query(RevokedToken).count()
+        bloom = BloomFilter(max(self.capacity, remaining * 2), self.error_rate)
+        self._recent_ids = set()
+        self._loaded_rows = 0
+        self._last_id = self._load(db, bloom, 0)
+        self._bloom = bloom
+
+    def maybe_refresh(self):
+        """Load new revocations every refresh_seconds; one thread refreshes while the others carry on"""
+        now = time.monotonic()
+        if now < self._next_refresh or not self._refresh_lock.acquire(blocking=False):
+            return
+
+        db = self.session_factory()
+        try:
+            if now >= self._next_purge or self._loaded_rows > self._bloom.capacity:
+                self._purge_and_rebuild(db)
+                self._next_purge = now + self.purge_seconds
+            else:
+                after_id = max(0, self._last_id - REFRESH_OVERLAP_ROWS)
+                self._last_id = max(self._last_id, self._load(db, self._bloom, after_id))
+            self.refreshes += 1
+        except SQLAlchemyError:
+            logger.exception("Could not refresh the token revocation list")
+        finally:
+            db.close()
+            self._next_refresh = now + self.refresh_seconds
+            self._refresh_lock.release()
+
+    def is_revoked(self, jti: str) -> bool:
+        self.maybe_refresh()
+        if jti not in self._bloom:
+            return False
+
+        revoked = self._lookups.get(jti)
+        if revoked is None:
+            db = self.session_factory()
+            try:
+                revoked = db.query(RevokedToken.id).filter(RevokedToken.jti == jti).first() is not None
+            finally:
+                db.close()
+            self.db_lookups += 1
+            self._lookups.set(jti, revoked)
+        return revoked
+
+    def revoke(self, jti: str, expires_at: datetime, user_email: str = None):
+        db = self.session_factory()
+        try:
+            db.add(RevokedToken(jti=jti, user_email=user_email, expires_at=expires_at))
+            db.commit()
+        except IntegrityError:
+            db.rollback()  # Already revoked
+        finally:
+            db.close()
+
+        self._bloom.add(jti)
+        self._lookups.set(jti, True, ttl=max((expires_at - datetime.utcnow()).total_seconds(), 1))
+
+    def stats(self) -> dict:
+        return {
+            "bloom_items": self._loaded_rows,
+            "bloom_capacity": self._bloom.capacity,
+            "bloom_bits": self._bloom.num_bits,
+            "refreshes": self.refreshes,
+            "db_lookups": self.db_lookups,
+        }
+
+
+revocation_store = TokenRevocationStore()
@@ -0,0 +1,38 @@
+"""Existence checks so the revisions also upgrade databases that Base.metadata.create_all() built.
+
+Until migrations existed the API created missing tables at startup, so an
+unversioned database can hold any mix of the tables, columns and indexes the
+revisions add. Each guarded operation is skipped when its object is already there.
+"""
+from alembic import op
+from sqlalchemy import inspect
+
+
+def has_table(table_name):
+    return inspect(op.get_bind()).has_table(table_name)
+
+
+def has_column(table_name, column_name):
+    return any(column["name"] == column_name for column in inspect(op.get_bind()).get_columns(table_name))
+
+
+def has_index(table_name, index_name):
+    return any(index["name"] == index_name for index in inspect(op.get_bind()).get_indexes(table_name))
+
+
+def create_table(table_name, *columns, **kwargs):
+    """op.create_table() unless the table exists; returns whether it was created"""
+    if has_table(table_name):
+        return False
+    op.create_table(table_name, *columns, **kwargs)
+    return True
+
+
+def create_index(index_name, table_name, columns, **kwargs):
+    if not has_index(table_name, index_name):
+        op.create_index(index_name, table_name, columns, **kwargs)
+
+
+def add_column(table_name, column):
+    if not has_column(table_name, column.name):
+        op.add_column(table_name, column)
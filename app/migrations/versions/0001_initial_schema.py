@@ -0,0 +1,228 @@
+"""Initial schema: users, doctors, appointments, history, medical records and prescriptions
+
+Revision ID: 0001
+Revises: None
+Create Date: 2026-10-18 09:00:00
+
+The tables as Base.metadata.create_all() created them before migrations existed.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+from app.migrations import helpers
+
+# revision identifiers, used by Alembic.
+revision: str = '0001'
+down_revision: Union[str, None] = None
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    helpers.create_table('users',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('dni', sa.String(length=9), nullable=False),
+    sa.Column('nombre', sa.String(length=100), nullable=False),
+    sa.Column('apellidos', sa.String(length=200), nullable=False),
+    sa.Column('email', sa.String(length=255), nullable=False),
+    sa.Column('telefono', sa.String(length=15), nullable=False),
+    sa.Column('direccion', sa.String(length=500), nullable=False),
+    sa.Column('fecha_nacimiento', sa.String(length=10), nullable=False),
+    sa.Column('hashed_password', sa.String(length=255), nullable=False),
+    sa.Column('roles', sa.Text(), nullable=False),
+    sa.Column('is_active', sa.Boolean(), nullable=True),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=True),
+    sa.Column('updated_at', sa.DateTime(timezone=True), nullable=True),
+    sa.PrimaryKeyConstraint('id')
+    )
+    helpers.create_index('ix_users_dni', 'users', ['dni'], unique=True)
+    helpers.create_index('ix_users_email', 'users', ['email'], unique=True)
+    helpers.create_index('ix_users_id', 'users', ['id'])
+    helpers.create_table('doctor_profiles',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('numero_colegiado', sa.String(length=20), nullable=False),
+    sa.Column('colegio_medico', sa.String(length=200), nullable=False),
+    sa.Column('especialidad', sa.Enum('Medicina General', 'Cardiologia', 'Pediatria', 'Ginecologia y Obstetricia', 'Traumatologia y Cirugia Ortopedica', 'Neurologia', 'Dermatologia', 'Oftalmologia', 'Otorrinolaringologia', 'Urologia', 'Psiquiatria', 'Radiodiagnostico', 'Anestesiologia y Reanimacion', 'Medicina Interna', 'Cirugia General y del Aparato Digestivo', 'Endocrinologia y Nutricion', 'Neumologia', 'Aparato Digestivo', 'Hematologia y Hemoterapia', 'Oncologia Medica', name='especialidadmedica'), nullable=False),
+    sa.Column('subespecialidad', sa.String(length=200), nullable=True),
+    sa.Column('universidad', sa.String(length=300), nullable=False),
+    sa.Column('ano_graduacion', sa.Integer(), nullable=False),
+    sa.Column('titulo_especialista', sa.String(length=300), nullable=True),
+    sa.Column('hospital_centro', sa.String(length=300), nullable=False),
+    sa.Column('departamento_servicio', sa.String(length=200), nullable=False),
+    sa.Column('consulta_numero', sa.String(length=20), nullable=True),
+    sa.Column('horario_consulta', sa.Text(), nullable=True),
+    sa.Column('idiomas', sa.Text(), nullable=True),
+    sa.Column('biografia', sa.Text(), nullable=True),
+    sa.Column('foto_url', sa.String(length=500), nullable=True),
+    sa.Column('is_active', sa.Boolean(), nullable=True),
+    sa.Column('fecha_alta_sistema', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=True),
+    sa.Column('created_by_admin', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['created_by_admin'], ['users.id'], ),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('user_id')
+    )
+    helpers.create_index('ix_doctor_profiles_id', 'doctor_profiles', ['id'])
+    helpers.create_index('ix_doctor_profiles_numero_colegiado', 'doctor_profiles', ['numero_colegiado'], unique=True)
+    helpers.create_table('doctors_deprecated',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('dni', sa.String(length=9), nullable=False),
+    sa.Column('nombre', sa.String(length=100), nullable=False),
+    sa.Column('apellidos', sa.String(length=200), nullable=False),
+    sa.Column('email', sa.String(length=255), nullable=False),
+    sa.Column('telefono', sa.String(length=15), nullable=False),
+    sa.Column('fecha_nacimiento', sa.String(length=10), nullable=False),
+    sa.Column('numero_colegiado', sa.String(length=20), nullable=False),
+    sa.Column('colegio_medico', sa.String(length=200), nullable=False),
+    sa.Column('especialidad', sa.Enum('Medicina General', 'Cardiologia', 'Pediatria', 'Ginecologia y Obstetricia', 'Traumatologia y Cirugia Ortopedica', 'Neurologia', 'Dermatologia', 'Oftalmologia', 'Otorrinolaringologia', 'Urologia', 'Psiquiatria', 'Radiodiagnostico', 'Anestesiologia y Reanimacion', 'Medicina Interna', 'Cirugia General y del Aparato Digestivo', 'Endocrinologia y Nutricion', 'Neumologia', 'Aparato Digestivo', 'Hematologia y Hemoterapia', 'Oncologia Medica', name='especialidadmedica'), nullable=False),
+    sa.Column('subespecialidad', sa.String(length=200), nullable=True),
+    sa.Column('universidad', sa.String(length=300), nullable=False),
+    sa.Column('ano_graduacion', sa.Integer(), nullable=False),
+    sa.Column('titulo_especialista', sa.String(length=300), nullable=True),
+    sa.Column('hospital_centro', sa.String(length=300), nullable=False),
+    sa.Column('departamento_servicio', sa.String(length=200), nullable=False),
+    sa.Column('consulta_numero', sa.String(length=20), nullable=True),
+    sa.Column('horario_consulta', sa.Text(), nullable=True),
+    sa.Column('idiomas', sa.Text(), nullable=True),
+    sa.Column('biografia', sa.Text(), nullable=True),
+    sa.Column('foto_url', sa.String(length=500), nullable=True),
+    sa.Column('is_active', sa.Boolean(), nullable=True),
+    sa.Column('fecha_alta_sistema', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=True),
+    sa.Column('created_by_admin', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['created_by_admin'], ['users.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    helpers.create_index('ix_doctors_deprecated_dni', 'doctors_deprecated', ['dni'], unique=True)
+    helpers.create_index('ix_doctors_deprecated_email', 'doctors_deprecated', ['email'], unique=True)
+    helpers.create_index('ix_doctors_deprecated_id', 'doctors_deprecated', ['id'])
+    helpers.create_index('ix_doctors_deprecated_numero_colegiado', 'doctors_deprecated', ['numero_colegiado'], unique=True)
+    helpers.create_table('appointments',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('patient_id', sa.Integer(), nullable=False),
+    sa.Column('doctor_profile_id', sa.Integer(), nullable=False),
+    sa.Column('appointment_date', sa.DateTime(timezone=True), nullable=False),
+    sa.Column('duration_minutes', sa.Integer(), nullable=False),
+    sa.Column('appointment_type', sa.Enum('consultation', 'follow_up', 'emergency', 'check_up', 'procedure', 'vaccination', name='appointmenttype'), nullable=True),
+    sa.Column('priority', sa.Enum('low', 'normal', 'high', 'urgent', name='appointmentpriority'), nullable=True),
+    sa.Column('status', sa.Enum('scheduled', 'confirmed', 'in_progress', 'completed', 'cancelled', 'no_show', 'rescheduled', name='appointmentstatus'), nullable=True),
+    sa.Column('reason', sa.Text(), nullable=True),
+    sa.Column('notes', sa.Text(), nullable=True),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=True),
+    sa.Column('updated_at', sa.DateTime(timezone=True), nullable=True),
+    sa.Column('created_by_user_id', sa.Integer(), nullable=False),
+    sa.Column('cancelled_at', sa.DateTime(timezone=True), nullable=True),
+    sa.Column('cancelled_by_user_id', sa.Integer(), nullable=True),
+    sa.Column('cancellation_reason', sa.Text(), nullable=True),
+    sa.ForeignKeyConstraint(['cancelled_by_user_id'], ['users.id'], ),
+    sa.ForeignKeyConstraint(['created_by_user_id'], ['users.id'], ),
+    sa.ForeignKeyConstraint(['doctor_profile_id'], ['doctor_profiles.id'], ),
+    sa.ForeignKeyConstraint(['patient_id'], ['users.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    helpers.create_index('ix_appointments_id', 'appointments', ['id'])
+    helpers.create_table('doctor_availability',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('doctor_profile_id', sa.Integer(), nullable=False),
+    sa.Column('day_of_week', sa.Integer(), nullable=False),
+    sa.Column('start_time', sa.String(length=5), nullable=False),
+    sa.Column('end_time', sa.String(length=5), nullable=False),
+    sa.Column('slot_duration_minutes', sa.Integer(), nullable=False),
+    sa.Column('buffer_minutes', sa.Integer(), nullable=False),
+    sa.Column('is_active', sa.Boolean(), nullable=True),
+    sa.Column('effective_from', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=True),
+    sa.Column('effective_until', sa.DateTime(timezone=True), nullable=True),
+    sa.ForeignKeyConstraint(['doctor_profile_id'], ['doctor_profiles.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    helpers.create_index('ix_doctor_availability_id', 'doctor_availability', ['id'])
+    helpers.create_table('appointment_history',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('appointment_id', sa.Integer(), nullable=False),
+    sa.Column('changed_at', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=True),
+    sa.Column('changed_by_user_id', sa.Integer(), nullable=False),
+    sa.Column('field_name', sa.String(length=50), nullable=False),
+    sa.Column('old_value', sa.Text(), nullable=True),
+    sa.Column('new_value', sa.Text(), nullable=True),
+    sa.Column('change_reason', sa.Text(), nullable=True),
+    sa.ForeignKeyConstraint(['appointment_id'], ['appointments.id'], ),
+    sa.ForeignKeyConstraint(['changed_by_user_id'], ['users.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    helpers.create_index('ix_appointment_history_id', 'appointment_history', ['id'])
+    helpers.create_table('medical_records',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('patient_id', sa.Integer(), nullable=False),
+    sa.Column('doctor_id', sa.Integer(), nullable=False),
+    sa.Column('appointment_id', sa.Integer(), nullable=True),
+    sa.Column('record_date', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=True),
+    sa.Column('diagnosis', sa.Text(), nullable=True),
+    sa.Column('treatment_plan', sa.Text(), nullable=True),
+    sa.Column('medications', sa.Text(), nullable=True),
+    sa.Column('lab_results', sa.Text(), nullable=True),
+    sa.Column('vital_signs', sa.Text(), nullable=True),
+    sa.Column('attachments', sa.Text(), nullable=True),
+    sa.Column('follow_up_notes', sa.Text(), nullable=True),
+    sa.Column('severity', sa.Enum('low', 'medium', 'high', 'critical', name='medicalrecordseverity'), nullable=True),
+    sa.Column('is_confidential', sa.Boolean(), nullable=True),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=True),
+    sa.Column('updated_at', sa.DateTime(timezone=True), nullable=True),
+    sa.ForeignKeyConstraint(['appointment_id'], ['appointments.id'], ),
+    sa.ForeignKeyConstraint(['doctor_id'], ['doctor_profiles.id'], ),
+    sa.ForeignKeyConstraint(['patient_id'], ['users.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    helpers.create_index('ix_medical_records_id', 'medical_records', ['id'])
+    helpers.create_table('prescriptions',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('medical_record_id', sa.Integer(), nullable=False),
+    sa.Column('patient_id', sa.Integer(), nullable=False),
+    sa.Column('doctor_id', sa.Integer(), nullable=False),
+    sa.Column('medication_name', sa.String(length=200), nullable=False),
+    sa.Column('generic_name', sa.String(length=200), nullable=True),
+    sa.Column('dosage', sa.String(length=100), nullable=False),
+    sa.Column('frequency', sa.String(length=100), nullable=False),
+    sa.Column('duration_days', sa.Integer(), nullable=True),
+    sa.Column('start_date', sa.DateTime(timezone=True), nullable=False),
+    sa.Column('end_date', sa.DateTime(timezone=True), nullable=True),
+    sa.Column('instructions', sa.Text(), nullable=True),
+    sa.Column('warnings', sa.Text(), nullable=True),
+    sa.Column('status', sa.Enum('active', 'completed', 'discontinued', 'on_hold', name='prescriptionstatus'), nullable=True),
+    sa.Column('refills_remaining', sa.Integer(), nullable=True),
+    sa.Column('total_refills_authorized', sa.Integer(), nullable=True),
+    sa.Column('pharmacy_notes', sa.Text(), nullable=True),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=True),
+    sa.Column('updated_at', sa.DateTime(timezone=True), nullable=True),
+    sa.ForeignKeyConstraint(['doctor_id'], ['doctor_profiles.id'], ),
+    sa.ForeignKeyConstraint(['medical_record_id'], ['medical_records.id'], ),
+    sa.ForeignKeyConstraint(['patient_id'], ['users.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    helpers.create_index('ix_prescriptions_id', 'prescriptions', ['id'])
+
+
+def downgrade() -> None:
+    op.drop_index('ix_prescriptions_id', table_name='prescriptions')
+    op.drop_table('prescriptions')
+    op.drop_index('ix_medical_records_id', table_name='medical_records')
+    op.drop_table('medical_records')
+    op.drop_index('ix_appointment_history_id', table_name='appointment_history')
+    op.drop_table('appointment_history')
+    op.drop_index('ix_doctor_availability_id', table_name='doctor_availability')
+    op.drop_table('doctor_availability')
+    op.drop_index('ix_appointments_id', table_name='appointments')
+    op.drop_table('appointments')
+    op.drop_index('ix_doctors_deprecated_numero_colegiado', table_name='doctors_deprecated')
+    op.drop_index('ix_doctors_deprecated_id', table_name='doctors_deprecated')
+    op.drop_index('ix_doctors_deprecated_email', table_name='doctors_deprecated')
+    op.drop_index('ix_doctors_deprecated_dni', table_name='doctors_deprecated')
+    op.drop_table('doctors_deprecated')
+    op.drop_index('ix_doctor_profiles_numero_colegiado', table_name='doctor_profiles')
+    op.drop_index('ix_doctor_profiles_id', table_name='doctor_profiles')
+    op.drop_table('doctor_profiles')
+    op.drop_index('ix_users_id', table_name='users')
+    op.drop_index('ix_users_email', table_name='users')
+    op.drop_index('ix_users_dni', table_name='users')
+    op.drop_table('users')
@@ -0,0 +1,66 @@
+"""user_roles table, backfilled from the JSON users.roles column
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-18 09:01:00
+
+Replaces app/scripts/migrate_user_roles.py.
+"""
+import json
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+from app.migrations import helpers
+
+# revision identifiers, used by Alembic.
+revision: str = '0002'
+down_revision: Union[str, None] = '0001'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+BATCH_SIZE = 1000
+
+users = sa.table('users', sa.column('id', sa.Integer), sa.column('roles', sa.Text))
+user_roles = sa.table('user_roles', sa.column('user_id', sa.Integer), sa.column('role', sa.String))
+
+
+def backfill_user_roles(connection):
+    """Insert the missing user_roles rows from users.roles; existing (user_id, role) rows are left alone"""
+    existing = set(connection.execute(sa.select(user_roles.c.user_id, user_roles.c.role)).all())
+
+    pending = []
+    for user_id, raw_roles in connection.execute(sa.select(users.c.id, users.c.roles)).all():
+        try:
+            roles = json.loads(raw_roles) if raw_roles else []
+        except (json.JSONDecodeError, TypeError):
+            print(f"Skipping user {user_id}: invalid roles value {raw_roles!r}")
+            continue
+
+        for role in dict.fromkeys(roles):
+            if (user_id, role) not in existing:
+                pending.append({"user_id": user_id, "role": role})
+
+        if len(pending) >= BATCH_SIZE:
+            connection.execute(user_roles.insert(), pending)
+            pending = []
+
+    if pending:
+        connection.execute(user_roles.insert(), pending)
+
+
+def upgrade() -> None:
+    helpers.create_table('user_roles',
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('role', sa.String(length=20), nullable=False),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('user_id', 'role')
+    )
+    helpers.create_index('ix_user_roles_role', 'user_roles', ['role'])
+    backfill_user_roles(op.get_bind())
+
+
+def downgrade() -> None:
+    op.drop_index('ix_user_roles_role', table_name='user_roles')
+    op.drop_table('user_roles')
@@ -0,0 +1,62 @@
+"""appointments.end_at and the overlap-check index
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-18 09:02:00
+
+Replaces app/scripts/migrate_appointment_end_at.py.
+"""
+from datetime import timedelta
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+from app.migrations import helpers
+
+# revision identifiers, used by Alembic.
+revision: str = '0003'
+down_revision: Union[str, None] = '0002'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+BATCH_SIZE = 1000
+
+appointments = sa.table(
+    'appointments',
+    sa.column('id', sa.Integer),
+    sa.column('appointment_date', sa.DateTime),
+    sa.column('duration_minutes', sa.Integer),
+    sa.column('end_at', sa.DateTime),
+)
+
+
+def backfill_end_at(connection):
+    """Fill end_at = appointment_date + duration for rows that do not have it yet"""
+    while True:
+        rows = connection.execute(
+            sa.select(appointments.c.id, appointments.c.appointment_date, appointments.c.duration_minutes)
+            .where(appointments.c.end_at.is_(None))
+            .limit(BATCH_SIZE)
+        ).all()
+        if not rows:
+            return
+
+        for appointment_id, appointment_date, duration_minutes in rows:
+            connection.execute(
+                appointments.update()
+                .where(appointments.c.id == appointment_id)
+                .values(end_at=appointment_date + timedelta(minutes=duration_minutes or 30))
+            )
+
+
+def upgrade() -> None:
+    helpers.add_column('appointments', sa.Column('end_at', sa.DateTime(timezone=True), nullable=True))
+    backfill_end_at(op.get_bind())
+    helpers.create_index('ix_appointments_doctor_status_date_end', 'appointments', ['doctor_profile_id', 'status', 'appointment_date', 'end_at'])
+
+
+def downgrade() -> None:
+    op.drop_index('ix_appointments_doctor_status_date_end', table_name='appointments')
+    with op.batch_alter_table('appointments') as batch_op:
+        batch_op.drop_column('end_at')
@@ -0,0 +1,61 @@
+"""Composite indexes for the listing, scheduling and lookup queries
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-18 09:04:00
+
+Replaces app/scripts/create_missing_indexes.py; see app/scripts/index_advisor.py.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+from app.migrations import helpers
+
+# revision identifiers, used by Alembic.
+revision: str = '0005'
+down_revision: Union[str, None] = '0004'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    helpers.create_index('ix_appointment_history_appointment_changed', 'appointment_history', ['appointment_id', 'changed_at'])
+    helpers.create_index('ix_appointment_history_changed_by', 'appointment_history', ['changed_by_user_id'])
+    helpers.create_index('ix_appointments_cancelled_by', 'appointments', ['cancelled_by_user_id'])
+    helpers.create_index('ix_appointments_created_by', 'appointments', ['created_by_user_id'])
+    helpers.create_index('ix_appointments_date', 'appointments', ['appointment_date'])
+    helpers.create_index('ix_appointments_doctor_date', 'appointments', ['doctor_profile_id', 'appointment_date'])
+    helpers.create_index('ix_appointments_patient_date', 'appointments', ['patient_id', 'appointment_date'])
+    helpers.create_index('ix_appointments_status_date', 'appointments', ['status', 'appointment_date'])
+    helpers.create_index('ix_doctor_availability_doctor_day', 'doctor_availability', ['doctor_profile_id', 'day_of_week'])
+    helpers.create_index('ix_doctor_profiles_created_by_admin', 'doctor_profiles', ['created_by_admin'])
+    helpers.create_index('ix_doctor_profiles_especialidad_active', 'doctor_profiles', ['especialidad', 'is_active'])
+    helpers.create_index('ix_medical_records_appointment', 'medical_records', ['appointment_id'])
+    helpers.create_index('ix_medical_records_doctor_date', 'medical_records', ['doctor_id', 'record_date'])
+    helpers.create_index('ix_medical_records_patient_date', 'medical_records', ['patient_id', 'record_date'])
+    helpers.create_index('ix_prescriptions_doctor', 'prescriptions', ['doctor_id'])
+    helpers.create_index('ix_prescriptions_medical_record', 'prescriptions', ['medical_record_id'])
+    helpers.create_index('ix_prescriptions_patient_status', 'prescriptions', ['patient_id', 'status'])
+    helpers.create_index('ix_users_created_at', 'users', ['created_at'])
+
+
+def downgrade() -> None:
+    op.drop_index('ix_users_created_at', table_name='users')
+    op.drop_index('ix_prescriptions_patient_status', table_name='prescriptions')
+    op.drop_index('ix_prescriptions_medical_record', table_name='prescriptions')
+    op.drop_index('ix_prescriptions_doctor', table_name='prescriptions')
+    op.drop_index('ix_medical_records_patient_date', table_name='medical_records')
+    op.drop_index('ix_medical_records_doctor_date', table_name='medical_records')
+    op.drop_index('ix_medical_records_appointment', table_name='medical_records')
+    op.drop_index('ix_doctor_profiles_especialidad_active', table_name='doctor_profiles')
+    op.drop_index('ix_doctor_profiles_created_by_admin', table_name='doctor_profiles')
+    op.drop_index('ix_doctor_availability_doctor_day', table_name='doctor_availability')
+    op.drop_index('ix_appointments_status_date', table_name='appointments')
+    op.drop_index('ix_appointments_patient_date', table_name='appointments')
+    op.drop_index('ix_appointments_doctor_date', table_name='appointments')
+    op.drop_index('ix_appointments_date', table_name='appointments')
+    op.drop_index('ix_appointments_created_by', table_name='appointments')
+    op.drop_index('ix_appointments_cancelled_by', table_name='appointments')
+    op.drop_index('ix_appointment_history_changed_by', table_name='appointment_history')
+    op.drop_index('ix_appointment_history_appointment_changed', table_name='appointment_history')
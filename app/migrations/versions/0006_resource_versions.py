@@ -0,0 +1,31 @@
+"""resource_versions table for ETags
+
+Revision ID: 0006
+Revises: 0005
+Create Date: 2026-10-18 09:05:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+from app.migrations import helpers
+
+# revision identifiers, used by Alembic.
+revision: str = '0006'
+down_revision: Union[str, None] = '0005'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    helpers.create_table('resource_versions',
+    sa.Column('resource', sa.String(length=100), nullable=False),
+    sa.Column('version', sa.Integer(), nullable=False),
+    sa.PrimaryKeyConstraint('resource')
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('resource_versions')
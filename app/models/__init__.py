@@ -1,13 +1,17 @@
 from .models import (
-    User, DoctorProfile, Doctor, UserRole, EspecialidadMedica,
+    User, UserRoleAssignment, RevokedToken, ResourceVersion, DoctorProfile, Doctor, UserRole, EspecialidadMedica,
     validate_spanish_dni, validate_numero_colegiado,
     # Appointment models
     Appointment, DoctorAvailability, AppointmentHistory,
-    AppointmentStatus, AppointmentType, AppointmentPriority
+    AppointmentStatus, AppointmentType, AppointmentPriority,
+    ACTIVE_APPOINTMENT_STATUSES, MAX_APPOINTMENT_DURATION_MINUTES
 )
 
 __all__ = [
     "User",
+    "UserRoleAssignment",
+    "RevokedToken",
+    "ResourceVersion",
     "DoctorProfile", 
     "Doctor",
     "UserRole",
@@ -20,5 +24,7 @@ __all__ = [
     "AppointmentHistory",
     "AppointmentStatus",
     "AppointmentType",
-    "AppointmentPriority"
+    "AppointmentPriority",
+    "ACTIVE_APPOINTMENT_STATUSES",
+    "MAX_APPOINTMENT_DURATION_MINUTES"
 ]
\ No newline at end of file
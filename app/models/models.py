@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, DateTime, Boolean, Text, ForeignKey, Enum
+from sqlalchemy import Column, Integer, String, DateTime, Boolean, Text, ForeignKey, Enum, Index, event, update
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from app.core.database import Base
@@ -27,23 +27,50 @@ class User(Base):
     hashed_password = Column(String(255), nullable=False)
     roles = Column(Text, default='["patient"]', nullable=False)  # JSON array of roles
     is_active = Column(Boolean, default=True)
-    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), index=True)  # Backoffice new-user counts
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
     
     # Relationships
     doctor_profile = relationship("DoctorProfile", back_populates="user", uselist=False, primaryjoin="User.id==DoctorProfile.user_id")
+    role_assignments = relationship("UserRoleAssignment", back_populates="user", cascade="all, delete-orphan")
+    
+    def __init__(self, **kwargs):
+        kwargs.setdefault("roles", '["patient"]')
+        super().__init__(**kwargs)
+        self._sync_role_assignments(self._parsed_roles())
+    
+    def _parsed_roles(self):
+        """Parse the JSON roles column once and reuse it until the column changes"""
+        cached = getattr(self, "_roles_cache", None)
+        if cached is None or cached[0] != self.roles:
+            cached = (self.roles, tuple(json.loads(self.roles)) if self.roles else ())
+            self._roles_cache = cached
+        return cached[1]
+    
+    def _sync_role_assignments(self, roles_list):
+        """Keep the indexed user_roles rows in line with the JSON column"""
+        wanted = set(roles_list)
+        for assignment in list(self.role_assignments):
+            if assignment.role not in wanted:
+                self.role_assignments.remove(assignment)
+        existing = {assignment.role for assignment in self.role_assignments}
+        for role in roles_list:
+            if role not in existing:
+                self.role_assignments.append(UserRoleAssignment(role=role))
+                existing.add(role)
     
     def get_roles(self):
         """Get user roles as list"""
-        return json.loads(self.roles)
+        return list(self._parsed_roles())
     
     def set_roles(self, roles_list):
         """Set user roles from list"""
         self.roles = json.dumps(roles_list)
+        self._sync_role_assignments(roles_list)
     
     def has_role(self, role):
         """Check if user has a specific role"""
-        return role in self.get_roles()
+        return role in self._parsed_roles()
     
     def add_role(self, role):
         """Add a role to user"""
@@ -59,6 +86,33 @@ class User(Base):
             current_roles.remove(role)
             self.set_roles(current_roles)
 
+class UserRoleAssignment(Base):
+    """One row per (user, role) so role lookups and counts can use an index"""
+    __tablename__ = "user_roles"
+    
+    user_id = Column(Integer, ForeignKey('users.id', ondelete="CASCADE"), primary_key=True)
+    role = Column(String(20), primary_key=True, index=True)
+    
+    # Relationships
+    user = relationship("User", back_populates="role_assignments")
+
+class RevokedToken(Base):
+    """Access tokens revoked before their expiry (logout), kept until they expire"""
+    __tablename__ = "revoked_tokens"
+    
+    id = Column(Integer, primary_key=True)  # Monotonic, lets workers load only new rows
+    jti = Column(String(64), unique=True, nullable=False)
+    user_email = Column(String(255), nullable=True)
+    expires_at = Column(DateTime, nullable=False, index=True)
+    revoked_at = Column(DateTime(timezone=True), server_default=func.now())
+
+class ResourceVersion(Base):
+    """Change counter per cacheable resource ("appointment:12"), bumped in the writing transaction; feeds ETags"""
+    __tablename__ = "resource_versions"
+    
+    resource = Column(String(100), primary_key=True)
+    version = Column(Integer, nullable=False, default=0)
+
 # Spanish DNI validation function
 def validate_spanish_dni(dni: str) -> bool:
     """
@@ -115,6 +169,16 @@ class AppointmentStatus(enum.Enum):
     NO_SHOW = "no_show"         # No se presentó
     RESCHEDULED = "rescheduled"  # Reprogramada
 
+# Statuses that occupy the doctor's schedule
+ACTIVE_APPOINTMENT_STATUSES = (
+    AppointmentStatus.SCHEDULED,
+    AppointmentStatus.CONFIRMED,
+    AppointmentStatus.IN_PROGRESS,
+)
+
+# Upper bound enforced by the appointment schemas; lets overlap queries use a bounded index range
+MAX_APPOINTMENT_DURATION_MINUTES = 180
+
 # Appointment Type
 class AppointmentType(enum.Enum):
     CONSULTATION = "consultation"      # Consulta general
@@ -133,6 +197,11 @@ class AppointmentPriority(enum.Enum):
 
 class DoctorProfile(Base):
     __tablename__ = "doctor_profiles"
+    __table_args__ = (
+        # Directory and "next available" searches by specialty
+        Index('ix_doctor_profiles_especialidad_active', 'especialidad', 'is_active'),
+        Index('ix_doctor_profiles_created_by_admin', 'created_by_admin'),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey('users.id'), unique=True, nullable=False)
@@ -233,6 +302,10 @@ def validate_numero_colegiado(numero: str, provincia: str = None) -> bool:
 
 class DoctorAvailability(Base):
     __tablename__ = "doctor_availability"
+    __table_args__ = (
+        # Weekly template lookups: one doctor (or a batch of doctors) for a given weekday
+        Index('ix_doctor_availability_doctor_day', 'doctor_profile_id', 'day_of_week'),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     doctor_profile_id = Column(Integer, ForeignKey('doctor_profiles.id'), nullable=False)
@@ -256,6 +329,18 @@ class DoctorAvailability(Base):
 
 class Appointment(Base):
     __tablename__ = "appointments"
+    __table_args__ = (
+        # Overlap checks: doctor + active status + [appointment_date, end_at)
+        Index('ix_appointments_doctor_status_date_end', 'doctor_profile_id', 'status', 'appointment_date', 'end_at'),
+        # Keyset listings ordered by (appointment_date, id); the primary key rides along in each index
+        Index('ix_appointments_patient_date', 'patient_id', 'appointment_date'),
+        Index('ix_appointments_doctor_date', 'doctor_profile_id', 'appointment_date'),
+        Index('ix_appointments_status_date', 'status', 'appointment_date'),
+        Index('ix_appointments_date', 'appointment_date'),
+        # Foreign keys to users (MySQL would add these implicitly, SQLite/PostgreSQL do not)
+        Index('ix_appointments_created_by', 'created_by_user_id'),
+        Index('ix_appointments_cancelled_by', 'cancelled_by_user_id'),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     
@@ -266,6 +351,7 @@ class Appointment(Base):
     # Scheduling details
     appointment_date = Column(DateTime(timezone=True), nullable=False)
     duration_minutes = Column(Integer, default=30, nullable=False)
+    end_at = Column(DateTime(timezone=True), nullable=True)  # appointment_date + duration, kept in sync on flush
     
     # Appointment metadata
     appointment_type = Column(Enum(AppointmentType, values_callable=lambda x: [e.value for e in x]), default=AppointmentType.CONSULTATION)
@@ -329,6 +415,53 @@ class Appointment(Base):
         
         return True, None
     
+    @staticmethod
+    def lock_doctor_schedule(db_session, doctor_profile_id):
+        """Lock the doctor's profile row until the transaction ends and return the active profile.
+        
+        Bookings for the same doctor run one at a time; other doctors are not blocked.
+        """
+        if db_session.get_bind().dialect.name == "sqlite":
+            # SQLite has no row locks: a no-op write takes the database write lock instead
+            db_session.execute(
+                update(DoctorProfile)
+                .where(DoctorProfile.id == doctor_profile_id)
+                .values(id=DoctorProfile.id)
+                .execution_options(synchronize_session=False)
+            )
+        
+        return db_session.query(DoctorProfile).filter(
+            DoctorProfile.id == doctor_profile_id,
+            DoctorProfile.is_active == True
+        ).with_for_update().first()
+    
+    @staticmethod
+    def find_conflicts(db_session, doctor_profile_id, start, end, exclude_appointment_id=None, for_update=False):
+        """Query for active appointments of a doctor that overlap [start, end).
+        
+        Use for_update=True under lock_doctor_schedule(): a locking read sees the latest
+        committed bookings instead of the transaction's earlier snapshot.
+        """
+        # An overlapping appointment must start after start - max duration, which keeps
+        # the scan on ix_appointments_doctor_status_date_end to a small range
+        earliest_start = start - timedelta(minutes=MAX_APPOINTMENT_DURATION_MINUTES)
+        
+        query = db_session.query(Appointment).filter(
+            Appointment.doctor_profile_id == doctor_profile_id,
+            Appointment.status.in_(ACTIVE_APPOINTMENT_STATUSES),
+            Appointment.appointment_date > earliest_start,
+            Appointment.appointment_date < end,
+            Appointment.end_at > start
+        )
+        
+        if exclude_appointment_id:
+            query = query.filter(Appointment.id != exclude_appointment_id)
+        
+        if for_update:
+            query = query.with_for_update(read=True)
+        
+        return query
+    
     @staticmethod
     def can_patient_book_with_doctor(patient_user_id, doctor_profile_id, db_session):
         """Check if a patient can book an appointment with a specific doctor"""
@@ -348,8 +481,20 @@ class Appointment(Base):
         
         return True, None
 
+@event.listens_for(Appointment, "before_insert")
+@event.listens_for(Appointment, "before_update")
+def _sync_appointment_end_at(mapper, connection, target):
+    """Keep the stored end_at in line with appointment_date and duration"""
+    if target.appointment_date is not None:
+        target.end_at = target.appointment_date + timedelta(minutes=target.duration_minutes or 30)
+
 class AppointmentHistory(Base):
     __tablename__ = "appointment_history"
+    __table_args__ = (
+        # History of one appointment, newest first
+        Index('ix_appointment_history_appointment_changed', 'appointment_id', 'changed_at'),
+        Index('ix_appointment_history_changed_by', 'changed_by_user_id'),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     appointment_id = Column(Integer, ForeignKey('appointments.id'), nullable=False)
@@ -379,6 +524,12 @@ class MedicalRecordSeverity(enum.Enum):
 
 class MedicalRecord(Base):
     __tablename__ = "medical_records"
+    __table_args__ = (
+        # A patient's (or doctor's) records by date
+        Index('ix_medical_records_patient_date', 'patient_id', 'record_date'),
+        Index('ix_medical_records_doctor_date', 'doctor_id', 'record_date'),
+        Index('ix_medical_records_appointment', 'appointment_id'),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     
@@ -463,6 +614,12 @@ class PrescriptionStatus(enum.Enum):
 
 class Prescription(Base):
     __tablename__ = "prescriptions"
+    __table_args__ = (
+        Index('ix_prescriptions_medical_record', 'medical_record_id'),
+        # Active prescriptions of a patient
+        Index('ix_prescriptions_patient_status', 'patient_id', 'status'),
+        Index('ix_prescriptions_doctor', 'doctor_id'),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     
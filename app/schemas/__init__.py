@@ -5,8 +5,10 @@ from .schemas import (
     # Appointment schemas
     DoctorAvailabilityCreate, DoctorAvailabilityResponse,
     AppointmentCreate, AppointmentUpdate, AppointmentResponse,
-    AppointmentDetailedResponse, AppointmentListResponse,
-    AppointmentAvailabilityRequest, AppointmentTimeSlot, AppointmentAvailabilityResponse
+    AppointmentDetailedResponse, AppointmentExpandedResponse, AppointmentListResponse,
+    AppointmentAvailabilityRequest, AppointmentTimeSlot, AppointmentAvailabilityResponse,
+    DayAvailability, DoctorRangeAvailability, AppointmentAvailabilityRangeResponse,
+    NextAvailableSlot, NextAvailableResponse
 )
 
 __all__ = [
@@ -27,8 +29,14 @@ __all__ = [
     "AppointmentUpdate", 
     "AppointmentResponse",
     "AppointmentDetailedResponse",
+    "AppointmentExpandedResponse",
     "AppointmentListResponse",
     "AppointmentAvailabilityRequest",
     "AppointmentTimeSlot",
-    "AppointmentAvailabilityResponse"
+    "AppointmentAvailabilityResponse",
+    "DayAvailability",
+    "DoctorRangeAvailability",
+    "AppointmentAvailabilityRangeResponse",
+    "NextAvailableSlot",
+    "NextAvailableResponse"
 ]
\ No newline at end of file
@@ -1,5 +1,5 @@
 from pydantic import BaseModel, EmailStr, validator, ConfigDict
-from typing import Optional, List
+from typing import Optional, List, Dict
 from datetime import datetime
 from app.models.models import (
     validate_spanish_dni, validate_numero_colegiado, EspecialidadMedica, UserRole,
@@ -236,6 +236,12 @@ class BackofficeStats(BaseModel):
     total_doctors: int
     total_admins: int
     recent_registrations: int
+    
+    # Optional breakdowns (?include=status,specialty,day)
+    appointments_by_status: Optional[Dict[str, int]] = None
+    appointments_by_specialty: Optional[Dict[str, int]] = None
+    appointments_by_day: Optional[Dict[str, int]] = None  # YYYY-MM-DD -> count
+    generated_at: Optional[datetime] = None  # When the cached snapshot was computed
 
 # Appointment Schemas
 class DoctorAvailabilityCreate(BaseModel):
@@ -380,11 +386,25 @@ class AppointmentDetailedResponse(BaseModel):
     
     cancellation_reason: Optional[str] = None
 
+class AppointmentExpandedResponse(AppointmentResponse):
+    """Appointment list item with optional patient/doctor details (?expand=patient,doctor)"""
+    # Patient info (expand=patient)
+    patient_name: Optional[str] = None
+    patient_dni: Optional[str] = None
+    patient_email: Optional[str] = None
+    
+    # Doctor info (expand=doctor)
+    doctor_user_id: Optional[int] = None
+    doctor_name: Optional[str] = None
+    doctor_specialidad: Optional[EspecialidadMedica] = None
+
 class AppointmentListResponse(BaseModel):
-    appointments: List[AppointmentResponse]
-    total: int
-    page: int
+    appointments: List[AppointmentExpandedResponse]
+    total: Optional[int] = None  # Omitted with include_total=false
+    page: Optional[int] = None   # Offset mode only
     size: int
+    next_cursor: Optional[str] = None
+    prev_cursor: Optional[str] = None
 
 class AppointmentAvailabilityRequest(BaseModel):
     doctor_profile_id: int
@@ -408,4 +428,30 @@ class AppointmentTimeSlot(BaseModel):
 class AppointmentAvailabilityResponse(BaseModel):
     doctor_profile_id: int
     date: str
-    available_slots: List[AppointmentTimeSlot]
\ No newline at end of file
+    available_slots: List[AppointmentTimeSlot]
+
+class DayAvailability(BaseModel):
+    date: str  # YYYY-MM-DD format
+    first_slot: str  # HH:MM, start of slot 0
+    step_minutes: int  # slot i starts at first_slot + i * step_minutes
+    slot_duration_minutes: int
+    bitmap: str  # one character per slot, "1" free / "0" taken
+
+class DoctorRangeAvailability(BaseModel):
+    doctor_profile_id: int
+    days: List[DayAvailability]  # days without a schedule are omitted
+
+class AppointmentAvailabilityRangeResponse(BaseModel):
+    date_from: str
+    date_to: str
+    doctors: List[DoctorRangeAvailability]
+
+class NextAvailableSlot(BaseModel):
+    doctor_profile_id: int
+    doctor_name: str
+    start: datetime
+    duration_minutes: int
+
+class NextAvailableResponse(BaseModel):
+    especialidad: EspecialidadMedica
+    slots: List[NextAvailableSlot]
@@ -0,0 +1,118 @@
+"""
+Concurrency benchmark for the database-backed endpoints.
+
+Runs the API against a throwaway SQLite database and injects a fixed delay
+into every SQL statement to simulate a slow MySQL query. It then fires N
+concurrent requests at the doctor directory query run from a `def` endpoint
+(in the threadpool) and from an `async def` one (blocking the event loop,
+which was the previous behaviour). Both call build_doctor_directory()
+directly: GET /doctors is cached and would mostly time cache hits.
+
+Usage:
+    python -m app.scripts.bench_concurrency --requests 50 --delay-ms 20
+"""
+import argparse
+import asyncio
+import os
+import sys
+import tempfile
+import time
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Concurrent request benchmark (SQLite)")
+    parser.add_argument("--requests", type=int, default=50, help="Concurrent requests per run")
+    parser.add_argument("--delay-ms", type=float, default=20.0, help="Simulated latency per SQL statement")
+    return parser.parse_args()
+
+
+def setup_database(tmp_dir):
+    """Point the app at a fresh SQLite file before anything imports the engine"""
+    os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(tmp_dir, 'bench.db')}"
+
+
+def seed(session_factory):
+    from app.models.models import EspecialidadMedica
+    from app.scripts.seeding import seed_users_and_doctors
+
+    db = session_factory()
+    try:
+        seed_users_and_doctors(db, doctors=10, specialties=[EspecialidadMedica.CARDIOLOGIA])
+        db.commit()
+    finally:
+        db.close()
+
+
+async def run_batch(client, path, count):
+    start = time.perf_counter()
+    responses = await asyncio.gather(*(client.get(path) for _ in range(count)))
+    elapsed = time.perf_counter() - start
+    assert all(r.status_code == 200 for r in responses), [r.status_code for r in responses]
+    return elapsed
+
+
+async def benchmark(app, count):
+    import httpx
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        # Warm up the pool and the threadpool
+        await run_batch(client, "/_bench/doctors-threadpool", 5)
+
+        single = await run_batch(client, "/_bench/doctors-threadpool", 1)
+        threadpool = await run_batch(client, "/_bench/doctors-threadpool", count)
+        blocking = await run_batch(client, "/_bench/doctors-blocking", count)
+    return single, threadpool, blocking
+
+
+def main():
+    args = parse_args()
+    tmp_dir = tempfile.mkdtemp(prefix="hospital-bench-")
+    setup_database(tmp_dir)
+
+    from sqlalchemy import event
+    from app.core import database
+    from app.api.main import app, build_doctor_directory
+    from app.models.models import Base
+
+    Base.metadata.create_all(bind=database.engine)
+    seed(database.SessionLocal)
+
+    delay = args.delay_ms / 1000.0
+
+    @event.listens_for(database.engine, "before_cursor_execute")
+    def simulate_latency(conn, cursor, statement, parameters, context, executemany):
+        time.sleep(delay)
+
+    # The directory query without the cache, as a `def` endpoint (threadpool)...
+    @app.get("/_bench/doctors-threadpool")
+    def doctors_threadpool():
+        db = database.SessionLocal()
+        try:
+            return build_doctor_directory(db, None, 0, 20)
+        finally:
+            db.close()
+
+    # ...and run directly on the event loop (control)
+    @app.get("/_bench/doctors-blocking")
+    async def doctors_blocking():
+        db = database.SessionLocal()
+        try:
+            return build_doctor_directory(db, None, 0, 20)
+        finally:
+            db.close()
+
+    single, threadpool, blocking = asyncio.run(benchmark(app, args.requests))
+
+    print(f"Requests per batch:        {args.requests}")
+    print(f"Simulated SQL latency:     {args.delay_ms:.1f} ms/statement")
+    print(f"Single request:            {single * 1000:8.1f} ms")
+    print(f"Serialized estimate:       {single * args.requests * 1000:8.1f} ms")
+    print(f"def endpoint (threadpool): {threadpool * 1000:8.1f} ms")
+    print(f"async def blocking (old):  {blocking * 1000:8.1f} ms")
+    print(f"Speed-up vs blocking:      {blocking / threadpool:8.1f}x")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
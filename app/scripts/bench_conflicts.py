@@ -0,0 +1,152 @@
+"""
+Benchmark appointment conflict detection at N appointments per doctor.
+
+Seeds a throwaway SQLite database and times two strategies for the same set
+of random booking attempts:
+
+  legacy  - load every active appointment in a +/-6h window and scan it in
+            Python (the previous create_appointment logic, no composite index)
+  indexed - Appointment.find_conflicts(): one overlap query on
+            ix_appointments_doctor_status_date_end using the stored end_at
+
+Usage:
+    python -m app.scripts.bench_conflicts --per-doctor 10000 --doctors 3 --checks 2000
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Appointment conflict detection benchmark (SQLite)")
+    parser.add_argument("--per-doctor", type=int, default=10000, help="Appointments per doctor")
+    parser.add_argument("--doctors", type=int, default=3, help="Number of doctors")
+    parser.add_argument("--checks", type=int, default=2000, help="Conflict checks per strategy")
+    parser.add_argument("--seed", type=int, default=42)
+    return parser.parse_args()
+
+
+def seed_database(session_factory, doctors, per_doctor):
+    from app.models.models import Appointment, EspecialidadMedica, AppointmentStatus
+    from app.scripts.seeding import seed_users_and_doctors
+
+    db = session_factory()
+    try:
+        seeded = seed_users_and_doctors(db, doctors=doctors, specialties=[EspecialidadMedica.CARDIOLOGIA])
+        patient = seeded.patients[0]
+        profile_ids = [profile.id for profile in seeded.doctors]
+
+        # Eight 45-minute appointments per day, one hour apart
+        statuses = [AppointmentStatus.COMPLETED, AppointmentStatus.SCHEDULED, AppointmentStatus.CONFIRMED]
+        start_day = datetime(2025, 1, 6, 9, 0)
+        rows = []
+        for profile_id in profile_ids:
+            for n in range(per_doctor):
+                day, slot = divmod(n, 8)
+                appointment_date = start_day + timedelta(days=day, minutes=slot * 60)
+                rows.append({
+                    "patient_id": patient.id,
+                    "doctor_profile_id": profile_id,
+                    "appointment_date": appointment_date,
+                    "duration_minutes": 45,
+                    "end_at": appointment_date + timedelta(minutes=45),
+                    "status": statuses[n % len(statuses)],
+                    "created_by_user_id": patient.id,
+                })
+        db.bulk_insert_mappings(Appointment, rows)
+        db.commit()
+        return profile_ids, start_day, per_doctor // 8
+    finally:
+        db.close()
+
+
+def legacy_check(db, doctor_profile_id, start, duration):
+    from app.models.models import Appointment, AppointmentStatus
+
+    end = start + timedelta(minutes=duration)
+    existing = db.query(Appointment).filter(
+        Appointment.doctor_profile_id == doctor_profile_id,
+        Appointment.status.in_([AppointmentStatus.SCHEDULED, AppointmentStatus.CONFIRMED, AppointmentStatus.IN_PROGRESS]),
+        Appointment.appointment_date >= start - timedelta(hours=6),
+        Appointment.appointment_date <= end + timedelta(hours=6)
+    ).all()
+    for appointment in existing:
+        appointment_end = appointment.appointment_date + timedelta(minutes=appointment.duration_minutes)
+        if appointment.appointment_date < end and appointment_end > start:
+            return True
+    return False
+
+
+def indexed_check(db, doctor_profile_id, start, duration):
+    from app.models.models import Appointment
+
+    end = start + timedelta(minutes=duration)
+    return Appointment.find_conflicts(db, doctor_profile_id, start, end).first() is not None
+
+
+def time_strategy(session_factory, check, attempts):
+    db = session_factory()
+    try:
+        conflicts = 0
+        start = time.perf_counter()
+        for doctor_profile_id, appointment_start, duration in attempts:
+            conflicts += check(db, doctor_profile_id, appointment_start, duration)
+            db.expunge_all()
+        return time.perf_counter() - start, conflicts
+    finally:
+        db.close()
+
+
+def main():
+    args = parse_args()
+    random.seed(args.seed)
+    os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(tempfile.mkdtemp(prefix='hospital-bench-'), 'bench.db')}"
+
+    from sqlalchemy import text
+    from app.core import database
+    from app.models.models import Base, Appointment
+
+    Base.metadata.create_all(bind=database.engine)
+    profile_ids, start_day, days = seed_database(database.SessionLocal, args.doctors, args.per_doctor)
+
+    attempts = [
+        (
+            random.choice(profile_ids),
+            start_day + timedelta(days=random.randrange(days), minutes=random.randrange(0, 8 * 60, 15)),
+            random.choice([15, 30, 45, 60]),
+        )
+        for _ in range(args.checks)
+    ]
+
+    db = database.SessionLocal()
+    try:
+        statement = Appointment.find_conflicts(db, profile_ids[0], start_day, start_day).statement
+        compiled = statement.compile(database.engine, compile_kwargs={"literal_binds": True})
+        plan = db.execute(text(f"EXPLAIN QUERY PLAN {compiled}")).all()
+    finally:
+        db.close()
+
+    indexed_time, indexed_conflicts = time_strategy(database.SessionLocal, indexed_check, attempts)
+
+    # The legacy path ran without the composite index
+    with database.engine.begin() as connection:
+        connection.execute(text("DROP INDEX ix_appointments_doctor_status_date_end"))
+    legacy_time, legacy_conflicts = time_strategy(database.SessionLocal, legacy_check, attempts)
+
+    assert indexed_conflicts == legacy_conflicts, (indexed_conflicts, legacy_conflicts)
+
+    print(f"Appointments:        {args.per_doctor} per doctor x {args.doctors} doctors")
+    print(f"Checks per strategy: {args.checks} ({indexed_conflicts} conflicts found by both)")
+    print(f"Indexed query plan:  {' | '.join(row[-1] for row in plan)}")
+    print(f"legacy  (window scan): {legacy_time * 1000 / args.checks:8.3f} ms/check")
+    print(f"indexed (find_conflicts): {indexed_time * 1000 / args.checks:8.3f} ms/check")
+    print(f"Speed-up:            {legacy_time / indexed_time:8.1f}x")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
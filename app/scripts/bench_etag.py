@@ -0,0 +1,131 @@
+"""
+Measure what conditional GETs save: bytes and latency of a full 200 against a 304 revalidation.
+
+Seeds a throwaway SQLite database (doctors with weekly schedules, one patient
+with --appointments appointments, each with history rows), then for every
+endpoint below fetches it --runs times without and with If-None-Match and
+reports the median latency and the body size. Endpoints with version stamps
+answer the 304 before querying; /appointments/{id} only has the middleware's
+content hash, so it still does the work and saves the transfer.
+
+Finally it confirms an appointment and checks that the stale ETags of the
+list and the history now get a 200 again.
+
+Usage:
+    python -m app.scripts.bench_etag --appointments 200 --runs 50
+"""
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Conditional GET (ETag/304) benchmark (SQLite)")
+    parser.add_argument("--doctors", type=int, default=50, help="Doctors in the directory")
+    parser.add_argument("--appointments", type=int, default=200, help="Appointments of the patient")
+    parser.add_argument("--runs", type=int, default=50, help="Requests per measurement")
+    return parser.parse_args()
+
+
+def seed_database(session_factory, doctors, appointments):
+    """Returns the token claims of the patient and the first doctor, that doctor's ids and an appointment id"""
+    from app.core.auth import principal_token_claims
+    from app.models.models import Appointment, AppointmentHistory
+    from app.scripts.seeding import seed_users_and_doctors
+
+    db = session_factory()
+    try:
+        seeded = seed_users_and_doctors(db, doctors=doctors, schedule_days=range(5))
+        admin, patient, doctor = seeded.admin, seeded.patients[0], seeded.doctors[0]
+
+        start = datetime.now().replace(hour=9, minute=0, second=0, microsecond=0) + timedelta(days=1)
+        for i in range(appointments):
+            appointment = Appointment(
+                patient_id=patient.id, doctor_profile_id=doctor.id, duration_minutes=30,
+                appointment_date=start + timedelta(days=i // 8, minutes=45 * (i % 8)),
+                reason="Revision", created_by_user_id=patient.id
+            )
+            db.add(appointment)
+            db.flush()
+            for field in ("status", "notes", "appointment_date"):
+                db.add(AppointmentHistory(appointment_id=appointment.id, changed_by_user_id=admin.id,
+                                          field_name=field, old_value="-", new_value="-"))
+        db.commit()
+        return (principal_token_claims(patient), principal_token_claims(doctor.user),
+                doctor.id, doctor.user_id, appointment.id)
+    finally:
+        db.close()
+
+
+def measure(client, path, headers, runs):
+    first = client.get(path, headers=headers)
+    assert first.status_code == 200, (path, first.status_code, first.text[:200])
+    etag = first.headers["etag"]
+
+    def timed(extra):
+        durations = []
+        for _ in range(runs):
+            start = time.perf_counter()
+            response = client.get(path, headers={**headers, **extra})
+            durations.append(time.perf_counter() - start)
+        return response, statistics.median(durations) * 1000
+
+    full, full_ms = timed({})
+    revalidated, revalidated_ms = timed({"If-None-Match": etag})
+    assert revalidated.status_code == 304, (path, revalidated.status_code)
+    return etag, len(full.content), full_ms, len(revalidated.content), revalidated_ms
+
+
+def main():
+    args = parse_args()
+    tmp_dir = tempfile.mkdtemp(prefix="hospital-etag-")
+    os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(tmp_dir, 'bench.db')}"
+
+    from fastapi.testclient import TestClient
+    from app.core import database
+    from app.core.auth import create_access_token
+    from app.models.models import Base
+    from app.api.main import create_app
+
+    Base.metadata.create_all(bind=database.get_engine())
+    patient_claims, doctor_claims, doctor_profile_id, doctor_user_id, appointment_id = seed_database(
+        database.SessionLocal, args.doctors, args.appointments
+    )
+    patient_headers = {"Authorization": f"Bearer {create_access_token(patient_claims)}"}
+    doctor_headers = {"Authorization": f"Bearer {create_access_token(doctor_claims)}"}
+
+    endpoints = [
+        ("/doctors?limit=100", {}),
+        (f"/doctors/{doctor_user_id}", {}),
+        (f"/doctor-availability/{doctor_profile_id}", {}),
+        (f"/appointments?expand=patient,doctor&limit={args.appointments}", patient_headers),
+        (f"/appointments/{appointment_id}/history", patient_headers),
+        (f"/appointments/{appointment_id}", patient_headers),  # middleware content hash only
+    ]
+
+    client = TestClient(create_app())
+    print(f"{'endpoint':52} {'200 bytes':>10} {'200 ms':>8} {'304 bytes':>10} {'304 ms':>8} {'saved':>7}")
+    etags = {}
+    for path, headers in endpoints:
+        etag, full_bytes, full_ms, revalidated_bytes, revalidated_ms = measure(client, path, headers, args.runs)
+        etags[path] = etag
+        print(f"{path[:52]:52} {full_bytes:10d} {full_ms:8.2f} {revalidated_bytes:10d} {revalidated_ms:8.2f} "
+              f"{1 - revalidated_ms / full_ms:6.0%}")
+
+    # A write must invalidate the stamps of the list and the history
+    client.post(f"/appointments/{appointment_id}/confirm", headers=doctor_headers).raise_for_status()
+    stale = []
+    for path, headers in endpoints[3:5]:
+        response = client.get(path, headers={**headers, "If-None-Match": etags[path]})
+        if response.status_code != 200:
+            stale.append(path)
+    print("After confirming the appointment: " + (f"STALE {', '.join(stale)}" if stale else "list and history refetched (200)"))
+    return 1 if stale else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
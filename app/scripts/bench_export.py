@@ -0,0 +1,153 @@
+"""
+Export all appointments: stream /admin/appointments/export against paging /admin/appointments.
+
+Seeds a throwaway SQLite database with --appointments appointments (bulk inserts) and starts
+a single-process uvicorn server on it. For each size in --sizes it exports the first N rows
+(by date range) as NDJSON and CSV, reading the body as it arrives, and reports rows/s and the
+server's peak resident memory during the export (sampled from /proc, Linux). The paged
+listing (limit=--page-size, include_total=true on every page) is timed for the smaller sizes
+for comparison. TestClient is not used: it buffers whole bodies.
+
+Usage:
+    python -m app.scripts.bench_export --appointments 200000 --sizes 1000 50000 200000
+"""
+import argparse
+import os
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime, timedelta
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Streaming export benchmark (SQLite)")
+    parser.add_argument("--appointments", type=int, default=200000, help="Appointments to seed")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 50000, 200000], help="Rows per export")
+    parser.add_argument("--page-size", type=int, default=100, help="limit= of the paged listing")
+    parser.add_argument("--max-paged", type=int, default=50000, help="Skip paging above this many rows")
+    return parser.parse_args()
+
+
+def seed_database(session_factory, appointments):
+    """Returns the admin's token claims and the date of the first appointment (one every 10 minutes)"""
+    from app.core.auth import principal_token_claims
+    from app.models.models import Appointment, EspecialidadMedica
+    from app.scripts.seeding import seed_users_and_doctors
+
+    db = session_factory()
+    try:
+        seeded = seed_users_and_doctors(db, doctors=1, specialties=[EspecialidadMedica.MEDICINA_GENERAL])
+        admin, patient, profile = seeded.admin, seeded.patients[0], seeded.doctors[0]
+        db.commit()
+
+        start = datetime(2020, 1, 1, 0, 0)
+        table = Appointment.__table__
+        for offset in range(0, appointments, 10000):
+            db.execute(table.insert(), [
+                {
+                    "patient_id": patient.id, "doctor_profile_id": profile.id, "duration_minutes": 10,
+                    "appointment_date": start + timedelta(minutes=10 * i),
+                    "end_at": start + timedelta(minutes=10 * (i + 1)),
+                    "appointment_type": "consultation", "priority": "normal", "status": "scheduled",
+                    "reason": "Revision", "created_by_user_id": patient.id,
+                }
+                for i in range(offset, min(offset + 10000, appointments))
+            ])
+        db.commit()
+        return principal_token_claims(admin), start
+    finally:
+        db.close()
+
+
+def resident_mib(pid):
+    with open(f"/proc/{pid}/status") as status:
+        for line in status:
+            if line.startswith("VmRSS:"):
+                return int(line.split()[1]) / 1024
+    return 0.0
+
+
+def timed_export(client, headers, server_pid, export_format, date_from, date_to):
+    """Returns the lines received, the seconds taken and the server's peak RSS while sending them"""
+    peak = resident_mib(server_pid)
+    done = threading.Event()
+
+    def sample():
+        nonlocal peak
+        while not done.wait(0.02):
+            peak = max(peak, resident_mib(server_pid))
+
+    sampler = threading.Thread(target=sample)
+    sampler.start()
+    started = time.perf_counter()
+    lines = 0
+    try:
+        with client.stream("GET", "/admin/appointments/export", headers=headers, params={
+            "format": export_format, "date_from": date_from.isoformat(), "date_to": date_to.isoformat()
+        }) as response:
+            assert response.status_code == 200, response.read()[:200]
+            for chunk in response.iter_bytes():
+                lines += chunk.count(b"\n")
+    finally:
+        done.set()
+        sampler.join()
+    return lines, time.perf_counter() - started, peak
+
+
+def timed_paging(client, headers, rows, page_size):
+    started = time.perf_counter()
+    fetched = 0
+    while fetched < rows:
+        response = client.get("/admin/appointments", headers=headers, params={
+            "skip": fetched, "limit": min(page_size, rows - fetched), "include_total": "true"
+        })
+        response.raise_for_status()
+        page = response.json()["appointments"]
+        if not page:
+            break
+        fetched += len(page)
+    return fetched, time.perf_counter() - started
+
+
+def main():
+    args = parse_args()
+    tmp_dir = tempfile.mkdtemp(prefix="hospital-export-")
+    os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(tmp_dir, 'bench.db')}"
+
+    import httpx
+    from app.core import database
+    from app.core.auth import create_access_token
+    from app.models.models import Base
+    from app.scripts.load_test import free_port, start_server, stop_server
+
+    Base.metadata.create_all(bind=database.get_engine())
+    admin_claims, start = seed_database(database.SessionLocal, args.appointments)
+    headers = {"Authorization": f"Bearer {create_access_token(admin_claims)}"}
+
+    port = free_port()
+    # One uvicorn process (no gunicorn master), so its pid is the one serving
+    server = start_server(os.environ["DATABASE_URL"], 1, port, no_gunicorn=True)
+    try:
+        with httpx.Client(base_url=f"http://127.0.0.1:{port}", timeout=60) as client:
+            print(f"server RSS at start: {resident_mib(server.pid):.1f} MiB")
+            print(f"{'size':>8} {'method':8} {'rows':>8} {'seconds':>8} {'rows/s':>9} {'peak MiB':>9}")
+            for size in args.sizes:
+                # 144 appointments a day: the date range selects the first `size` rows (rounded up to the day)
+                date_to = (start + timedelta(minutes=10 * (size - 1))).date()
+                for export_format in ("ndjson", "csv"):
+                    lines, elapsed, peak = timed_export(
+                        client, headers, server.pid, export_format, start.date(), date_to
+                    )
+                    rows = lines - (1 if export_format == "csv" else 0)
+                    print(f"{size:8d} {export_format:8} {rows:8d} {elapsed:8.2f} {rows / elapsed:9.0f} {peak:9.1f}")
+                if size <= args.max_paged:
+                    fetched, elapsed = timed_paging(client, headers, size, args.page_size)
+                    print(f"{size:8d} {'paged':8} {fetched:8d} {elapsed:8.2f} {fetched / elapsed:9.0f} {'-':>9}")
+    finally:
+        stop_server(server)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
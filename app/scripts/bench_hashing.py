@@ -0,0 +1,76 @@
+"""
+Report password hashes per second for each scheme and cost on this host.
+
+Use it to pick BCRYPT_ROUNDS / PBKDF2_SHA256_ROUNDS / ARGON2_* for a deployment's
+login latency target. Verification costs the same as hashing, so ms/hash is
+roughly what a login spends in the password check (per core).
+
+Usage:
+    python -m app.scripts.bench_hashing
+    python -m app.scripts.bench_hashing --bcrypt-rounds 10,11,12,13 --seconds 3
+"""
+import argparse
+import sys
+import time
+
+from passlib.exc import MissingBackendError
+
+from app.core.auth import (
+    BCRYPT_ROUNDS, PBKDF2_SHA256_ROUNDS, ARGON2_TIME_COST, ARGON2_MEMORY_COST, PASSWORD_SCHEMES,
+    build_password_context
+)
+
+
+def int_list(value):
+    return [int(item) for item in value.split(",") if item.strip()]
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Password hashing micro-benchmark")
+    parser.add_argument("--bcrypt-rounds", type=int_list, default=[10, 11, 12, 13])
+    parser.add_argument("--pbkdf2-rounds", type=int_list, default=[29000, 100000, 300000])
+    parser.add_argument("--argon2-time-cost", type=int_list, default=[2, 3])
+    parser.add_argument("--argon2-memory-cost", type=int, default=ARGON2_MEMORY_COST, help="KiB")
+    parser.add_argument("--seconds", type=float, default=2.0, help="Measuring time per configuration")
+    return parser.parse_args()
+
+
+def measure(context, seconds):
+    """Hashes per second, with at least three hashes"""
+    count = 0
+    start = time.perf_counter()
+    while count < 3 or time.perf_counter() - start < seconds:
+        context.hash("benchmark-password")
+        count += 1
+    return count / (time.perf_counter() - start)
+
+
+def main():
+    args = parse_args()
+
+    configurations = [("bcrypt", f"rounds={rounds}", {"bcrypt_rounds": rounds}) for rounds in args.bcrypt_rounds]
+    configurations += [
+        ("pbkdf2_sha256", f"rounds={rounds}", {"pbkdf2_sha256_rounds": rounds}) for rounds in args.pbkdf2_rounds
+    ]
+    configurations += [
+        ("argon2", f"t={time_cost} m={args.argon2_memory_cost}KiB",
+         {"argon2_time_cost": time_cost, "argon2_memory_cost": args.argon2_memory_cost})
+        for time_cost in args.argon2_time_cost
+    ]
+
+    print(f"Current settings: PASSWORD_SCHEMES={','.join(PASSWORD_SCHEMES)} BCRYPT_ROUNDS={BCRYPT_ROUNDS} "
+          f"PBKDF2_SHA256_ROUNDS={PBKDF2_SHA256_ROUNDS} ARGON2_TIME_COST={ARGON2_TIME_COST}")
+    print(f"{'scheme':14} {'cost':24} {'hashes/s':>10} {'ms/hash':>9}")
+    for scheme, label, costs in configurations:
+        context = build_password_context([scheme], **costs)
+        try:
+            rate = measure(context, args.seconds)
+        except MissingBackendError:
+            print(f"{scheme:14} {label:24} {'(backend not installed)':>20}")
+            continue
+        print(f"{scheme:14} {label:24} {rate:10.1f} {1000 / rate:9.1f}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
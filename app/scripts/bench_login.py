@@ -0,0 +1,156 @@
+"""
+Login throughput benchmark: inline bcrypt vs the bounded password hashing pool.
+
+Each mode runs in its own process with a throwaway SQLite database and a
+uvicorn server on a free local port:
+
+  inline  - PASSWORD_HASH_WORKERS=0 with no pending limit (the previous behaviour:
+            every login hashes on its request thread)
+  pooled  - PASSWORD_HASH_WORKERS=--workers, PASSWORD_HASH_MAX_PENDING=--max-pending
+
+--concurrency clients call POST /login in a loop for --duration seconds. A
+probe thread meanwhile times GET /doctors to show how other requests fare.
+
+Usage:
+    python -m app.scripts.bench_login --concurrency 64 --duration 10 --workers 4 --max-pending 16
+"""
+import argparse
+import json
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Login throughput benchmark (inline vs pooled hashing)")
+    parser.add_argument("--concurrency", type=int, default=64, help="Concurrent login clients")
+    parser.add_argument("--duration", type=float, default=10.0, help="Seconds per mode")
+    parser.add_argument("--workers", type=int, default=min(4, os.cpu_count() or 1), help="Hashing threads (pooled mode)")
+    parser.add_argument("--max-pending", type=int, default=16, help="Hashes queued or running before 503 (pooled mode)")
+    parser.add_argument("--child", choices=["inline", "pooled"], help=argparse.SUPPRESS)
+    return parser.parse_args()
+
+
+def percentile(values, fraction):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def run_child(args):
+    """Serve the app in this process and hammer /login; prints one JSON line"""
+    import httpx
+    import uvicorn
+    from app.api.main import app
+    from app.core.auth import get_password_hash
+    from app.core.database import SessionLocal, engine
+    from app.models.models import Base, User
+
+    Base.metadata.create_all(bind=engine)
+    db = SessionLocal()
+    db.add(User(
+        dni="00000000T", nombre="Paciente", apellidos="Bench", email="login@bench.es",
+        telefono="600000000", direccion="-", fecha_nacimiento="1980-01-01",
+        hashed_password=get_password_hash("benchmark-password")
+    ))
+    db.commit()
+    db.close()
+
+    port = free_port()
+    server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=port, log_level="error"))
+    threading.Thread(target=server.run, daemon=True).start()
+    while not server.started:
+        time.sleep(0.05)
+
+    base_url = f"http://127.0.0.1:{port}"
+    deadline = time.monotonic() + args.duration
+    login_latencies, probe_latencies = [], []
+    counts = {"ok": 0, "busy": 0, "error": 0}
+    lock = threading.Lock()
+
+    def login_client():
+        with httpx.Client(base_url=base_url, timeout=60) as client:
+            while time.monotonic() < deadline:
+                start = time.perf_counter()
+                response = client.post("/login", json={"email": "login@bench.es", "password": "benchmark-password"})
+                elapsed = time.perf_counter() - start
+                outcome = {200: "ok", 503: "busy"}.get(response.status_code, "error")
+                with lock:
+                    counts[outcome] += 1
+                    if outcome == "ok":
+                        login_latencies.append(elapsed)
+                if outcome == "busy":
+                    time.sleep(float(response.headers.get("Retry-After", "1")))
+
+    def probe():
+        with httpx.Client(base_url=base_url, timeout=60) as client:
+            while time.monotonic() < deadline:
+                start = time.perf_counter()
+                client.get("/doctors")
+                probe_latencies.append(time.perf_counter() - start)
+                time.sleep(0.05)
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.concurrency + 1) as executor:
+        executor.submit(probe)
+        for _ in range(args.concurrency):
+            executor.submit(login_client)
+    elapsed = time.perf_counter() - started
+    server.should_exit = True
+
+    print(json.dumps({
+        "logins_per_second": counts["ok"] / elapsed,
+        "ok": counts["ok"],
+        "busy": counts["busy"],
+        "error": counts["error"],
+        "login_p50_ms": percentile(login_latencies, 0.50) * 1000,
+        "login_p95_ms": percentile(login_latencies, 0.95) * 1000,
+        "probe_p50_ms": percentile(probe_latencies, 0.50) * 1000,
+        "probe_p95_ms": percentile(probe_latencies, 0.95) * 1000,
+    }))
+    return 0
+
+
+def main():
+    args = parse_args()
+    if args.child:
+        return run_child(args)
+
+    modes = {
+        "inline": {"PASSWORD_HASH_WORKERS": "0", "PASSWORD_HASH_MAX_PENDING": "100000"},
+        "pooled": {"PASSWORD_HASH_WORKERS": str(args.workers), "PASSWORD_HASH_MAX_PENDING": str(args.max_pending)},
+    }
+
+    print(f"Concurrency: {args.concurrency} clients for {args.duration:.0f}s per mode (+ /doctors probe)")
+    print(f"{'mode':8} {'logins/s':>9} {'ok':>6} {'503':>6} {'login p50':>10} {'login p95':>10} {'probe p50':>10} {'probe p95':>10}")
+    for mode, settings in modes.items():
+        database_url = f"sqlite:///{os.path.join(tempfile.mkdtemp(prefix='hospital-bench-'), 'bench.db')}"
+        env = dict(os.environ, DATABASE_URL=database_url, **settings)
+        output = subprocess.run(
+            [sys.executable, "-m", "app.scripts.bench_login", "--child", mode,
+             "--concurrency", str(args.concurrency), "--duration", str(args.duration)],
+            env=env, capture_output=True, text=True, check=True
+        ).stdout
+        result = json.loads(output.strip().splitlines()[-1])
+        print(
+            f"{mode:8} {result['logins_per_second']:9.1f} {result['ok']:6d} {result['busy']:6d} "
+            f"{result['login_p50_ms']:8.0f}ms {result['login_p95_ms']:8.0f}ms "
+            f"{result['probe_p50_ms']:8.0f}ms {result['probe_p95_ms']:8.0f}ms"
+        )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,112 @@
+"""
+Benchmark the "next available slot" search across the doctors of a specialty.
+
+Seeds a throwaway SQLite database with --doctors doctors of one specialty.
+Each has a Monday-Friday template, and the first --booked-days days are
+fully booked (up to --gap-rate of free slots), so the search has to walk past them. Times
+find_next_free_slots() with a cold cache (every doctor-day grid built from
+SQL) and a warm one.
+
+Usage:
+    python -m app.scripts.bench_next_available --doctors 300 --booked-days 20 --horizon 60
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Next available slot search benchmark (SQLite)")
+    parser.add_argument("--doctors", type=int, default=300, help="Doctors in the specialty")
+    parser.add_argument("--booked-days", type=int, default=20, help="Leading days that are fully booked")
+    parser.add_argument("--gap-rate", type=float, default=0.0, help="Share of slots left free in the booked days")
+    parser.add_argument("--horizon", type=int, default=60, help="Search horizon in days")
+    parser.add_argument("--limit", type=int, default=5, help="Slots to return")
+    parser.add_argument("--runs", type=int, default=20, help="Warm runs to average")
+    parser.add_argument("--seed", type=int, default=42)
+    return parser.parse_args()
+
+
+def seed_database(session_factory, doctors, booked_days, gap_rate, first_day):
+    from app.models.models import Appointment, EspecialidadMedica
+    from app.scripts.seeding import seed_users_and_doctors
+
+    db = session_factory()
+    try:
+        seeded = seed_users_and_doctors(
+            db, doctors=doctors, specialties=[EspecialidadMedica.CARDIOLOGIA], schedule_days=range(5)
+        )
+        patient = seeded.patients[0]
+
+        appointments = []
+        for profile in seeded.doctors:
+            # Fill every slot of the booked days except the random gaps
+            for day in range(booked_days):
+                start = datetime.combine(first_day + timedelta(days=day), datetime.min.time()).replace(hour=9)
+                for slot in range(8):
+                    if random.random() < gap_rate:
+                        continue
+                    appointment_date = start + timedelta(minutes=35 * slot)
+                    appointments.append({
+                        "patient_id": patient.id,
+                        "doctor_profile_id": profile.id,
+                        "appointment_date": appointment_date,
+                        "duration_minutes": 30,
+                        "end_at": appointment_date + timedelta(minutes=30),
+                        "created_by_user_id": patient.id,
+                    })
+
+        db.bulk_insert_mappings(Appointment, appointments)
+        db.commit()
+        return len(appointments)
+    finally:
+        db.close()
+
+
+def main():
+    args = parse_args()
+    random.seed(args.seed)
+    os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(tempfile.mkdtemp(prefix='hospital-bench-'), 'bench.db')}"
+
+    from app.core import database
+    from app.models.models import Base, DoctorProfile
+    from app.utils.scheduling import MIN_BOOKING_NOTICE, day_slots_cache, find_next_free_slots
+
+    Base.metadata.create_all(bind=database.engine)
+    first_day = datetime.now().date() + timedelta(days=1)
+    appointments = seed_database(database.SessionLocal, args.doctors, args.booked_days, args.gap_rate, first_day)
+
+    db = database.SessionLocal()
+    try:
+        doctor_ids = [row.id for row in db.query(DoctorProfile.id).order_by(DoctorProfile.id)]
+        not_before = datetime.now() + MIN_BOOKING_NOTICE
+
+        def search():
+            return find_next_free_slots(db, doctor_ids, first_day, args.horizon, args.limit, not_before)
+
+        day_slots_cache.clear()
+        start = time.perf_counter()
+        slots = search()
+        cold = time.perf_counter() - start
+
+        start = time.perf_counter()
+        for _ in range(args.runs):
+            search()
+        warm = (time.perf_counter() - start) / args.runs
+    finally:
+        db.close()
+
+    print(f"Doctors:      {args.doctors} ({appointments} appointments, first {args.booked_days} days booked)")
+    print(f"Horizon:      {args.horizon} days, limit {args.limit}")
+    print(f"First slot:   {slots[0][0] if slots else 'none'} (doctor {slots[0][1] if slots else '-'})")
+    print(f"cold cache:   {cold * 1000:8.1f} ms")
+    print(f"warm cache:   {warm * 1000:8.1f} ms")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
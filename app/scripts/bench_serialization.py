@@ -0,0 +1,102 @@
+"""
+Serialization time and payload size of large list responses (AppointmentResponse, UserResponse).
+
+Builds --rows in-memory ORM objects (no database) and times, per response:
+  fastapi+json     what a route with response_model does: validate and serialize the
+                   returned models, then JSONResponse (json.dumps)
+  fastapi+orjson   the same with ORJSONResponse, the application's default response class
+  dump_json        one pydantic TypeAdapter.dump_json() over the models, sent as raw bytes
+                   (no second validation pass)
+and the body size raw and gzip-compressed at the GZipMiddleware level.
+
+Usage:
+    python -m app.scripts.bench_serialization --rows 1000 10000 --runs 5
+"""
+import argparse
+import asyncio
+import gzip
+import statistics
+import sys
+import time
+from datetime import datetime, timedelta
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="JSON serialization and compression benchmark")
+    parser.add_argument("--rows", type=int, nargs="+", default=[1000, 10000], help="Rows per response")
+    parser.add_argument("--runs", type=int, default=5, help="Timed runs per measurement (median)")
+    return parser.parse_args()
+
+
+def build_rows(count):
+    from app.models.models import (
+        User, Appointment, AppointmentStatus, AppointmentType, AppointmentPriority
+    )
+
+    now = datetime(2026, 1, 1, 9, 0)
+    users, appointments = [], []
+    for i in range(count):
+        user = User(
+            id=i + 1, dni=f"{i:08d}Z", nombre=f"Nombre{i}", apellidos="Apellido Apellido",
+            email=f"usuario{i}@hospital.es", telefono="600000000", direccion="-",
+            fecha_nacimiento="1980-01-01", hashed_password="-", is_active=True, created_at=now
+        )
+        user.roles = '["patient"]'
+        users.append(user)
+        appointments.append(Appointment(
+            id=i + 1, patient_id=i + 1, doctor_profile_id=i % 50 + 1,
+            appointment_date=now + timedelta(minutes=30 * i), duration_minutes=30,
+            appointment_type=AppointmentType.CONSULTATION, priority=AppointmentPriority.NORMAL,
+            status=AppointmentStatus.SCHEDULED, reason="Revisión anual", notes=None,
+            created_at=now, updated_at=now, created_by_user_id=i + 1
+        ))
+    return users, appointments
+
+
+def timed(function, runs):
+    function()  # warm up
+    durations = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        result = function()
+        durations.append(time.perf_counter() - start)
+    return result, statistics.median(durations) * 1000
+
+
+def main():
+    args = parse_args()
+
+    from fastapi.responses import JSONResponse, ORJSONResponse
+    from fastapi.routing import serialize_response
+    from fastapi.utils import create_response_field
+    from pydantic import TypeAdapter
+
+    from app.api.main import GZIP_COMPRESS_LEVEL
+    from app.schemas.schemas import AppointmentResponse, UserResponse
+
+    print(f"{'rows':>6} {'schema':20} {'path':15} {'ms':>9} {'raw bytes':>11} {'gzip bytes':>11}")
+    for count in args.rows:
+        users, appointments = build_rows(count)
+        for schema, objects in ((AppointmentResponse, appointments), (UserResponse, users)):
+            models = [schema.model_validate(obj) for obj in objects]
+            field = create_response_field(name="Response", type_=list[schema], mode="serialization")
+            adapter = TypeAdapter(list[schema])
+
+            def fastapi_path(response_class):
+                content = asyncio.run(serialize_response(field=field, response_content=models))
+                return response_class(content).body
+
+            paths = {
+                "fastapi+json": lambda: fastapi_path(JSONResponse),
+                "fastapi+orjson": lambda: fastapi_path(ORJSONResponse),
+                "dump_json": lambda: adapter.dump_json(models),
+            }
+            for name, function in paths.items():
+                body, elapsed_ms = timed(function, args.runs)
+                compressed = len(gzip.compress(body, compresslevel=GZIP_COMPRESS_LEVEL))
+                print(f"{count:6d} {schema.__name__:20} {name:15} {elapsed_ms:9.1f} {len(body):11d} {compressed:11d}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
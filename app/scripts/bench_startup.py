@@ -0,0 +1,172 @@
+"""
+Worker startup benchmark: import time, app creation and time to first response.
+
+Each run starts a fresh Python process that imports app.api.main, calls
+create_app() and serves it with uvicorn on a throwaway SQLite database. The
+parent measures how long the process takes to answer GET /health (ready) and
+the first and second GET /doctors. Medians over --runs are reported.
+
+As a regression guard it exits with status 1 when a median exceeds
+--max-import-ms / --max-ready-ms, or is more than --tolerance slower than a
+saved --baseline (the file is written on the first run).
+
+Usage:
+    python -m app.scripts.bench_startup --runs 5
+    python -m app.scripts.bench_startup --runs 5 --baseline startup-baseline.json --tolerance 0.25
+    python -m app.scripts.bench_startup --max-import-ms 1500 --max-ready-ms 2500
+"""
+import argparse
+import json
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+METRICS = ("import_ms", "import_cpu_ms", "create_app_ms", "ready_ms", "first_doctors_ms", "warm_doctors_ms")
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Worker startup benchmark")
+    parser.add_argument("--runs", type=int, default=5, help="Fresh processes to start")
+    parser.add_argument("--max-import-ms", type=float, help="Fail if the median import time is higher")
+    parser.add_argument("--max-ready-ms", type=float, help="Fail if the median time to first /health is higher")
+    parser.add_argument("--baseline", help="JSON file with reference medians (written if missing)")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="Allowed slowdown against the baseline")
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    parser.add_argument("--port", type=int, help=argparse.SUPPRESS)
+    return parser.parse_args()
+
+
+def run_child(port):
+    """Import and serve the app; prints one JSON line with the in-process timings"""
+    start, start_cpu = time.perf_counter(), time.process_time()
+    from app.api.main import create_app
+    imported, imported_cpu = time.perf_counter(), time.process_time()
+    application = create_app()
+    created = time.perf_counter()
+
+    import uvicorn
+    print(json.dumps({
+        "import_ms": (imported - start) * 1000,
+        # CPU time is far less sensitive to other load on the host than wall time
+        "import_cpu_ms": (imported_cpu - start_cpu) * 1000,
+        "create_app_ms": (created - imported) * 1000,
+    }), flush=True)
+    uvicorn.run(application, host="127.0.0.1", port=port, log_level="error")
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def prepare_database(database_url):
+    """Create and seed the schema in a separate process so the children start from a cold import"""
+    code = (
+        "from app.core import database\n"
+        "from app.models.models import Base, User, DoctorProfile, EspecialidadMedica\n"
+        "Base.metadata.create_all(bind=database.engine)\n"
+        "db = database.SessionLocal()\n"
+        "admin = User(dni='00000000T', nombre='Admin', apellidos='Bench', email='admin@bench.es',\n"
+        "             telefono='600000000', direccion='-', fecha_nacimiento='1980-01-01', hashed_password='-')\n"
+        "admin.set_roles(['admin'])\n"
+        "db.add(admin); db.flush()\n"
+        "for i in range(20):\n"
+        "    user = User(dni=f'1000{i:04d}X', nombre=f'Doctor{i}', apellidos='Bench', email=f'doctor{i}@bench.es',\n"
+        "                telefono='600000001', direccion='-', fecha_nacimiento='1980-01-01', hashed_password='-')\n"
+        "    user.set_roles(['patient', 'doctor'])\n"
+        "    db.add(user); db.flush()\n"
+        "    db.add(DoctorProfile(user_id=user.id, numero_colegiado=f'2800{i:05d}', colegio_medico='Madrid',\n"
+        "        especialidad=EspecialidadMedica.CARDIOLOGIA, universidad='UCM', ano_graduacion=2000,\n"
+        "        hospital_centro='Hospital', departamento_servicio='Cardiologia', created_by_admin=admin.id))\n"
+        "db.commit()\n"
+    )
+    subprocess.run([sys.executable, "-c", code], env=dict(os.environ, DATABASE_URL=database_url), check=True)
+
+
+def measure_once(database_url):
+    import httpx
+
+    port = free_port()
+    started = time.perf_counter()
+    child = subprocess.Popen(
+        [sys.executable, "-m", "app.scripts.bench_startup", "--child", "--port", str(port)],
+        env=dict(os.environ, DATABASE_URL=database_url), stdout=subprocess.PIPE, text=True
+    )
+    try:
+        timings = json.loads(child.stdout.readline())
+        base_url = f"http://127.0.0.1:{port}"
+        with httpx.Client(base_url=base_url, timeout=10) as client:
+            while True:
+                try:
+                    if client.get("/health").status_code == 200:
+                        break
+                except httpx.TransportError:
+                    pass
+                if child.poll() is not None:
+                    raise RuntimeError("the server process exited")
+                time.sleep(0.005)
+            timings["ready_ms"] = (time.perf_counter() - started) * 1000
+
+            for metric in ("first_doctors_ms", "warm_doctors_ms"):
+                request_start = time.perf_counter()
+                client.get("/doctors").raise_for_status()
+                timings[metric] = (time.perf_counter() - request_start) * 1000
+        return timings
+    finally:
+        child.terminate()
+        child.wait(timeout=10)
+
+
+def check_regressions(medians, args):
+    failures = []
+    if args.max_import_ms is not None and medians["import_ms"] > args.max_import_ms:
+        failures.append(f"import_ms {medians['import_ms']:.1f} > {args.max_import_ms}")
+    if args.max_ready_ms is not None and medians["ready_ms"] > args.max_ready_ms:
+        failures.append(f"ready_ms {medians['ready_ms']:.1f} > {args.max_ready_ms}")
+
+    if args.baseline:
+        if not os.path.exists(args.baseline):
+            with open(args.baseline, "w") as handle:
+                json.dump(medians, handle, indent=2)
+            print(f"Baseline written to {args.baseline}")
+        else:
+            with open(args.baseline) as handle:
+                baseline = json.load(handle)
+            for metric in ("import_cpu_ms", "create_app_ms", "ready_ms"):
+                limit = baseline[metric] * (1 + args.tolerance)
+                if medians[metric] > limit:
+                    failures.append(f"{metric} {medians[metric]:.1f} > baseline {baseline[metric]:.1f} "
+                                    f"+{args.tolerance:.0%}")
+    return failures
+
+
+def main():
+    args = parse_args()
+    if args.child:
+        run_child(args.port)
+        return 0
+
+    database_url = f"sqlite:///{os.path.join(tempfile.mkdtemp(prefix='hospital-bench-'), 'bench.db')}"
+    prepare_database(database_url)
+
+    runs = [measure_once(database_url) for _ in range(args.runs)]
+    medians = {metric: statistics.median(run[metric] for run in runs) for metric in METRICS}
+
+    print(f"{'metric':18} {'median':>9} {'min':>9} {'max':>9}")
+    for metric in METRICS:
+        values = [run[metric] for run in runs]
+        print(f"{metric:18} {medians[metric]:9.1f} {min(values):9.1f} {max(values):9.1f}")
+
+    failures = check_regressions(medians, args)
+    for failure in failures:
+        print(f"REGRESSION: {failure}")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
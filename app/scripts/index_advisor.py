@@ -0,0 +1,289 @@
+"""
+Index advisor: EXPLAIN every query the main endpoints run and flag full scans.
+
+Seeds a throwaway SQLite database (or the empty scratch database given with
+--database-url), calls each endpoint through the ASGI app, records the SELECT
+statements it sends and runs EXPLAIN QUERY PLAN (EXPLAIN on MySQL) on each one
+with the same parameters. Caches are cleared before each call so every lookup
+reaches the database.
+
+Flags:
+    FULL SCAN  the table is read row by row (no usable index)
+    SORT       rows are sorted in a temporary structure (no index in the ORDER BY / GROUP BY order)
+Scans that stop at a LIMIT in index order are reported but not flagged.
+
+--without-indexes drops the composite indexes declared in the models'
+__table_args__ first, to see which queries depend on them.
+
+Usage:
+    python -m app.scripts.index_advisor
+    python -m app.scripts.index_advisor --without-indexes --verbose
+    python -m app.scripts.index_advisor --strict   # exit status 1 when something is flagged
+"""
+import argparse
+import os
+import random
+import re
+import sys
+import tempfile
+from datetime import datetime, timedelta
+
+DOMAIN = "advisor.es"
+ADMIN_PASSWORD = "advisor-password"
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="EXPLAIN the endpoint queries and flag full scans")
+    parser.add_argument("--database-url", help="Empty scratch database to seed (default: temporary SQLite file)")
+    parser.add_argument("--doctors", type=int, default=100, help="Doctors to seed")
+    parser.add_argument("--patients", type=int, default=200, help="Patients to seed")
+    parser.add_argument("--appointments", type=int, default=20000, help="Appointments to seed")
+    parser.add_argument("--without-indexes", action="store_true", help="Drop the composite model indexes first")
+    parser.add_argument("--verbose", action="store_true", help="Print the full SQL of every query")
+    parser.add_argument("--strict", action="store_true", help="Exit with status 1 if any query is flagged")
+    parser.add_argument("--seed", type=int, default=42)
+    return parser.parse_args()
+
+
+def seed_database(session_factory, doctors, patients, appointments):
+    from app.models.models import Appointment, AppointmentHistory, AppointmentStatus
+    from app.scripts.seeding import seed_users_and_doctors
+
+    db = session_factory()
+    try:
+        seeded = seed_users_and_doctors(
+            db, doctors=doctors, patients=patients, domain=DOMAIN,
+            schedule_days=range(7), admin_password=ADMIN_PASSWORD
+        )
+        admin = seeded.admin
+        patient_ids = [patient.id for patient in seeded.patients]
+        profile_ids = [profile.id for profile in seeded.doctors]
+
+        # Appointments spread over the past and next 180 days, a few per slot grid
+        statuses = list(AppointmentStatus)
+        today = datetime.now().replace(hour=9, minute=0, second=0, microsecond=0)
+        rows = []
+        for _ in range(appointments):
+            appointment_date = today + timedelta(days=random.randint(-180, 180), minutes=35 * random.randint(0, 7))
+            rows.append({
+                "patient_id": random.choice(patient_ids),
+                "doctor_profile_id": random.choice(profile_ids),
+                "appointment_date": appointment_date,
+                "duration_minutes": 30,
+                "end_at": appointment_date + timedelta(minutes=30),
+                "status": random.choice(statuses),
+                "created_by_user_id": admin.id,
+            })
+        db.bulk_insert_mappings(Appointment, rows)
+        # One future scheduled appointment of the first patient for the detail/reschedule/confirm calls,
+        # whatever the random ones above turned out to be
+        booked = Appointment(
+            patient_id=patient_ids[0], doctor_profile_id=profile_ids[0],
+            appointment_date=today + timedelta(days=7), duration_minutes=30,
+            status=AppointmentStatus.SCHEDULED, created_by_user_id=admin.id
+        )
+        db.add(booked)
+        db.flush()
+        booked_id = booked.id
+
+        history = [
+            {"appointment_id": appointment_id, "changed_by_user_id": admin.id, "field_name": "status",
+             "old_value": "scheduled", "new_value": "confirmed"}
+            for (appointment_id,) in db.query(Appointment.id).filter(Appointment.id % 3 == 0)
+        ]
+        db.bulk_insert_mappings(AppointmentHistory, history)
+        db.commit()
+        return admin.id, patient_ids, profile_ids, booked_id
+    finally:
+        db.close()
+
+
+def drop_declared_indexes(engine):
+    """Drop the Index() entries of the models' __table_args__ (column-level and unique indexes stay)"""
+    from app.models.models import Base
+    from sqlalchemy import Index
+
+    dropped = []
+    with engine.begin() as connection:
+        for mapper in Base.registry.mappers:
+            for item in getattr(mapper.class_, "__table_args__", ()) or ():
+                if isinstance(item, Index):
+                    item.drop(bind=connection)
+                    dropped.append(item.name)
+    return dropped
+
+
+def build_requests(session_factory, appointment_id):
+    """(label, user email, method, path, json body) for each endpoint, using the seeded appointment and its parties"""
+    from app.models.models import Appointment, DoctorProfile, User
+
+    db = session_factory()
+    try:
+        appointment = db.query(Appointment).filter(Appointment.id == appointment_id).one()
+        patient_email = db.query(User.email).filter(User.id == appointment.patient_id).scalar()
+        # The appointment's doctor, so the doctor-side calls are allowed
+        doctor = db.query(DoctorProfile).filter(DoctorProfile.id == appointment.doctor_profile_id).one()
+        doctor_email = db.query(User.email).filter(User.id == doctor.user_id).scalar()
+    finally:
+        db.close()
+
+    admin = f"admin@{DOMAIN}"
+    tomorrow = (datetime.now() + timedelta(days=1)).date()
+    # A slot past the seeded range, always free
+    free_slot = datetime.combine(tomorrow + timedelta(days=200), datetime.min.time()).replace(hour=9)
+    specialty = doctor.especialidad.value
+    return [
+        ("login", None, "POST", "/login", {"email": admin, "password": ADMIN_PASSWORD}),
+        ("doctor directory", None, "GET", "/doctors", None),
+        ("doctor directory by specialty", None, "GET", f"/doctors?especialidad={specialty}", None),
+        ("doctor detail", None, "GET", f"/doctors/{doctor.user_id}", None),
+        ("doctor weekly template", None, "GET", f"/doctor-availability/{doctor.id}", None),
+        ("day availability", None, "POST", "/appointments/availability",
+         {"doctor_profile_id": doctor.id, "date": tomorrow.isoformat()}),
+        ("availability range by specialty", None, "GET",
+         f"/appointments/availability/range?especialidad={specialty}"
+         f"&date_from={tomorrow}&date_to={tomorrow + timedelta(days=6)}", None),
+        ("next available by specialty", None, "GET", f"/appointments/availability/next?especialidad={specialty}", None),
+        ("conflict check", patient_email, "GET",
+         f"/appointments/conflicts/{doctor.id}?appointment_date={free_slot.isoformat()}", None),
+        ("book appointment", patient_email, "POST", "/appointments",
+         {"doctor_profile_id": doctor.id, "appointment_date": free_slot.isoformat(), "duration_minutes": 30}),
+        ("patient appointments", patient_email, "GET", "/appointments", None),
+        ("patient appointments by status", patient_email, "GET", "/appointments?status_filter=scheduled", None),
+        ("patient appointments, next page", patient_email, "GET", "/appointments?limit=5", "next_cursor"),
+        ("doctor appointments", doctor_email, "GET", "/appointments?expand=patient", None),
+        ("appointment detail", patient_email, "GET", f"/appointments/{appointment.id}", None),
+        ("appointment history", patient_email, "GET", f"/appointments/{appointment.id}/history", None),
+        ("reschedule appointment", patient_email, "PUT", f"/appointments/{appointment.id}",
+         {"appointment_date": (free_slot + timedelta(hours=2)).isoformat()}),
+        ("confirm appointment", doctor_email, "POST", f"/appointments/{appointment.id}/confirm", None),
+        ("admin appointments", admin, "GET", "/admin/appointments", None),
+        ("admin appointments by doctor", admin, "GET", f"/admin/appointments?doctor_id={doctor.user_id}", None),
+        ("admin appointments by status", admin, "GET", "/admin/appointments?status_filter=completed", None),
+        ("admin users", admin, "GET", "/admin/users", None),
+        ("admin doctors", admin, "GET", "/admin/doctors", None),
+        ("backoffice stats", admin, "GET", "/admin/backoffice?include=status,specialty,day", None),
+    ]
+
+
+def classify_sqlite(statement, plan):
+    """Return (flags, notes) from EXPLAIN QUERY PLAN rows (id, parent, notused, detail)"""
+    flags, notes = [], []
+    has_limit = re.search(r"\bLIMIT\b", statement) is not None
+    sorts = [detail for *_, detail in plan if detail.startswith("USE TEMP B-TREE")]
+    for *_, detail in plan:
+        full_scan = re.match(r"SCAN (\w+)(?: AS \w+)?$", detail)
+        if full_scan and full_scan.group(1) != "CONSTANT":
+            if has_limit and not sorts:
+                notes.append(f"scan of {full_scan.group(1)} stops at LIMIT")
+            else:
+                flags.append(f"FULL SCAN {full_scan.group(1)}")
+        elif re.match(r"SCAN \w+ .*USING (COVERING )?INDEX", detail) and not has_limit:
+            notes.append(f"full index scan: {detail}")
+    flags += [f"SORT ({detail[len('USE TEMP B-TREE FOR '):]})" for detail in sorts]
+    return flags, notes
+
+
+def classify_mysql(statement, plan):
+    """Return (flags, notes) from MySQL EXPLAIN rows"""
+    flags, notes = [], []
+    for row in plan:
+        table, access, extra = row.get("table"), row.get("type"), row.get("Extra") or ""
+        if access == "ALL":
+            flags.append(f"FULL SCAN {table}")
+        elif access == "index":
+            notes.append(f"full index scan of {table} ({row.get('key')})")
+        if "Using filesort" in extra or "Using temporary" in extra:
+            flags.append(f"SORT {table} ({extra})")
+    return flags, notes
+
+
+def explain(engine, statement, parameters):
+    with engine.connect() as connection:
+        if engine.dialect.name == "sqlite":
+            plan = connection.exec_driver_sql("EXPLAIN QUERY PLAN " + statement, parameters).all()
+            return [tuple(row)[-1] for row in plan], classify_sqlite(statement, plan)
+        plan = [dict(row._mapping) for row in connection.exec_driver_sql("EXPLAIN " + statement, parameters)]
+        summary = [f"{row.get('table')}: type={row.get('type')} key={row.get('key')} {row.get('Extra') or ''}"
+                   for row in plan]
+        return summary, classify_mysql(statement, plan)
+
+
+def short_sql(statement):
+    statement = " ".join(statement.split())
+    statement = re.sub(r"^SELECT .*? FROM ", "SELECT ... FROM ", statement)
+    return statement if len(statement) <= 140 else statement[:137] + "..."
+
+
+def main():
+    args = parse_args()
+    random.seed(args.seed)
+    os.environ["DATABASE_URL"] = args.database_url or (
+        f"sqlite:///{os.path.join(tempfile.mkdtemp(prefix='hospital-advisor-'), 'advisor.db')}"
+    )
+
+    from fastapi.testclient import TestClient
+    from sqlalchemy import event, text
+
+    from app.api.main import app
+    from app.core import database
+    from app.core.auth import create_access_token, token_claims_cache, user_cache
+    from app.models.models import Base
+    from app.utils.directory import directory_cache
+    from app.utils.scheduling import day_slots_cache
+    from app.utils.stats import stats_cache
+
+    engine = database.engine
+    Base.metadata.create_all(bind=engine)
+    _, _, _, appointment_id = seed_database(database.SessionLocal, args.doctors, args.patients, args.appointments)
+    if args.without_indexes:
+        print(f"Dropped: {', '.join(drop_declared_indexes(engine))}")
+    if engine.dialect.name == "sqlite":
+        with engine.begin() as connection:
+            connection.execute(text("ANALYZE"))
+
+    captured = None
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def capture(connection, cursor, statement, parameters, context, executemany):
+        if captured is not None and statement.lstrip().upper().startswith("SELECT"):
+            captured.append((statement, parameters))
+
+    client = TestClient(app)
+    requests = build_requests(database.SessionLocal, appointment_id)
+    total_queries = flagged_queries = 0
+    for label, email, method, path, body in requests:
+        headers = {"Authorization": f"Bearer {create_access_token({'sub': email})}"} if email else {}
+        if body == "next_cursor":
+            # Fetch the first page untracked, then follow its cursor
+            first_page = client.request(method, path, headers=headers).json()
+            path, body = f"{path}&cursor={first_page['next_cursor']}", None
+        for cache in (user_cache, token_claims_cache, day_slots_cache, stats_cache, directory_cache):
+            cache.clear()
+
+        captured = []
+        response = client.request(method, path, headers=headers, json=body)
+        statements, captured = captured, None
+
+        print(f"\n{method} {path}  [{label}] -> {response.status_code}")
+        seen = set()
+        for statement, parameters in statements:
+            if statement in seen:
+                continue
+            seen.add(statement)
+            plan, (flags, notes) = explain(engine, statement, parameters)
+            total_queries += 1
+            flagged_queries += bool(flags)
+            print(f"  {'!! ' + ', '.join(flags) if flags else 'ok'}")
+            print(f"     {statement.strip() if args.verbose else short_sql(statement)}")
+            for line in plan:
+                print(f"       {line}")
+            for note in notes:
+                print(f"     note: {note}")
+
+    print(f"\n{len(requests)} endpoints, {total_queries} distinct queries, {flagged_queries} flagged")
+    return 1 if args.strict and flagged_queries else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,195 @@
+"""
+Load test for the multi-worker server (app/server.py): throughput and latency per worker count.
+
+Seeds a throwaway SQLite database (doctors, one patient with appointments), then for
+each value of --workers starts `python -m app.server` and drives GET /doctors and the
+authenticated GET /appointments with --connections keep-alive connections spread over
+--client-processes load-generator processes for --duration seconds. Reports requests/s,
+p50/p99 latency and errors, plus the speedup over the first worker count.
+
+The load generator shares the machine with the server: with C cores, keep
+workers + client processes <= C or the numbers measure CPU contention, not scaling.
+Point --database-url at MySQL to include the real connection pool (SQLite serializes
+writers but these endpoints only read).
+
+Usage:
+    python -m app.scripts.load_test --workers 1,2,4 --duration 10
+    python -m app.scripts.load_test --workers 1,2 --connections 32 --client-processes 2 --no-gunicorn
+"""
+import argparse
+import asyncio
+import json
+import multiprocessing
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+ENDPOINTS = ("/doctors", "/appointments")
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Multi-worker load test")
+    parser.add_argument("--workers", default="1,2", help="Comma-separated worker counts to compare")
+    parser.add_argument("--duration", type=float, default=10.0, help="Seconds of load per endpoint")
+    parser.add_argument("--connections", type=int, default=16, help="Concurrent keep-alive connections in total")
+    parser.add_argument("--client-processes", type=int, default=1, help="Load generator processes")
+    parser.add_argument("--database-url", help="Use this (already migrated) database instead of a SQLite file")
+    parser.add_argument("--no-gunicorn", action="store_true", help="Run the server with uvicorn's process manager")
+    return parser.parse_args()
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def prepare_database(database_url):
+    """Create and seed the schema in a separate process; prints an access token for the patient"""
+    code = (
+        "import json\n"
+        "from datetime import datetime, timedelta\n"
+        "from app.core import database\n"
+        "from app.core.auth import create_access_token, principal_token_claims\n"
+        "from app.models.models import Base, Appointment\n"
+        "from app.scripts.seeding import seed_users_and_doctors\n"
+        "Base.metadata.create_all(bind=database.get_engine())\n"
+        "db = database.SessionLocal()\n"
+        "seeded = seed_users_and_doctors(db, doctors=50, domain='load.es')\n"
+        "patient, profiles = seeded.patients[0], seeded.doctors\n"
+        "start = datetime.now().replace(hour=9, minute=0, second=0, microsecond=0) + timedelta(days=1)\n"
+        "for i in range(40):\n"
+        "    db.add(Appointment(patient_id=patient.id, doctor_profile_id=profiles[i % len(profiles)].id,\n"
+        "        appointment_date=start + timedelta(days=i), duration_minutes=30, reason='Revision',\n"
+        "        created_by_user_id=patient.id))\n"
+        "db.commit()\n"
+        "print(json.dumps({'token': create_access_token(data=principal_token_claims(patient),\n"
+        "                                               expires_delta=timedelta(hours=2))}))\n"
+    )
+    output = subprocess.run(
+        [sys.executable, "-c", code], env=dict(os.environ, DATABASE_URL=database_url),
+        check=True, capture_output=True, text=True
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])["token"]
+
+
+def start_server(database_url, workers, port, no_gunicorn):
+    command = [sys.executable, "-m", "app.server", "--host", "127.0.0.1", "--port", str(port),
+               "--workers", str(workers)]
+    if no_gunicorn:
+        command.append("--no-gunicorn")
+    server = subprocess.Popen(
+        command, env=dict(os.environ, DATABASE_URL=database_url),
+        stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, start_new_session=True
+    )
+
+    import httpx
+    deadline = time.monotonic() + 30
+    while time.monotonic() < deadline:
+        try:
+            # Every worker has to be up, not just the first one to accept
+            with httpx.Client(base_url=f"http://127.0.0.1:{port}", timeout=5) as client:
+                if all(client.get("/doctors").status_code == 200 for _ in range(workers * 4)):
+                    return server
+        except httpx.TransportError:
+            pass
+        if server.poll() is not None:
+            raise RuntimeError("the server process exited")
+        time.sleep(0.1)
+    stop_server(server)
+    raise RuntimeError("the server did not start within 30s")
+
+
+def stop_server(server):
+    server.terminate()
+    try:
+        server.wait(timeout=35)
+    except subprocess.TimeoutExpired:
+        server.kill()
+        server.wait()
+
+
+async def drive(base_url, path, headers, connections, duration):
+    import httpx
+
+    latencies, errors = [], 0
+    deadline = time.perf_counter() + duration
+
+    async def connection_loop(client):
+        nonlocal errors
+        while time.perf_counter() < deadline:
+            start = time.perf_counter()
+            try:
+                response = await client.get(path)
+                if response.status_code == 200:
+                    latencies.append(time.perf_counter() - start)
+                else:
+                    errors += 1
+            except httpx.TransportError:
+                errors += 1
+
+    limits = httpx.Limits(max_connections=connections, max_keepalive_connections=connections)
+    async with httpx.AsyncClient(base_url=base_url, headers=headers, limits=limits, timeout=30) as client:
+        await asyncio.gather(*(connection_loop(client) for _ in range(connections)))
+    return latencies, errors
+
+
+def client_process(args):
+    base_url, path, headers, connections, duration = args
+    return asyncio.run(drive(base_url, path, headers, connections, duration))
+
+
+def measure(base_url, path, headers, args):
+    per_process = max(1, args.connections // args.client_processes)
+    jobs = [(base_url, path, headers, per_process, args.duration)] * args.client_processes
+    with multiprocessing.Pool(args.client_processes) as pool:
+        results = pool.map(client_process, jobs)
+
+    latencies = sorted(latency for result in results for latency in result[0])
+    errors = sum(result[1] for result in results)
+    if not latencies:
+        return {"rps": 0.0, "p50_ms": 0.0, "p99_ms": 0.0, "errors": errors}
+    return {
+        "rps": len(latencies) / args.duration,
+        "p50_ms": statistics.median(latencies) * 1000,
+        "p99_ms": latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))] * 1000,
+        "errors": errors,
+    }
+
+
+def main():
+    args = parse_args()
+    worker_counts = [int(value) for value in args.workers.split(",")]
+
+    database_url = args.database_url or (
+        f"sqlite:///{os.path.join(tempfile.mkdtemp(prefix='hospital-load-'), 'load.db')}"
+    )
+    token = prepare_database(database_url)
+    headers = {"/doctors": {}, "/appointments": {"Authorization": f"Bearer {token}"}}
+
+    print(f"{os.cpu_count()} CPUs visible, {args.connections} connections, "
+          f"{args.client_processes} client process(es), {args.duration:.0f}s per run")
+    print(f"{'workers':>7} {'endpoint':14} {'req/s':>9} {'p50 ms':>8} {'p99 ms':>8} {'errors':>7} {'speedup':>8}")
+
+    baseline = {}
+    for workers in worker_counts:
+        port = free_port()
+        server = start_server(database_url, workers, port, args.no_gunicorn)
+        try:
+            for path in ENDPOINTS:
+                result = measure(f"http://127.0.0.1:{port}", path, headers[path], args)
+                baseline.setdefault(path, result["rps"])
+                speedup = result["rps"] / baseline[path] if baseline[path] else 0.0
+                print(f"{workers:7d} {path:14} {result['rps']:9.1f} {result['p50_ms']:8.1f} "
+                      f"{result['p99_ms']:8.1f} {result['errors']:7d} {speedup:7.2f}x", flush=True)
+        finally:
+            stop_server(server)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
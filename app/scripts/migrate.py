@@ -0,0 +1,87 @@
+"""
+Apply and manage the database schema migrations (Alembic, app/migrations).
+
+The API no longer creates tables at startup: run `upgrade` once per deploy,
+before starting the workers. Databases created by the old startup
+create_all() are upgraded in place; objects that already exist are skipped.
+
+Usage:
+    python -m app.scripts.migrate upgrade              # to the latest revision
+    python -m app.scripts.migrate upgrade 0003
+    python -m app.scripts.migrate downgrade -1
+    python -m app.scripts.migrate current
+    python -m app.scripts.migrate history
+    python -m app.scripts.migrate check                # fails if the models have unmigrated changes
+    python -m app.scripts.migrate revision -m "add appointments.room"   # autogenerate from the models
+"""
+import argparse
+import os
+import sys
+
+from alembic import command
+from alembic.config import Config
+from alembic.script import ScriptDirectory
+from alembic.util import CommandError
+
+ALEMBIC_INI = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))), "alembic.ini")
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Database schema migrations")
+    parser.add_argument("--database-url", help="Migrate this database instead of the configured one")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    upgrade = subparsers.add_parser("upgrade", help="Upgrade to a revision (default: latest)")
+    upgrade.add_argument("revision", nargs="?", default="head")
+    downgrade = subparsers.add_parser("downgrade", help="Downgrade to a revision (e.g. -1 or 0003)")
+    downgrade.add_argument("revision")
+    stamp = subparsers.add_parser("stamp", help="Record a revision without running it")
+    stamp.add_argument("revision")
+    subparsers.add_parser("current", help="Show the database revision")
+    subparsers.add_parser("history", help="List the revisions")
+    subparsers.add_parser("check", help="Fail if the models differ from the migrated schema")
+    revision = subparsers.add_parser("revision", help="Autogenerate a revision from the model changes")
+    revision.add_argument("-m", "--message", required=True)
+    revision.add_argument("--empty", action="store_true", help="Do not autogenerate (data migrations)")
+    return parser.parse_args()
+
+
+def alembic_config(database_url=None):
+    config = Config(ALEMBIC_INI)
+    # Relative to alembic.ini, so the command works from any directory
+    config.set_main_option("script_location", os.path.join(os.path.dirname(ALEMBIC_INI), "app", "migrations"))
+    if database_url:
+        config.set_main_option("sqlalchemy.url", database_url.replace("%", "%%"))
+    return config
+
+
+def main():
+    args = parse_args()
+    config = alembic_config(args.database_url)
+
+    try:
+        if args.command == "upgrade":
+            command.upgrade(config, args.revision)
+        elif args.command == "downgrade":
+            command.downgrade(config, args.revision)
+        elif args.command == "stamp":
+            command.stamp(config, args.revision)
+        elif args.command == "current":
+            command.current(config, verbose=True)
+        elif args.command == "history":
+            command.history(config, indicate_current=True)
+        elif args.command == "check":
+            command.check(config)
+        elif args.command == "revision":
+            # Revisions are numbered 0001, 0002, ...
+            head = ScriptDirectory.from_config(config).get_current_head()
+            command.revision(config, message=args.message, autogenerate=not args.empty,
+                             rev_id=f"{int(head) + 1:04d}")
+    except CommandError as exc:
+        print(f"Error: {exc}", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
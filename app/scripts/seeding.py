@@ -0,0 +1,74 @@
+"""
+Users and doctors for the benchmark and diagnostic scripts (imported by them, not a CLI).
+
+seed_users_and_doctors() adds an admin, patients and doctors with their profiles (and
+optionally a weekly schedule) to the caller's session and flushes. The caller adds its
+own appointments and commits.
+"""
+from dataclasses import dataclass
+
+# Weekly schedule of every seeded doctor on the requested days
+SCHEDULE_START = "09:00"
+SCHEDULE_END = "14:00"
+
+
+@dataclass
+class SeededUsers:
+    admin: object
+    patients: list
+    doctors: list  # DoctorProfile rows; `.user` is the doctor's account
+
+
+def seed_users_and_doctors(db, doctors=0, patients=1, domain="bench.es", specialties=None,
+                           schedule_days=(), admin_password=None):
+    """
+    Add admin@<domain>, patient<i>@<domain> and doctor<i>@<domain> (with a DoctorProfile each).
+
+    specialties are assigned round-robin (default: every EspecialidadMedica). Each doctor gets a
+    DoctorAvailability row for every day_of_week in schedule_days (0 = Monday). Only the
+    admin has a usable password, and only if admin_password is given (hashing is slow).
+    """
+    from app.core.auth import get_password_hash
+    from app.models.models import User, DoctorProfile, DoctorAvailability, EspecialidadMedica
+
+    def add_user(dni, nombre, email, roles, hashed_password="-"):
+        user = User(
+            dni=dni, nombre=nombre, apellidos="Bench", email=email, telefono="600000000",
+            direccion="-", fecha_nacimiento="1980-01-01", hashed_password=hashed_password
+        )
+        user.set_roles(roles)
+        db.add(user)
+        return user
+
+    admin = add_user(
+        "00000000T", "Admin", f"admin@{domain}", ["admin"],
+        get_password_hash(admin_password) if admin_password else "-"
+    )
+    patient_users = [
+        add_user(f"2{i:07d}P", f"Paciente{i}", f"patient{i}@{domain}", ["patient"]) for i in range(patients)
+    ]
+    doctor_users = [
+        add_user(f"1{i:07d}D", f"Doctor{i}", f"doctor{i}@{domain}", ["patient", "doctor"]) for i in range(doctors)
+    ]
+    db.flush()
+
+    specialties = list(specialties or EspecialidadMedica)
+    profiles = []
+    for i, user in enumerate(doctor_users):
+        profile = DoctorProfile(
+            user_id=user.id, numero_colegiado=f"2800{i:05d}", colegio_medico="Madrid",
+            especialidad=specialties[i % len(specialties)], universidad="UCM", ano_graduacion=2000,
+            hospital_centro="Hospital", departamento_servicio="Consultas", created_by_admin=admin.id
+        )
+        db.add(profile)
+        profiles.append(profile)
+    db.flush()
+
+    for profile in profiles:
+        for day_of_week in schedule_days:
+            db.add(DoctorAvailability(
+                doctor_profile_id=profile.id, day_of_week=day_of_week,
+                start_time=SCHEDULE_START, end_time=SCHEDULE_END, slot_duration_minutes=30, buffer_minutes=5
+            ))
+    db.flush()
+    return SeededUsers(admin=admin, patients=patient_users, doctors=profiles)
@@ -0,0 +1,153 @@
+"""
+Stress test concurrent bookings and check the doctor's schedule never overlaps.
+
+Seeds a throwaway SQLite database (or uses DATABASE_URL when --database-url is
+given, e.g. a scratch MySQL schema). Worker threads then call
+create_appointment at the same moment with a small set of colliding slots.
+At the end an overlap self-join must return zero pairs.
+
+--no-lock replaces Appointment.lock_doctor_schedule with the previous plain
+lookup to show the race it closes.
+
+Usage:
+    python -m app.scripts.stress_booking --threads 16 --attempts 25
+    python -m app.scripts.stress_booking --no-lock
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime, timedelta
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Concurrent booking stress test")
+    parser.add_argument("--threads", type=int, default=16, help="Concurrent booking threads")
+    parser.add_argument("--attempts", type=int, default=25, help="Booking attempts per thread")
+    parser.add_argument("--doctors", type=int, default=2, help="Doctors to spread the bookings over")
+    parser.add_argument("--database-url", default=None, help="Use this database instead of a temporary SQLite file")
+    parser.add_argument("--no-lock", action="store_true", help="Disable the per-doctor schedule lock")
+    parser.add_argument("--seed", type=int, default=7)
+    return parser.parse_args()
+
+
+def seed_database(session_factory, doctors, patients):
+    from app.models.models import EspecialidadMedica
+    from app.scripts.seeding import seed_users_and_doctors
+
+    db = session_factory()
+    try:
+        seeded = seed_users_and_doctors(
+            db, doctors=doctors, patients=patients, domain="stress.es",
+            specialties=[EspecialidadMedica.MEDICINA_GENERAL]
+        )
+        patient_ids = [patient.id for patient in seeded.patients]
+        profile_ids = [profile.id for profile in seeded.doctors]
+        db.commit()
+        return patient_ids, profile_ids
+    finally:
+        db.close()
+
+
+def count_overlaps(session_factory):
+    """Pairs of active appointments of the same doctor whose intervals intersect"""
+    from sqlalchemy.orm import aliased
+    from sqlalchemy import func
+    from app.models.models import Appointment, ACTIVE_APPOINTMENT_STATUSES
+
+    first, second = aliased(Appointment), aliased(Appointment)
+    db = session_factory()
+    try:
+        return db.query(func.count()).select_from(first).join(
+            second,
+            (first.doctor_profile_id == second.doctor_profile_id) & (first.id < second.id)
+        ).filter(
+            first.status.in_(ACTIVE_APPOINTMENT_STATUSES),
+            second.status.in_(ACTIVE_APPOINTMENT_STATUSES),
+            first.appointment_date < second.end_at,
+            second.appointment_date < first.end_at
+        ).scalar()
+    finally:
+        db.close()
+
+
+def main():
+    args = parse_args()
+    random.seed(args.seed)
+    os.environ["DATABASE_URL"] = args.database_url or (
+        f"sqlite:///{os.path.join(tempfile.mkdtemp(prefix='hospital-stress-'), 'stress.db')}"
+    )
+
+    from fastapi import HTTPException
+    from app.api import main as api
+    from app.core import database
+    from app.core.auth import AuthenticatedUser
+    from app.models.models import Base, Appointment, DoctorProfile
+    from app.schemas.schemas import AppointmentCreate
+
+    Base.metadata.create_all(bind=database.engine)
+    patient_ids, profile_ids = seed_database(database.SessionLocal, args.doctors, args.threads)
+
+    if args.no_lock:
+        def unlocked_lookup(db_session, doctor_profile_id):
+            return db_session.query(DoctorProfile).filter(
+                DoctorProfile.id == doctor_profile_id,
+                DoctorProfile.is_active == True
+            ).first()
+        Appointment.lock_doctor_schedule = staticmethod(unlocked_lookup)
+
+    # Few slots with overlapping durations so most attempts collide
+    base = (datetime.now() + timedelta(days=10)).replace(hour=9, minute=0, second=0, microsecond=0)
+    slots = [base + timedelta(minutes=15 * n) for n in range(12)]
+
+    results = {"created": 0, "conflict": 0, "error": 0}
+    results_lock = threading.Lock()
+    barrier = threading.Barrier(args.threads)
+
+    def worker(patient_id):
+        principal = AuthenticatedUser(id=patient_id, email=f"{patient_id}@stress.es", roles=("patient",), is_active=True)
+        rng = random.Random(patient_id)
+        barrier.wait()
+        for _ in range(args.attempts):
+            appointment_data = AppointmentCreate(
+                doctor_profile_id=rng.choice(profile_ids),
+                appointment_date=rng.choice(slots),
+                duration_minutes=rng.choice([15, 30, 45]),
+            )
+            db = database.SessionLocal()
+            try:
+                api.create_appointment(appointment_data, db=db, current_user=principal)
+                outcome = "created"
+            except HTTPException:
+                outcome = "conflict"
+            except Exception as exc:
+                print(f"patient {patient_id}: {type(exc).__name__}: {exc}")
+                outcome = "error"
+            finally:
+                db.close()
+            with results_lock:
+                results[outcome] += 1
+
+    threads = [threading.Thread(target=worker, args=(patient_id,)) for patient_id in patient_ids]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+
+    overlaps = count_overlaps(database.SessionLocal)
+
+    print(f"Database:   {database.engine.url.render_as_string(hide_password=True)}")
+    print(f"Lock:       {'disabled' if args.no_lock else 'per-doctor schedule lock'}")
+    print(f"Attempts:   {args.threads} threads x {args.attempts} over {args.doctors} doctors in {elapsed:.2f}s")
+    print(f"Created:    {results['created']}  conflicts rejected: {results['conflict']}  errors: {results['error']}")
+    print(f"Overlapping pairs: {overlaps}")
+    return 0 if overlaps == 0 and results["error"] == 0 else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
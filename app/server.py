@@ -0,0 +1,164 @@
+"""
+Production server: N worker processes running the API with uvicorn's event loop.
+
+With gunicorn installed (Linux) the workers run under gunicorn's arbiter, which
+restarts crashed workers and reloads gracefully on SIGHUP: new workers start,
+old ones finish their in-flight requests (up to GRACEFUL_TIMEOUT) and exit.
+Without gunicorn it falls back to uvicorn's own process manager (no graceful reload).
+
+Each worker builds the app with create_app() and opens its own connection pool on
+first use, so the database sees up to workers x (DB_POOL_SIZE + DB_MAX_OVERFLOW) connections.
+
+Settings (environment, command-line flags override them):
+    HOST, PORT                     bind address (0.0.0.0:8001)
+    WEB_CONCURRENCY                worker processes (default: CPUs available to this process)
+    KEEPALIVE_SECONDS              idle keep-alive per connection (5); raise it behind a load balancer
+    BACKLOG                        pending connections the listen socket queues (2048)
+    LIMIT_CONCURRENCY              per-worker open connections/tasks before answering 503 (unset = no limit)
+    WORKER_TIMEOUT                 seconds before a silent worker is killed and replaced (60)
+    GRACEFUL_TIMEOUT               seconds workers get to finish requests on reload/stop (30)
+    MAX_REQUESTS, MAX_REQUESTS_JITTER   recycle workers after this many requests (0 = never)
+    PRELOAD_APP                    import the app once in the master before forking (false); faster
+                                   worker spawn and shared memory, but SIGHUP then keeps the old code
+
+Usage:
+    python -m app.server
+    python -m app.server --workers 4 --port 8001
+    kill -HUP <master pid>         # graceful reload (gunicorn)
+    kill -TERM <master pid>        # graceful stop
+"""
+import argparse
+import importlib.util
+import math
+import os
+import sys
+
+from dotenv import load_dotenv
+
+try:
+    from uvicorn.workers import UvicornWorker
+except ImportError:  # gunicorn is not installed (e.g. Windows)
+    UvicornWorker = None
+
+load_dotenv()
+
+APP_FACTORY = "app.api.main:create_app"
+
+HOST = os.getenv('HOST', '0.0.0.0')
+PORT = int(os.getenv('PORT', '8001'))
+KEEPALIVE_SECONDS = int(os.getenv('KEEPALIVE_SECONDS', '5'))
+BACKLOG = int(os.getenv('BACKLOG', '2048'))
+LIMIT_CONCURRENCY = int(os.getenv('LIMIT_CONCURRENCY')) if os.getenv('LIMIT_CONCURRENCY') else None
+WORKER_TIMEOUT = int(os.getenv('WORKER_TIMEOUT', '60'))
+GRACEFUL_TIMEOUT = int(os.getenv('GRACEFUL_TIMEOUT', '30'))
+MAX_REQUESTS = int(os.getenv('MAX_REQUESTS', '0'))
+MAX_REQUESTS_JITTER = int(os.getenv('MAX_REQUESTS_JITTER', '0'))
+PRELOAD_APP = os.getenv('PRELOAD_APP', 'false').lower() == 'true'
+
+
+def available_cpus() -> int:
+    """CPUs this process may use: the affinity mask, capped by a cgroup v2 CPU quota (containers)"""
+    try:
+        cpus = len(os.sched_getaffinity(0))
+    except AttributeError:  # Not available on macOS/Windows
+        cpus = os.cpu_count() or 1
+
+    try:
+        with open("/sys/fs/cgroup/cpu.max") as handle:
+            quota, period = handle.read().split()
+        if quota != "max":
+            cpus = min(cpus, max(1, math.ceil(int(quota) / int(period))))
+    except (OSError, ValueError):
+        pass
+    return cpus
+
+
+def event_loop_settings():
+    """uvloop and httptools when installed (uvicorn[standard]), else the pure-Python versions"""
+    loop = "uvloop" if importlib.util.find_spec("uvloop") else "asyncio"
+    http = "httptools" if importlib.util.find_spec("httptools") else "h11"
+    return loop, http
+
+
+if UvicornWorker is not None:
+    class HospitalUvicornWorker(UvicornWorker):
+        # Passed to uvicorn.Config in each worker; filled in by run_gunicorn()
+        CONFIG_KWARGS = {}
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Run the API with several worker processes")
+    parser.add_argument("--host", default=HOST)
+    parser.add_argument("--port", type=int, default=PORT)
+    parser.add_argument("--workers", type=int, default=int(os.getenv('WEB_CONCURRENCY', '0')) or available_cpus())
+    parser.add_argument("--keepalive", type=int, default=KEEPALIVE_SECONDS)
+    parser.add_argument("--backlog", type=int, default=BACKLOG)
+    parser.add_argument("--limit-concurrency", type=int, default=LIMIT_CONCURRENCY)
+    parser.add_argument("--no-gunicorn", action="store_true", help="Use uvicorn's process manager even if gunicorn is installed")
+    return parser.parse_args()
+
+
+def run_gunicorn(args, loop, http):
+    from gunicorn.app.base import BaseApplication
+
+    # Workers are forked from this process, so they see these settings
+    HospitalUvicornWorker.CONFIG_KWARGS = {"loop": loop, "http": http, "limit_concurrency": args.limit_concurrency}
+
+    class HospitalApplication(BaseApplication):
+        def load_config(self):
+            options = {
+                "bind": f"{args.host}:{args.port}",
+                "workers": args.workers,
+                # gunicorn imports the worker class by path
+                "worker_class": f"{__name__}.HospitalUvicornWorker",
+                "keepalive": args.keepalive,
+                "backlog": args.backlog,
+                "timeout": WORKER_TIMEOUT,
+                "graceful_timeout": GRACEFUL_TIMEOUT,
+                "max_requests": MAX_REQUESTS,
+                "max_requests_jitter": MAX_REQUESTS_JITTER,
+                "preload_app": PRELOAD_APP,
+            }
+            for key, value in options.items():
+                self.cfg.set(key, value)
+
+        def load(self):
+            from app.api.main import create_app
+            return create_app()
+
+    HospitalApplication().run()
+
+
+def run_uvicorn(args, loop, http):
+    import uvicorn
+
+    uvicorn.run(
+        APP_FACTORY, factory=True, host=args.host, port=args.port, workers=args.workers,
+        loop=loop, http=http, timeout_keep_alive=args.keepalive, backlog=args.backlog,
+        limit_concurrency=args.limit_concurrency, limit_max_requests=MAX_REQUESTS or None,
+    )
+
+
+def main():
+    args = parse_args()
+    loop, http = event_loop_settings()
+    use_gunicorn = not args.no_gunicorn and UvicornWorker is not None
+
+    from app.core.database import DB_POOL_SIZE, DB_MAX_OVERFLOW
+    print(
+        f"Starting {args.workers} {'gunicorn' if use_gunicorn else 'uvicorn'} workers on {args.host}:{args.port} "
+        f"(loop={loop}, http={http}, keepalive={args.keepalive}s, backlog={args.backlog}, "
+        f"limit_concurrency={args.limit_concurrency or 'none'}); up to "
+        f"{args.workers * (DB_POOL_SIZE + DB_MAX_OVERFLOW)} database connections",
+        flush=True
+    )
+
+    if use_gunicorn:
+        run_gunicorn(args, loop, http)
+    else:
+        run_uvicorn(args, loop, http)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,83 @@
+from collections import OrderedDict
+from itertools import chain
+import threading
+import time
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+
+class TTLCache:
+    """Small thread-safe in-process LRU cache whose entries expire after `ttl` seconds"""
+
+    def __init__(self, maxsize: int = 1024, ttl: float = 60.0):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data = OrderedDict()  # key -> (expires_at, value)
+        self._lock = threading.Lock()
+
+    def get(self, key, default=None):
+        """Return the cached value or `default` when missing/expired"""
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return default
+            expires_at, value = entry
+            if expires_at <= time.monotonic():
+                del self._data[key]
+                return default
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key, value, ttl: float = None):
+        """Store a value; `ttl` overrides the cache default for this entry"""
+        expires_at = time.monotonic() + (self.ttl if ttl is None else ttl)
+        with self._lock:
+            self._data[key] = (expires_at, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def pop(self, key, default=None):
+        """Remove a key (explicit invalidation)"""
+        with self._lock:
+            entry = self._data.pop(key, None)
+        return default if entry is None else entry[1]
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self):
+        with self._lock:
+            return len(self._data)
+
+
+def on_commit_of(models, callback, key=None):
+    """
+    Call `callback()` after every commit that flushed a change to an instance of `models`.
+
+    With `key`, the callback gets the set of `key(obj)` of the changed instances instead.
+    Nothing is called if the transaction rolls back. Used to invalidate the per-worker caches.
+    """
+    slot = object()  # this registration's entry in session.info
+
+    @event.listens_for(Session, "after_flush")
+    def _collect_changes(session, flush_context):
+        for obj in chain(session.new, session.dirty, session.deleted):
+            if not isinstance(obj, models):
+                continue
+            if key is None:
+                session.info[slot] = True
+                return
+            session.info.setdefault(slot, set()).add(key(obj))
+
+    @event.listens_for(Session, "after_commit")
+    def _run_callback(session):
+        changed = session.info.pop(slot, None)
+        if changed:
+            callback() if key is None else callback(changed)
+
+    @event.listens_for(Session, "after_rollback")
+    def _discard_changes(session):
+        session.info.pop(slot, None)
@@ -0,0 +1,30 @@
+from starlette.datastructures import MutableHeaders
+from starlette.middleware.gzip import GZipMiddleware
+
+
+class CompressionMiddleware:
+    """
+    GZipMiddleware that marks every HTTP response `Vary: Accept-Encoding`.
+
+    GZipMiddleware only adds the header to the responses it compresses. The ones it leaves
+    alone (client without gzip, body under minimum_size, 304s) need it just as much, or a
+    shared cache could hand gzip bytes to a client that cannot read them.
+    """
+
+    def __init__(self, app, minimum_size: int = 500, compresslevel: int = 9):
+        self.app = GZipMiddleware(app, minimum_size=minimum_size, compresslevel=compresslevel)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                headers = MutableHeaders(scope=message)
+                vary = {value.strip().lower() for value in headers.get("vary", "").split(",")}
+                if "accept-encoding" not in vary:
+                    headers.add_vary_header("Accept-Encoding")
+            await send(message)
+
+        await self.app(scope, receive, send_wrapper)
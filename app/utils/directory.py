@@ -0,0 +1,54 @@
+import hashlib
+import os
+
+from fastapi import Request, Response
+from pydantic import TypeAdapter
+from sqlalchemy.orm import Session
+
+from app.schemas.schemas import DoctorResponse
+from app.utils.cache import TTLCache
+from app.utils.etag import DIRECTORY_RESOURCE, etag_matches, get_resource_versions, weak_etag
+
+# Entries are keyed by the directory's resource version, which every write to users, roles or
+# profiles bumps in its own transaction, so all workers see a change at once; the TTL only
+# bounds how long unused pages stay in memory
+DIRECTORY_CACHE_TTL_SECONDS = float(os.getenv('DIRECTORY_CACHE_TTL_SECONDS', '300'))
+DIRECTORY_CACHE_MAX_SIZE = int(os.getenv('DIRECTORY_CACHE_MAX_SIZE', '2048'))
+# How long browsers and the Django frontend may reuse a response before revalidating with its ETag
+DIRECTORY_MAX_AGE_SECONDS = int(os.getenv('DIRECTORY_MAX_AGE_SECONDS', '60'))
+
+directory_cache = TTLCache(maxsize=DIRECTORY_CACHE_MAX_SIZE, ttl=DIRECTORY_CACHE_TTL_SECONDS)
+
+_doctor_list_adapter = TypeAdapter(list[DoctorResponse])
+_doctor_adapter = TypeAdapter(DoctorResponse)
+
+
+def serialize_doctors(doctors):
+    """JSON body of a list of DoctorResponse, as the response_model would render it"""
+    return _doctor_list_adapter.dump_json(doctors)
+
+
+def serialize_doctor(doctor):
+    return _doctor_adapter.dump_json(doctor)
+
+
+def cached_directory_response(request: Request, db: Session, key, build):
+    """
+    Serve a directory page from the cache, building it with `build()` (JSON bytes) on a miss.
+
+    The ETag is a hash of the body, so every worker produces the same tag for the
+    same content; a matching If-None-Match gets an empty 304.
+    """
+    # Read before building so a concurrent commit cannot be cached as current
+    version, = get_resource_versions(db, DIRECTORY_RESOURCE)
+    entry = directory_cache.get((key, version))
+    if entry is None:
+        body = build()
+        entry = (body, weak_etag(hashlib.sha1(body).hexdigest()))
+        directory_cache.set((key, version), entry)
+    body, etag = entry
+
+    headers = {"ETag": etag, "Cache-Control": f"public, max-age={DIRECTORY_MAX_AGE_SECONDS}"}
+    if etag_matches(request, etag):
+        return Response(status_code=304, headers=headers)
+    return Response(content=body, media_type="application/json", headers=headers)
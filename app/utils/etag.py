@@ -0,0 +1,225 @@
+import hashlib
+import os
+
+from fastapi import Request, Response
+from sqlalchemy import event, inspect, select, update, insert
+from sqlalchemy.dialects.mysql import insert as mysql_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.orm import Session
+from starlette.datastructures import Headers, MutableHeaders
+
+from app.models.models import (
+    Appointment, AppointmentHistory, DoctorAvailability, DoctorProfile, ResourceVersion, User, UserRoleAssignment
+)
+
+# Bodies above this size are streamed through without an ETag instead of being buffered
+ETAG_MAX_BODY_BYTES = int(os.getenv('ETAG_MAX_BODY_BYTES', str(1024 * 1024)))
+
+# Responses that depend on the caller: browsers keep them but revalidate every time
+PRIVATE_CACHE_CONTROL = "private, no-cache"
+
+# Headers a 304 must not carry (it has no body)
+_BODY_HEADERS = {b"content-length", b"content-type", b"content-encoding"}
+
+
+# RESOURCE VERSIONS
+# A row per resource whose version is bumped in the same transaction as the change, so the
+# counter is exact and shared by every worker (updated_at only has second precision and
+# doctor_availability has none).
+
+# Single key of the public doctor directory (/doctors, /doctors/{id}): any user, role or profile write
+DIRECTORY_RESOURCE = "directory"
+
+
+def principal_resource(user_id) -> str:
+    """Key bumped by every write to the user or its roles; tokens with embedded roles carry it"""
+    return f"principal:{user_id}"
+
+def _attribute_values(obj, attribute):
+    """Current and previous (if changed in this flush) values of an attribute"""
+    history = inspect(obj).attrs[attribute].history
+    return {value for value in (*history.added, *history.unchanged, *history.deleted) if value is not None}
+
+
+def changed_resources(obj):
+    """Resource keys whose representation changes when `obj` is written
+
+    Names shown by ?expand= and in the history come from users/doctor_profiles, which no
+    endpoint edits; an endpoint that starts editing them has to bump the affected keys
+    (today such writes only bump the directory).
+    """
+    if isinstance(obj, Appointment):
+        return (
+            {f"appointment:{obj.id}"}
+            | {f"appointments:patient:{value}" for value in _attribute_values(obj, "patient_id")}
+            | {f"appointments:doctor:{value}" for value in _attribute_values(obj, "doctor_profile_id")}
+        )
+    if isinstance(obj, AppointmentHistory):
+        return {f"appointment:{obj.appointment_id}"}
+    if isinstance(obj, DoctorAvailability):
+        return {f"availability:{value}" for value in _attribute_values(obj, "doctor_profile_id")}
+    if isinstance(obj, User):
+        return {DIRECTORY_RESOURCE, principal_resource(obj.id)}
+    if isinstance(obj, UserRoleAssignment):
+        return {DIRECTORY_RESOURCE} | {principal_resource(value) for value in _attribute_values(obj, "user_id")}
+    if isinstance(obj, DoctorProfile):
+        return {DIRECTORY_RESOURCE}
+    return set()
+
+
+def bump_resource_versions(connection, resources):
+    """Increment the counters (creating missing rows) inside the caller's transaction"""
+    table = ResourceVersion.__table__
+    # Always the same order, so two transactions cannot lock the rows crosswise
+    for resource in sorted(resources):
+        if connection.dialect.name == "mysql":
+            statement = mysql_insert(table).values(resource=resource, version=1)
+            connection.execute(statement.on_duplicate_key_update(version=table.c.version + 1))
+        elif connection.dialect.name == "sqlite":
+            statement = sqlite_insert(table).values(resource=resource, version=1)
+            connection.execute(statement.on_conflict_do_update(
+                index_elements=[table.c.resource], set_={"version": table.c.version + 1}
+            ))
+        else:
+            result = connection.execute(
+                update(table).where(table.c.resource == resource).values(version=table.c.version + 1)
+            )
+            if result.rowcount == 0:
+                connection.execute(insert(table).values(resource=resource, version=1))
+
+
+@event.listens_for(Session, "after_flush")
+def _bump_changed_resources(session, flush_context):
+    resources = set()
+    for obj in list(session.new) + list(session.dirty) + list(session.deleted):
+        resources |= changed_resources(obj)
+    if resources:
+        bump_resource_versions(session.connection(), resources)
+
+
+def get_resource_versions(db: Session, *resources):
+    """Current version of each resource (0 if never written), in the given order"""
+    table = ResourceVersion.__table__
+    rows = dict(db.execute(
+        select(table.c.resource, table.c.version).where(table.c.resource.in_(resources))
+    ).all())
+    return tuple(rows.get(resource, 0) for resource in resources)
+
+
+# CONDITIONAL REQUESTS
+# Every ETag is weak: GZipMiddleware sits outside and compresses the body after the tag is set,
+# so one tag covers both the identity and the gzip encoding, which are equivalent but not
+# byte-identical. Comparisons are weak anyway (If-None-Match on GET).
+
+def weak_etag(digest: str) -> str:
+    return f'W/"{digest}"'
+
+
+def etag_matches(request: Request, etag: str) -> bool:
+    """Whether the request's If-None-Match names this ETag (weak comparison, as for GET)"""
+    if_none_match = request.headers.get("if-none-match")
+    if not if_none_match:
+        return False
+    tags = {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}
+    return "*" in tags or etag.removeprefix("W/") in tags
+
+
+def resource_etag(request: Request, *stamp) -> str:
+    """ETag from the resource versions (and whatever else the body depends on) plus the query string"""
+    return weak_etag(hashlib.sha1(repr((request.url.path, str(request.url.query), stamp)).encode()).hexdigest())
+
+
+def check_not_modified(request: Request, response: Response, etag: str, cache_control: str = PRIVATE_CACHE_CONTROL):
+    """
+    Return a 304 for the endpoint to send if the client has this version, before it loads anything;
+    otherwise set the validator headers on the eventual 200 and return None.
+    """
+    headers = {"ETag": etag, "Cache-Control": cache_control}
+    if etag_matches(request, etag):
+        return Response(status_code=304, headers=headers)
+    response.headers.update(headers)
+    return None
+
+
+class ETagMiddleware:
+    """
+    Content-hash ETags for GET JSON responses that have none, with 304 on a matching If-None-Match.
+
+    This saves the transfer only; endpoints that know a version stamp call check_not_modified()
+    and skip the queries and serialization as well. Responses that set their own ETag pass
+    through (turned into a 304 if the client already has it).
+    """
+
+    def __init__(self, app, max_body_size: int = ETAG_MAX_BODY_BYTES):
+        self.app = app
+        self.max_body_size = max_body_size
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["method"] != "GET":
+            await self.app(scope, receive, send)
+            return
+
+        if_none_match = Headers(scope=scope).get("if-none-match")
+        request_tags = (
+            {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")} if if_none_match else set()
+        )
+        start_message = None
+        body_parts = []
+        body_size = 0
+        mode = "buffer"  # "buffer" | "passthrough" | "not_modified"
+
+        async def send_not_modified(message, etag):
+            headers = [(name, value) for name, value in message["headers"] if name.lower() not in _BODY_HEADERS]
+            if not any(name.lower() == b"etag" for name, _ in headers):
+                headers.append((b"etag", etag.encode("latin-1")))
+            await send({"type": "http.response.start", "status": 304, "headers": headers})
+            await send({"type": "http.response.body", "body": b""})
+
+        async def send_wrapper(message):
+            nonlocal start_message, body_size, mode
+
+            if message["type"] == "http.response.start":
+                headers = Headers(raw=message["headers"])
+                if message["status"] != 200 or not headers.get("content-type", "").startswith("application/json"):
+                    mode = "passthrough"
+                    await send(message)
+                elif "etag" in headers:
+                    if request_tags & {headers["etag"].removeprefix("W/"), "*"}:
+                        mode = "not_modified"
+                        await send_not_modified(message, headers["etag"])
+                    else:
+                        mode = "passthrough"
+                        await send(message)
+                else:
+                    start_message = message
+                return
+
+            if mode == "passthrough":
+                await send(message)
+                return
+            if mode == "not_modified":
+                return  # the 304 has been sent, drop the body
+
+            body_parts.append(message.get("body", b""))
+            body_size += len(body_parts[-1])
+            more_body = message.get("more_body", False)
+
+            if body_size > self.max_body_size:
+                # Too large to hold: send what we have and stream the rest unchanged
+                mode = "passthrough"
+                await send(start_message)
+                await send({"type": "http.response.body", "body": b"".join(body_parts), "more_body": more_body})
+                return
+            if more_body:
+                return
+
+            body = b"".join(body_parts)
+            etag = weak_etag(hashlib.sha1(body).hexdigest())
+            if request_tags & {etag.removeprefix("W/"), "*"}:
+                await send_not_modified(start_message, etag)
+                return
+            MutableHeaders(scope=start_message)["ETag"] = etag
+            await send(start_message)
+            await send({"type": "http.response.body", "body": body})
+
+        await self.app(scope, receive, send_wrapper)
@@ -0,0 +1,113 @@
+import csv
+import io
+import os
+from datetime import date, datetime, time, timedelta
+from enum import Enum
+
+from pydantic_core import to_json
+from sqlalchemy import select
+from sqlalchemy.orm import aliased
+
+from app.core.database import SessionLocal
+from app.models.models import Appointment, DoctorProfile, User
+
+# Rows fetched from the server-side cursor (and written to the response) at a time
+EXPORT_BATCH_SIZE = int(os.getenv('EXPORT_BATCH_SIZE', '1000'))
+
+EXPORT_FORMATS = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv",  # Starlette appends "; charset=utf-8"
+}
+
+_patient = aliased(User, name="patient")
+_doctor = aliased(User, name="doctor")
+
+# Column name in the export -> expression
+EXPORT_COLUMNS = {
+    "id": Appointment.id,
+    "appointment_date": Appointment.appointment_date,
+    "duration_minutes": Appointment.duration_minutes,
+    "status": Appointment.status,
+    "appointment_type": Appointment.appointment_type,
+    "priority": Appointment.priority,
+    "patient_id": Appointment.patient_id,
+    "patient_dni": _patient.dni,
+    "patient_nombre": _patient.nombre,
+    "patient_apellidos": _patient.apellidos,
+    "doctor_profile_id": Appointment.doctor_profile_id,
+    "doctor_user_id": DoctorProfile.user_id,
+    "doctor_nombre": _doctor.nombre,
+    "doctor_apellidos": _doctor.apellidos,
+    "especialidad": DoctorProfile.especialidad,
+    "reason": Appointment.reason,
+    "notes": Appointment.notes,
+    "created_at": Appointment.created_at,
+    "cancelled_at": Appointment.cancelled_at,
+    "cancellation_reason": Appointment.cancellation_reason,
+}
+
+
+def appointment_export_query(date_from: date = None, date_to: date = None, doctor_profile_id: int = None, status=None):
+    """
+    Plain columns (no ORM objects to track) of the matching appointments in (appointment_date, id) order.
+
+    date_to is inclusive. The filters line up with ix_appointments_date, ix_appointments_doctor_date
+    and ix_appointments_status_date.
+    """
+    statement = (
+        select(*EXPORT_COLUMNS.values())
+        .join(_patient, Appointment.patient_id == _patient.id)
+        .join(DoctorProfile, Appointment.doctor_profile_id == DoctorProfile.id)
+        .join(_doctor, DoctorProfile.user_id == _doctor.id)
+        .order_by(Appointment.appointment_date, Appointment.id)
+    )
+    if date_from:
+        statement = statement.where(Appointment.appointment_date >= datetime.combine(date_from, time.min))
+    if date_to:
+        statement = statement.where(Appointment.appointment_date < datetime.combine(date_to + timedelta(days=1), time.min))
+    if doctor_profile_id:
+        statement = statement.where(Appointment.doctor_profile_id == doctor_profile_id)
+    if status:
+        statement = statement.where(Appointment.status == status)
+    return statement
+
+
+def _csv_value(value):
+    if value is None:
+        return ""
+    if isinstance(value, Enum):
+        return value.value
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    return value
+
+
+def _ndjson_batch(names, rows):
+    return b"".join(to_json(dict(zip(names, row))) + b"\n" for row in rows)
+
+
+def _csv_batch(rows):
+    buffer = io.StringIO()
+    csv.writer(buffer).writerows([_csv_value(value) for value in row] for row in rows)
+    return buffer.getvalue().encode("utf-8")
+
+
+def stream_appointment_export(statement, export_format: str, batch_size: int = EXPORT_BATCH_SIZE):
+    """
+    Yield the export body a batch of rows at a time (StreamingResponse runs this in a worker thread).
+
+    The rows come from a server-side cursor (yield_per), so memory stays at one batch whatever
+    the size of the export. The generator opens its own session: it keeps reading after the
+    endpoint has returned, and holds that connection until the last row is sent.
+    """
+    names = list(EXPORT_COLUMNS)
+    if export_format == "csv":
+        yield _csv_batch([names])
+
+    db = SessionLocal()
+    try:
+        result = db.execute(statement.execution_options(yield_per=batch_size))
+        for rows in result.partitions():
+            yield _csv_batch(rows) if export_format == "csv" else _ndjson_batch(names, rows)
+    finally:
+        db.close()
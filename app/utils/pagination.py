@@ -0,0 +1,82 @@
+import base64
+import binascii
+from datetime import datetime
+import json
+
+from fastapi import HTTPException
+from sqlalchemy import DateTime, and_, or_
+
+
+def encode_cursor(values, direction: str) -> str:
+    """Opaque cursor for the sort key `values`; direction is "next" or "prev" """
+    payload = {
+        "k": [value.isoformat() if isinstance(value, datetime) else value for value in values],
+        "d": direction,
+    }
+    return base64.urlsafe_b64encode(json.dumps(payload, separators=(",", ":")).encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, order_columns):
+    """Return (values, direction) with values converted back to the column types"""
+    try:
+        payload = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+        raw_values, direction = payload["k"], payload["d"]
+        if direction not in ("next", "prev") or len(raw_values) != len(order_columns):
+            raise ValueError(direction)
+        values = [
+            datetime.fromisoformat(value) if isinstance(column.type, DateTime) else value
+            for column, value in zip(order_columns, raw_values)
+        ]
+    except (ValueError, KeyError, TypeError, binascii.Error):
+        raise HTTPException(status_code=400, detail="Cursor no válido")
+    return values, direction
+
+
+def _after(order_columns, values, descending):
+    """Rows strictly after `values` in the sort order, as an index-friendly OR of prefixes"""
+    clauses = []
+    for position, column in enumerate(order_columns):
+        equal_prefix = [order_columns[i] == values[i] for i in range(position)]
+        beyond = column < values[position] if descending else column > values[position]
+        clauses.append(and_(*equal_prefix, beyond))
+    return or_(*clauses)
+
+
+def paginate_keyset(query, order_columns, limit: int, cursor: str = None, descending: bool = False, skip: int = 0):
+    """Fetch one page ordered by `order_columns` (last one unique, usually the id).
+
+    Without a cursor the page starts at `skip` (offset mode). Returns (rows, next_cursor, prev_cursor);
+    cursors are None when there is nothing further in that direction.
+    """
+    if limit < 1:
+        raise HTTPException(status_code=400, detail="limit debe ser al menos 1")
+
+    def sort_key(row):
+        return [getattr(row, column.key) for column in order_columns]
+
+    def ordering(reverse):
+        return [column.desc() if descending != reverse else column.asc() for column in order_columns]
+
+    if cursor is None:
+        rows = query.order_by(*ordering(False)).offset(skip).limit(limit + 1).all()
+        has_more = len(rows) > limit
+        rows = rows[:limit]
+        next_cursor = encode_cursor(sort_key(rows[-1]), "next") if has_more else None
+        prev_cursor = encode_cursor(sort_key(rows[0]), "prev") if skip > 0 and rows else None
+        return rows, next_cursor, prev_cursor
+
+    values, direction = decode_cursor(cursor, order_columns)
+    if direction == "next":
+        rows = query.filter(_after(order_columns, values, descending)).order_by(*ordering(False)).limit(limit + 1).all()
+        has_more = len(rows) > limit
+        rows = rows[:limit]
+        next_cursor = encode_cursor(sort_key(rows[-1]), "next") if has_more else None
+        prev_cursor = encode_cursor(sort_key(rows[0]), "prev") if rows else None
+    else:
+        # Walk backwards from the cursor, then restore the normal order
+        rows = query.filter(_after(order_columns, values, not descending)).order_by(*ordering(True)).limit(limit + 1).all()
+        has_more = len(rows) > limit
+        rows = rows[:limit][::-1]
+        prev_cursor = encode_cursor(sort_key(rows[0]), "prev") if has_more else None
+        next_cursor = encode_cursor(sort_key(rows[-1]), "next") if rows else None
+    return rows, next_cursor, prev_cursor
@@ -0,0 +1,228 @@
+from bisect import bisect_right
+from collections import defaultdict
+from dataclasses import dataclass
+from datetime import date, datetime, timedelta
+import heapq
+import os
+import threading
+
+from sqlalchemy.orm import Session
+
+from app.models.models import (
+    Appointment, DoctorAvailability, DoctorProfile,
+    ACTIVE_APPOINTMENT_STATUSES, MAX_APPOINTMENT_DURATION_MINUTES
+)
+from app.utils.cache import TTLCache, on_commit_of
+
+# Day grids are also keyed by the doctor's schedule version; the TTL bounds staleness across workers
+SCHEDULE_CACHE_TTL_SECONDS = float(os.getenv('SCHEDULE_CACHE_TTL_SECONDS', '60'))
+# Room for a few hundred doctors over the 60-90 day search horizon (entries are a few hundred bytes)
+SCHEDULE_CACHE_MAX_SIZE = int(os.getenv('SCHEDULE_CACHE_MAX_SIZE', '32768'))
+
+# Bookings must be made at least this far ahead
+MIN_BOOKING_NOTICE = timedelta(hours=2)
+
+# Days loaded per step of the next-available search; it stops as soon as enough slots are found
+SEARCH_CHUNK_DAYS = 7
+
+# Models whose changes alter a doctor's free slots
+SCHEDULE_MODELS = (Appointment, DoctorAvailability, DoctorProfile)
+
+day_slots_cache = TTLCache(maxsize=SCHEDULE_CACHE_MAX_SIZE, ttl=SCHEDULE_CACHE_TTL_SECONDS)
+
+_schedule_versions = defaultdict(int)
+_versions_lock = threading.Lock()
+_MISSING = object()
+
+
+@dataclass(frozen=True)
+class DaySlots:
+    """Slot grid of one doctor on one day: slot i starts at first_slot + i * step_minutes"""
+    day: date
+    first_slot: datetime
+    step_minutes: int
+    slot_duration_minutes: int
+    bitmap: str  # one character per slot, "1" free / "0" taken
+
+    def slot_start(self, index):
+        return self.first_slot + timedelta(minutes=index * self.step_minutes)
+
+    def with_notice(self, not_before):
+        """Copy with the slots starting before `not_before` marked as taken"""
+        if self.first_slot >= not_before:
+            return self
+        blocked = 0
+        while blocked < len(self.bitmap) and self.slot_start(blocked) < not_before:
+            blocked += 1
+        return DaySlots(
+            self.day, self.first_slot, self.step_minutes, self.slot_duration_minutes,
+            "0" * blocked + self.bitmap[blocked:]
+        )
+
+    def free_slots(self):
+        """Yield the start of every free slot in order"""
+        index = self.bitmap.find("1")
+        while index != -1:
+            yield self.slot_start(index)
+            index = self.bitmap.find("1", index + 1)
+
+
+def get_schedule_version(doctor_profile_id):
+    return _schedule_versions.get(doctor_profile_id, 0)
+
+
+def bump_schedule_versions(doctor_profile_ids):
+    """Make the cached grids of these doctors unreachable (per worker)"""
+    with _versions_lock:
+        for doctor_profile_id in doctor_profile_ids:
+            _schedule_versions[doctor_profile_id] += 1
+
+
+def _schedule_owner(obj):
+    if isinstance(obj, DoctorProfile):
+        return obj.id
+    return obj.doctor_profile_id
+
+
+on_commit_of(SCHEDULE_MODELS, bump_schedule_versions, key=_schedule_owner)
+
+
+def parse_hhmm(value):
+    hour, minute = map(int, value.split(':'))
+    return hour * 60 + minute
+
+
+def merge_intervals(intervals):
+    """Sort (start, end) pairs and merge the overlapping ones into disjoint intervals"""
+    merged = []
+    for start, end in sorted(intervals):
+        if merged and start <= merged[-1][1]:
+            if end > merged[-1][1]:
+                merged[-1] = (merged[-1][0], end)
+        else:
+            merged.append((start, end))
+    return merged
+
+
+def build_day_slots(day, availability, busy):
+    """Mark each slot of the day's template free or taken with a single sweep over `busy`.
+
+    `busy` must be merged (sorted, disjoint). A slot is taken when it comes within
+    buffer_minutes of an appointment, the rule the booking screen always used.
+    """
+    day_start = datetime.combine(day, datetime.min.time())
+    first_slot = day_start + timedelta(minutes=parse_hhmm(availability.start_time))
+    day_end = day_start + timedelta(minutes=parse_hhmm(availability.end_time))
+    slot = timedelta(minutes=availability.slot_duration_minutes)
+    buffer = timedelta(minutes=availability.buffer_minutes)
+    step = slot + buffer
+
+    # Skip the intervals that end (plus buffer) before the first slot
+    position = bisect_right(busy, first_slot - buffer, key=lambda interval: interval[1])
+    bits = []
+    current = first_slot
+    while current + slot <= day_end:
+        while position < len(busy) and busy[position][1] + buffer <= current:
+            position += 1
+        taken = position < len(busy) and busy[position][0] < current + slot + buffer
+        bits.append("0" if taken else "1")
+        current += step
+
+    return DaySlots(day, first_slot, int(step.total_seconds() // 60), availability.slot_duration_minutes, "".join(bits))
+
+
+def load_day_slots(db: Session, doctor_profile_ids, days):
+    """Return {(doctor_profile_id, day): DaySlots or None} for every pair, using the cache.
+
+    Misses cost two queries in total (templates and appointments of all missed doctors),
+    whatever the number of doctors and days. Booking notice is not applied here.
+    """
+    result = {}
+    missing = defaultdict(list)
+    for doctor_profile_id in doctor_profile_ids:
+        version = get_schedule_version(doctor_profile_id)
+        for day in days:
+            cached = day_slots_cache.get((doctor_profile_id, day, version), _MISSING)
+            if cached is _MISSING:
+                missing[doctor_profile_id].append(day)
+            else:
+                result[(doctor_profile_id, day)] = cached
+
+    if not missing:
+        return result
+
+    # Versions are read before the queries so a concurrent commit cannot be cached as current
+    versions = {doctor_profile_id: get_schedule_version(doctor_profile_id) for doctor_profile_id in missing}
+    first_day = min(day for missed in missing.values() for day in missed)
+    last_day = max(day for missed in missing.values() for day in missed)
+
+    templates = {}
+    for availability in db.query(
+        DoctorAvailability.doctor_profile_id, DoctorAvailability.day_of_week,
+        DoctorAvailability.start_time, DoctorAvailability.end_time,
+        DoctorAvailability.slot_duration_minutes, DoctorAvailability.buffer_minutes
+    ).filter(
+        DoctorAvailability.doctor_profile_id.in_(missing),
+        DoctorAvailability.is_active == True
+    ).order_by(
+        # ix_doctor_availability_doctor_day order; the oldest template per (doctor, day) still wins
+        DoctorAvailability.doctor_profile_id, DoctorAvailability.day_of_week, DoctorAvailability.id
+    ):
+        templates.setdefault((availability.doctor_profile_id, availability.day_of_week), availability)
+
+    max_buffer = max((template.buffer_minutes for template in templates.values()), default=0)
+    window_start = datetime.combine(first_day, datetime.min.time()) - timedelta(
+        minutes=MAX_APPOINTMENT_DURATION_MINUTES + max_buffer
+    )
+    window_end = datetime.combine(last_day + timedelta(days=1), datetime.min.time()) + timedelta(minutes=max_buffer)
+
+    intervals = defaultdict(list)
+    if templates:
+        rows = db.query(
+            Appointment.doctor_profile_id, Appointment.appointment_date, Appointment.duration_minutes
+        ).filter(
+            Appointment.doctor_profile_id.in_({doctor for doctor, _ in templates}),
+            Appointment.status.in_(ACTIVE_APPOINTMENT_STATUSES),
+            Appointment.appointment_date >= window_start,
+            Appointment.appointment_date < window_end
+        )
+        for doctor_profile_id, start, duration_minutes in rows:
+            intervals[doctor_profile_id].append((start, start + timedelta(minutes=duration_minutes)))
+
+    for doctor_profile_id, missed_days in missing.items():
+        busy = merge_intervals(intervals.get(doctor_profile_id, ()))
+        for day in missed_days:
+            template = templates.get((doctor_profile_id, day.weekday()))
+            day_slots = build_day_slots(day, template, busy) if template else None
+            day_slots_cache.set((doctor_profile_id, day, versions[doctor_profile_id]), day_slots)
+            result[(doctor_profile_id, day)] = day_slots
+
+    return result
+
+
+def _doctor_free_slots(grid, doctor_profile_id, days, not_before):
+    """Yield (start, doctor_profile_id, slot_duration_minutes) for one doctor in time order"""
+    for day in days:
+        day_slots = grid[(doctor_profile_id, day)]
+        if not day_slots or "1" not in day_slots.bitmap:
+            continue
+        for start in day_slots.with_notice(not_before).free_slots():
+            yield start, doctor_profile_id, day_slots.slot_duration_minutes
+
+
+def find_next_free_slots(db: Session, doctor_profile_ids, first_day, horizon_days, limit, not_before):
+    """Return the earliest `limit` free slots across the doctors as (start, doctor_profile_id, duration).
+
+    Each doctor contributes a lazy, already sorted slot stream; heapq.merge interleaves them
+    so only the slots actually returned are materialized. Days are loaded SEARCH_CHUNK_DAYS at a time.
+    """
+    found = []
+    for offset in range(0, horizon_days, SEARCH_CHUNK_DAYS):
+        days = [first_day + timedelta(days=offset + n) for n in range(min(SEARCH_CHUNK_DAYS, horizon_days - offset))]
+        grid = load_day_slots(db, doctor_profile_ids, days)
+        streams = [_doctor_free_slots(grid, doctor_profile_id, days, not_before) for doctor_profile_id in doctor_profile_ids]
+        for slot in heapq.merge(*streams):
+            found.append(slot)
+            if len(found) == limit:
+                return found
+    return found
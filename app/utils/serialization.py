@@ -0,0 +1,32 @@
+from functools import lru_cache
+
+from fastapi import Response
+from fastapi.responses import JSONResponse
+from pydantic import TypeAdapter
+
+try:
+    import orjson  # noqa: F401
+    from fastapi.responses import ORJSONResponse as DefaultJSONResponse
+except ImportError:  # orjson is optional; json.dumps produces the same bytes, only slower
+    DefaultJSONResponse = JSONResponse
+
+
+@lru_cache(maxsize=None)
+def json_adapter(type_):
+    """TypeAdapter for a response type (built once, they are expensive to create)"""
+    return TypeAdapter(type_)
+
+
+def serialized_response(type_, value, response: Response = None) -> Response:
+    """
+    Serialize `value` as `type_` in one pydantic-core pass and send the bytes as they are.
+
+    Returning models from a route makes FastAPI dump them, validate them again against
+    response_model and then encode the result; for lists of thousands of rows that costs
+    2-3x the serialization itself (app/scripts/bench_serialization.py). The body is the
+    same. Headers already set on the route's `response` parameter are carried over.
+    """
+    headers = None
+    if response is not None:
+        headers = {name: header for name, header in response.headers.items() if name != "content-length"}
+    return Response(content=json_adapter(type_).dump_json(value), media_type="application/json", headers=headers)
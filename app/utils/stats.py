@@ -0,0 +1,87 @@
+from datetime import datetime, timedelta
+import os
+
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+
+from app.models.models import User, UserRoleAssignment, DoctorProfile, Appointment
+from app.utils.cache import TTLCache, on_commit_of
+
+# Snapshot lifetime; writes to the tables below also drop it (per worker)
+BACKOFFICE_STATS_TTL_SECONDS = float(os.getenv('BACKOFFICE_STATS_TTL_SECONDS', '60'))
+
+BACKOFFICE_BREAKDOWNS = ("status", "specialty", "day")
+
+# Models whose changes make the snapshot stale
+STATS_MODELS = (User, UserRoleAssignment, DoctorProfile, Appointment)
+
+stats_cache = TTLCache(maxsize=32, ttl=BACKOFFICE_STATS_TTL_SECONDS)
+
+
+def invalidate_backoffice_stats():
+    """Drop every cached snapshot"""
+    stats_cache.clear()
+
+
+on_commit_of(STATS_MODELS, invalidate_backoffice_stats)
+
+
+def compute_backoffice_stats(db: Session, breakdowns=(), days: int = 30) -> dict:
+    """Compute the dashboard figures with aggregate SQL only (no ORM rows are loaded)"""
+    role_counts = dict(
+        db.query(UserRoleAssignment.role, func.count(UserRoleAssignment.user_id))
+        .group_by(UserRoleAssignment.role)
+        .all()
+    )
+
+    seven_days_ago = datetime.now() - timedelta(days=7)
+    stats = {
+        "total_patients": role_counts.get("patient", 0),
+        "total_doctors": db.query(func.count(DoctorProfile.id)).scalar() or 0,
+        "total_admins": role_counts.get("admin", 0),
+        "recent_registrations": db.query(func.count(User.id)).filter(User.created_at >= seven_days_ago).scalar() or 0,
+        "generated_at": datetime.now(),
+    }
+
+    if "status" in breakdowns:
+        rows = db.query(Appointment.status, func.count(Appointment.id)).group_by(Appointment.status).all()
+        stats["appointments_by_status"] = {
+            (status.value if status else "unknown"): count for status, count in rows
+        }
+
+    if "specialty" in breakdowns:
+        rows = (
+            db.query(DoctorProfile.especialidad, func.count(Appointment.id))
+            .join(Appointment, Appointment.doctor_profile_id == DoctorProfile.id)
+            .group_by(DoctorProfile.especialidad)
+            .all()
+        )
+        stats["appointments_by_specialty"] = {specialty.value: count for specialty, count in rows}
+
+    if "day" in breakdowns:
+        # Past and upcoming load around today
+        today = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
+        day = func.date(Appointment.appointment_date)
+        rows = (
+            db.query(day, func.count(Appointment.id))
+            .filter(
+                Appointment.appointment_date >= today - timedelta(days=days),
+                Appointment.appointment_date < today + timedelta(days=days + 1)
+            )
+            .group_by(day)
+            .order_by(day)
+            .all()
+        )
+        stats["appointments_by_day"] = {str(value): count for value, count in rows}
+
+    return stats
+
+
+def get_backoffice_stats_snapshot(db: Session, breakdowns=(), days: int = 30) -> dict:
+    """Return the cached snapshot, computing it when missing or stale"""
+    key = (tuple(sorted(breakdowns)), days)
+    snapshot = stats_cache.get(key)
+    if snapshot is None:
+        snapshot = compute_backoffice_stats(db, breakdowns, days)
+        stats_cache.set(key, snapshot)
+    return snapshot
@@ -0,0 +1,245 @@
+"""
+Shared HTTP client for the calls from the views to the FastAPI backend.
+
+One requests.Session per process keeps keep-alive connections to
+FASTAPI_BASE_URL open between requests instead of a new TCP connection per call.
+Every call has connect/read timeouts. Idempotent methods are retried with
+exponential backoff on connection errors and 502/503/504 responses. POST/DELETE
+are only retried when the connection could not be established (nothing was sent).
+Each call is logged with its latency on the 'hospital_app.api' logger.
+
+GET calls with cached=True are kept in Django's cache (public API data such as
+the doctor directory): they are served locally for the Cache-Control max-age the
+API sent, then revalidated with If-None-Match, which costs an empty 304 while
+the data is unchanged.
+
+fan_out() runs independent calls of one view concurrently under a shared
+deadline, so the page waits for the slowest call instead of the sum of all.
+
+Usage:
+    from . import api_client
+    response = api_client.get('/doctors', params={'especialidad': 'cardiologia'}, cached=True)
+    response = api_client.post('/appointments', json=data, headers=get_auth_headers(request))
+
+    results = api_client.fan_out({
+        'create': ('POST', '/admin/doctor-availability', {'json': data, 'headers': headers}),
+        'doctors': ('GET', '/admin/doctors', {'headers': headers}),
+    })
+    response = results['doctors'].result()  # the response, or raises RequestException
+"""
+import json
+import logging
+import os
+import re
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor, wait
+from urllib.parse import urlencode
+
+import requests
+from django.conf import settings
+from django.core.cache import cache
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+logger = logging.getLogger('hospital_app.api')
+
+_session = None
+_session_pid = None
+_session_lock = threading.Lock()
+
+_executor = None
+_executor_pid = None
+
+
+def _setting(name, default):
+    return getattr(settings, name, default)
+
+
+def build_session():
+    """Session with a keep-alive connection pool and retries for idempotent requests"""
+    retry = Retry(
+        total=_setting('FASTAPI_RETRIES', 2),
+        connect=_setting('FASTAPI_RETRIES', 2),
+        read=_setting('FASTAPI_RETRIES', 2),
+        status=_setting('FASTAPI_RETRIES', 2),
+        backoff_factor=_setting('FASTAPI_RETRY_BACKOFF', 0.2),  # 0.2s, 0.4s, ...
+        status_forcelist=(502, 503, 504),
+        allowed_methods=frozenset({'GET', 'HEAD', 'OPTIONS'}),
+        raise_on_status=False,  # return the last response, the views check status_code
+    )
+    adapter = HTTPAdapter(
+        pool_connections=1,  # a single backend host
+        pool_maxsize=_setting('FASTAPI_POOL_MAXSIZE', 10),  # concurrent requests per process (threads)
+        max_retries=retry,
+    )
+    session = requests.Session()
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+    return session
+
+
+def get_session():
+    """Per-process session (a forked worker must not reuse the parent's sockets)"""
+    global _session, _session_pid
+    pid = os.getpid()
+    if _session is None or _session_pid != pid:
+        with _session_lock:
+            if _session is None or _session_pid != pid:
+                _session = build_session()
+                _session_pid = pid
+    return _session
+
+
+class CachedResponse:
+    """The parts of a requests.Response the views use, rebuilt from the cache"""
+
+    def __init__(self, entry):
+        self.status_code = 200
+        self.content = entry['content']
+        self.headers = {'ETag': entry['etag'], 'Content-Type': 'application/json'}
+
+    @property
+    def text(self):
+        return self.content.decode('utf-8')
+
+    def json(self):
+        return json.loads(self.content)
+
+
+def _max_age(response):
+    cache_control = response.headers.get('Cache-Control', '')
+    if 'no-store' in cache_control or 'no-cache' in cache_control:
+        return 0
+    match = re.search(r'max-age=(\d+)', cache_control)
+    return int(match.group(1)) if match else 0
+
+
+def request(method, path, timeout=None, cached=False, **kwargs):
+    """Call the API; raises requests.exceptions.RequestException like requests.request()"""
+    if timeout is None:
+        timeout = (_setting('FASTAPI_CONNECT_TIMEOUT', 3.05), _setting('FASTAPI_READ_TIMEOUT', 10))
+    if cached and method == 'GET':
+        return _cached_get(path, timeout, **kwargs)
+    return _send(method, path, timeout, **kwargs)
+
+
+def _cached_get(path, timeout, params=None, headers=None, **kwargs):
+    """GET through Django's cache, honouring the API's max-age and revalidating with the ETag"""
+    generation = cache.get_or_set('api:generation', 0, timeout=None)
+    key = f'api:{generation}:{path}?{urlencode(sorted((params or {}).items()))}'
+    entry = cache.get(key)
+    now = time.time()
+    if entry is not None and entry['fresh_until'] > now:
+        logger.debug('GET %s served from cache', path)
+        return CachedResponse(entry)
+
+    headers = dict(headers or {})
+    if entry is not None:
+        headers['If-None-Match'] = entry['etag']
+    response = _send('GET', path, timeout, params=params, headers=headers, **kwargs)
+
+    if response.status_code == 304 and entry is not None:
+        entry['fresh_until'] = now + _max_age(response)
+    elif response.status_code == 200 and response.headers.get('ETag'):
+        entry = {'etag': response.headers['ETag'], 'content': response.content, 'fresh_until': now + _max_age(response)}
+    else:
+        return response
+    # Kept past max-age so it can still be revalidated with a 304
+    cache.set(key, entry, timeout=_setting('FASTAPI_CACHE_TIMEOUT', 3600))
+    return CachedResponse(entry) if response.status_code == 304 else response
+
+
+def invalidate_cached():
+    """Drop every cached GET (after a write through this frontend, e.g. registering a doctor)"""
+    try:
+        cache.incr('api:generation')
+    except ValueError:  # never set, nothing cached yet
+        pass
+
+
+def _send(method, path, timeout, **kwargs):
+    url = f'{settings.FASTAPI_BASE_URL}{path}'
+
+    start = time.perf_counter()
+    try:
+        response = get_session().request(method, url, timeout=timeout, **kwargs)
+    except requests.exceptions.RequestException as exc:
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        logger.warning('%s %s failed after %.1f ms: %s', method, path, elapsed_ms, exc)
+        raise
+
+    elapsed_ms = (time.perf_counter() - start) * 1000
+    level = logging.WARNING if elapsed_ms >= _setting('FASTAPI_SLOW_MS', 1000) else logging.DEBUG
+    logger.log(level, '%s %s -> %s in %.1f ms', method, path, response.status_code, elapsed_ms)
+    return response
+
+
+def get(path, cached=False, **kwargs):
+    return request('GET', path, cached=cached, **kwargs)
+
+
+def post(path, **kwargs):
+    return request('POST', path, **kwargs)
+
+
+def delete(path, **kwargs):
+    return request('DELETE', path, **kwargs)
+
+
+def get_executor():
+    """Per-process thread pool for fan_out(); the threads share the session's connection pool"""
+    global _executor, _executor_pid
+    pid = os.getpid()
+    if _executor is None or _executor_pid != pid:
+        with _session_lock:
+            if _executor is None or _executor_pid != pid:
+                _executor = ThreadPoolExecutor(
+                    max_workers=_setting('FASTAPI_FANOUT_WORKERS', 8), thread_name_prefix='api-fanout'
+                )
+                _executor_pid = pid
+    return _executor
+
+
+def fan_out(calls, deadline=None):
+    """
+    Run independent API calls concurrently and wait for all of them at most `deadline` seconds.
+
+    `calls` maps a name to (method, path, kwargs); kwargs may include cached=True. Returns the same names mapped to
+    completed futures: .result() gives the response or raises the call's
+    RequestException. A call still running at the deadline raises requests.exceptions.Timeout.
+    """
+    if deadline is None:
+        deadline = _setting('FASTAPI_READ_TIMEOUT', 10)
+    connect_timeout = _setting('FASTAPI_CONNECT_TIMEOUT', 3.05)
+    start = time.perf_counter()
+
+    if len(calls) == 1:
+        # Nothing to overlap, skip the thread hop
+        ((name, (method, path, kwargs)),) = calls.items()
+        future = Future()
+        try:
+            future.set_result(request(method, path, timeout=(connect_timeout, deadline), **kwargs))
+        except requests.exceptions.RequestException as exc:
+            future.set_exception(exc)
+        return {name: future}
+
+    executor = get_executor()
+    futures = {
+        name: executor.submit(request, method, path, timeout=(connect_timeout, deadline), **kwargs)
+        for name, (method, path, kwargs) in calls.items()
+    }
+    wait(futures.values(), timeout=deadline)
+
+    results = {}
+    for name, future in futures.items():
+        if not future.done():
+            future.cancel()
+            method, path, _ = calls[name]
+            logger.warning('%s %s missed the %.1f s fan-out deadline', method, path, deadline)
+            future = Future()
+            future.set_exception(requests.exceptions.Timeout(f'{method} {path}: deadline of {deadline}s exceeded'))
+        results[name] = future
+
+    logger.debug('fan-out of %d calls took %.1f ms', len(calls), (time.perf_counter() - start) * 1000)
+    return results
@@ -31,6 +31,7 @@ urlpatterns = [
     path('admin-panel/doctors/', views.admin_doctors, name='admin_doctors'),
     path('admin-panel/register-doctor/', views.admin_register_doctor, name='admin_register_doctor'),
     path('admin-panel/appointments/', views.admin_appointments, name='admin_appointments'),
+    path('admin-panel/appointments/export/', views.admin_export_appointments, name='admin_export_appointments'),
     path('admin-panel/availability/', views.admin_availability, name='admin_availability'),
     
     # Doctor pages
@@ -3,11 +3,12 @@ import json
 from datetime import datetime
 from django.shortcuts import render, redirect
 from django.contrib import messages
-from django.conf import settings
-from django.http import JsonResponse
+from django.http import JsonResponse, StreamingHttpResponse
 from django.views.decorators.http import require_http_methods
 from django.views.decorators.csrf import csrf_exempt
 
+from . import api_client
+
 
 def convert_api_dates(appointments_data):
     """Convert ISO date strings from API to datetime objects for Django templates"""
@@ -158,7 +159,7 @@ def register(request):
         }
         
         try:
-            response = requests.post(f'{settings.FASTAPI_BASE_URL}/register', json=data)
+            response = api_client.post('/register', json=data)
             if response.status_code == 201:
                 result = response.json()
                 # Auto-login after registration
@@ -187,7 +188,7 @@ def login_view(request):
         }
         
         try:
-            response = requests.post(f'{settings.FASTAPI_BASE_URL}/login', json=data)  # Use json=data instead of data=data
+            response = api_client.post('/login', json=data)  # Use json=data instead of data=data
             if response.status_code == 200:
                 result = response.json()
                 request.session['access_token'] = result['access_token']
@@ -244,8 +245,12 @@ def appointments(request):
     user_id = request.session.get('user_data', {}).get('id')
     
     try:
-        # Get all appointments first (the API handles user filtering)
-        response = requests.get(f'{settings.FASTAPI_BASE_URL}/appointments', headers=headers)
+        # One call: the API filters by user and expands patient/doctor details in the same response
+        response = api_client.get(
+            '/appointments',
+            headers=headers,
+            params={'expand': 'patient,doctor'}
+        )
         if response.status_code == 200:
             appointments_data = response.json()
             # Convert date strings to datetime objects for proper template formatting
@@ -255,57 +260,15 @@ def appointments(request):
             filtered_appointments = []
             
             for appointment in appointments_data.get('appointments', []):
-                include_appointment = False
-                
-                try:
-                    detail_response = requests.get(
-                        f'{settings.FASTAPI_BASE_URL}/appointments/{appointment["id"]}', 
-                        headers=headers, 
-                        timeout=5
-                    )
-                    if detail_response.status_code == 200:
-                        detail_data = detail_response.json()
-                        
-                        # Add patient and doctor info
-                        if 'patient' in detail_data:
-                            appointment['patient_name'] = f"{detail_data['patient']['nombre']} {detail_data['patient']['apellidos']}"
-                            appointment['patient_dni'] = detail_data['patient']['dni']
-                        if 'doctor_name' in detail_data:
-                            appointment['doctor_name'] = detail_data['doctor_name']
-                        if 'doctor_specialidad' in detail_data:
-                            appointment['doctor_specialidad'] = detail_data['doctor_specialidad']
-                        
-                        # Role-based filtering
-                        if active_role == 'patient':
-                            # Patient: show appointments where they are the patient
-                            include_appointment = (detail_data.get('patient', {}).get('id') == user_id)
-                        elif active_role == 'doctor':
-                            # Doctor: show appointments where they are the doctor
-                            # Need to get doctor profile ID for current user
-                            doctor_profile_id = None
-                            try:
-                                doctors_response = requests.get(f'{settings.FASTAPI_BASE_URL}/doctors', timeout=5)
-                                if doctors_response.status_code == 200:
-                                    all_doctors = doctors_response.json()
-                                    for doctor in all_doctors:
-                                        if doctor.get('id') == user_id:  # doctor.id is user_id
-                                            doctor_profile_id = doctor.get('profile_id')
-                                            break
-                            except:
-                                pass
-                            
-                            include_appointment = (appointment.get('doctor_profile_id') == doctor_profile_id)
-                        elif active_role == 'admin':
-                            # Admin: show all appointments
-                            include_appointment = True
-                            
-                except requests.exceptions.RequestException:
-                    # If detail fetch fails, use fallback logic
-                    if active_role == 'patient':
-                        include_appointment = (appointment.get('patient_id') == user_id)
-                    elif active_role == 'admin':
-                        include_appointment = True
-                    # For doctor role, we need the detail data, so skip if fetch failed
+                if active_role == 'patient':
+                    # Patient: show appointments where they are the patient
+                    include_appointment = (appointment.get('patient_id') == user_id)
+                elif active_role == 'doctor':
+                    # Doctor: show appointments where they are the doctor
+                    include_appointment = (appointment.get('doctor_user_id') == user_id)
+                else:
+                    # Admin: show all appointments
+                    include_appointment = (active_role == 'admin')
                 
                 if include_appointment:
                     filtered_appointments.append(appointment)
@@ -360,7 +323,7 @@ def create_appointment(request):
         print(f"DEBUG: Headers: {headers}")
         
         try:
-            response = requests.post(f'{settings.FASTAPI_BASE_URL}/appointments', json=data, headers=headers)
+            response = api_client.post('/appointments', json=data, headers=headers)
             if response.status_code == 200 or response.status_code == 201:
                 messages.success(request, 'Cita creada exitosamente')
                 return redirect('hospital:appointments')
@@ -374,9 +337,9 @@ def create_appointment(request):
         except requests.exceptions.RequestException as e:
             messages.error(request, f'Error de conexión: {str(e)}')
     
-    # Get doctors list for the form
+    # Get doctors list for the form (only when it is rendered: a successful booking redirects)
     try:
-        response = requests.get(f'{settings.FASTAPI_BASE_URL}/doctors')
+        response = api_client.get('/doctors', cached=True)
         all_doctors = response.json() if response.status_code == 200 else []
         
         # Filter out current user (prevent self-appointments)
@@ -411,7 +374,7 @@ def appointment_detail(request, appointment_id):
     """Appointment detail"""
     headers = get_auth_headers(request)
     try:
-        response = requests.get(f'{settings.FASTAPI_BASE_URL}/appointments/{appointment_id}', headers=headers)
+        response = api_client.get(f'/appointments/{appointment_id}', headers=headers)
         if response.status_code == 200:
             appointment = response.json()
             # Convert date strings to datetime objects for proper template formatting
@@ -444,7 +407,7 @@ def cancel_appointment(request, appointment_id):
         
         try:
             params = {'cancellation_reason': cancellation_reason} if cancellation_reason else {}
-            response = requests.delete(f'{settings.FASTAPI_BASE_URL}/appointments/{appointment_id}', headers=headers, params=params)
+            response = api_client.delete(f'/appointments/{appointment_id}', headers=headers, params=params)
             if response.status_code == 200:
                 messages.success(request, 'Cita cancelada exitosamente')
             else:
@@ -458,9 +421,11 @@ def cancel_appointment(request, appointment_id):
 
 @require_auth
 def doctors_list(request):
-    """Doctors list"""
+    """Doctors list (?especialidad= narrows it down)"""
+    especialidad = request.GET.get('especialidad')
+    params = {'especialidad': especialidad} if especialidad else None
     try:
-        response = requests.get(f'{settings.FASTAPI_BASE_URL}/doctors')
+        response = api_client.get('/doctors', params=params, cached=True)
         all_doctors = response.json() if response.status_code == 200 else []
         
         # Filter out current user if they are acting as patient (prevent self-appointments)
@@ -486,7 +451,7 @@ def doctors_list(request):
 def doctor_detail(request, doctor_id):
     """Doctor detail"""
     try:
-        response = requests.get(f'{settings.FASTAPI_BASE_URL}/doctors/{doctor_id}')
+        response = api_client.get(f'/doctors/{doctor_id}', cached=True)
         doctor = response.json() if response.status_code == 200 else None
         
         # Check if viewing own profile as patient
@@ -519,7 +484,7 @@ def check_availability(request, doctor_id):
     }
     
     try:
-        response = requests.post(f'{settings.FASTAPI_BASE_URL}/appointments/availability', json=data)
+        response = api_client.post('/appointments/availability', json=data)
         if response.status_code == 200:
             return JsonResponse(response.json())
         else:
@@ -534,7 +499,7 @@ def admin_panel(request):
     """Admin dashboard"""
     headers = get_auth_headers(request)
     try:
-        response = requests.get(f'{settings.FASTAPI_BASE_URL}/admin/backoffice', headers=headers)
+        response = api_client.get('/admin/backoffice', headers=headers)
         stats = response.json() if response.status_code == 200 else {}
     except requests.exceptions.RequestException:
         stats = {}
@@ -548,7 +513,7 @@ def admin_users(request):
     """Admin users management"""
     headers = get_auth_headers(request)
     try:
-        response = requests.get(f'{settings.FASTAPI_BASE_URL}/admin/users', headers=headers)
+        response = api_client.get('/admin/users', headers=headers)
         users = response.json() if response.status_code == 200 else []
     except requests.exceptions.RequestException:
         users = []
@@ -562,7 +527,7 @@ def admin_doctors(request):
     """Admin doctors management"""
     headers = get_auth_headers(request)
     try:
-        response = requests.get(f'{settings.FASTAPI_BASE_URL}/admin/doctors', headers=headers)
+        response = api_client.get('/admin/doctors', headers=headers)
         doctors = response.json() if response.status_code == 200 else []
     except requests.exceptions.RequestException:
         doctors = []
@@ -599,8 +564,10 @@ def admin_register_doctor(request):
         
         headers = get_auth_headers(request)
         try:
-            response = requests.post(f'{settings.FASTAPI_BASE_URL}/admin/register-doctor', json=data, headers=headers)
+            response = api_client.post('/admin/register-doctor', json=data, headers=headers)
             if response.status_code == 200:
+                # The API drops its directory cache on commit; drop ours too so the new doctor shows at once
+                api_client.invalidate_cached()
                 messages.success(request, 'Médico registrado exitosamente')
                 return redirect('hospital:admin_doctors')
             else:
@@ -617,7 +584,7 @@ def admin_appointments(request):
     """Admin appointments management"""
     headers = get_auth_headers(request)
     try:
-        response = requests.get(f'{settings.FASTAPI_BASE_URL}/admin/appointments', headers=headers)
+        response = api_client.get('/admin/appointments', headers=headers)
         appointments_data = response.json() if response.status_code == 200 else {'appointments': [], 'total': 0}
     except requests.exceptions.RequestException:
         appointments_data = {'appointments': [], 'total': 0}
@@ -626,9 +593,48 @@ def admin_appointments(request):
     return render(request, 'hospital/admin/appointments.html', {'appointments_data': appointments_data})
 
 
+EXPORT_FILTERS = ('format', 'date_from', 'date_to', 'doctor_id', 'status_filter')
+
+
+@require_active_role(['admin'])
+def admin_export_appointments(request):
+    """Relay the API's appointment export (NDJSON/CSV) to the browser as it streams in"""
+    headers = get_auth_headers(request)
+    params = {name: request.GET[name] for name in EXPORT_FILTERS if request.GET.get(name)}
+    try:
+        response = api_client.get('/admin/appointments/export', headers=headers, params=params, stream=True)
+    except requests.exceptions.RequestException:
+        messages.error(request, 'Error al exportar citas')
+        return redirect('hospital:admin_appointments')
+    
+    if response.status_code != 200:
+        try:
+            error_detail = response.json().get('detail', 'Error al exportar citas')
+        except ValueError:  # Not JSON (proxy error page, empty 502/504 body)
+            error_detail = 'Error al exportar citas'
+        finally:
+            response.close()
+        messages.error(request, f'Error: {error_detail}')
+        return redirect('hospital:admin_appointments')
+    
+    def relay():
+        try:
+            yield from response.iter_content(chunk_size=64 * 1024)
+        finally:
+            response.close()
+    
+    streaming_response = StreamingHttpResponse(relay(), content_type=response.headers['Content-Type'])
+    streaming_response['Content-Disposition'] = response.headers.get('Content-Disposition', 'attachment')
+    return streaming_response
+
+
 @require_active_role(['admin'])
 def admin_availability(request):
     """Admin manage doctor availability"""
+    headers = get_auth_headers(request)
+    # The doctors list for the form does not depend on the update, fetch both at once
+    calls = {'doctors': ('GET', '/admin/doctors', {'headers': headers})}
+    
     if request.method == 'POST':
         data = {
             'doctor_profile_id': int(request.POST.get('doctor_profile_id')),
@@ -638,10 +644,13 @@ def admin_availability(request):
             'slot_duration_minutes': int(request.POST.get('slot_duration_minutes', 30)),
             'buffer_minutes': int(request.POST.get('buffer_minutes', 5)),
         }
-        
-        headers = get_auth_headers(request)
+        calls['availability'] = ('POST', '/admin/doctor-availability', {'json': data, 'headers': headers})
+    
+    results = api_client.fan_out(calls)
+    
+    if 'availability' in results:
         try:
-            response = requests.post(f'{settings.FASTAPI_BASE_URL}/admin/doctor-availability', json=data, headers=headers)
+            response = results['availability'].result()
             if response.status_code == 200:
                 messages.success(request, 'Disponibilidad configurada exitosamente')
             else:
@@ -651,9 +660,8 @@ def admin_availability(request):
             messages.error(request, f'Error de conexión: {str(e)}')
     
     # Get doctors for the form
-    headers = get_auth_headers(request)
     try:
-        response = requests.get(f'{settings.FASTAPI_BASE_URL}/admin/doctors', headers=headers)
+        response = results['doctors'].result()
         doctors = response.json() if response.status_code == 200 else []
     except requests.exceptions.RequestException:
         doctors = []
@@ -678,7 +686,7 @@ def admin_create_patient(request):
         
         try:
             headers = get_auth_headers(request)
-            response = requests.post(f'{settings.FASTAPI_BASE_URL}/admin/create-user', json=data, headers=headers)
+            response = api_client.post('/admin/create-user', json=data, headers=headers)
             if response.status_code == 200:
                 result = response.json()
                 messages.success(request, f'Paciente {result["nombre"]} {result["apellidos"]} creado exitosamente')
@@ -704,7 +712,7 @@ def doctor_appointments(request):
     """Doctor appointments"""
     headers = get_auth_headers(request)
     try:
-        response = requests.get(f'{settings.FASTAPI_BASE_URL}/appointments', headers=headers)
+        response = api_client.get('/appointments', headers=headers)
         appointments_data = response.json() if response.status_code == 200 else {'appointments': [], 'total': 0}
     except requests.exceptions.RequestException:
         appointments_data = {'appointments': [], 'total': 0}
@@ -719,7 +727,7 @@ def confirm_appointment(request, appointment_id):
     if request.method == 'POST':
         headers = get_auth_headers(request)
         try:
-            response = requests.post(f'{settings.FASTAPI_BASE_URL}/appointments/{appointment_id}/confirm', headers=headers)
+            response = api_client.post(f'/appointments/{appointment_id}/confirm', headers=headers)
             if response.status_code == 200:
                 messages.success(request, 'Cita confirmada exitosamente')
             else:
@@ -740,7 +748,7 @@ def complete_appointment(request, appointment_id):
         
         try:
             params = {'notes': notes} if notes else {}
-            response = requests.post(f'{settings.FASTAPI_BASE_URL}/appointments/{appointment_id}/complete', headers=headers, params=params)
+            response = api_client.post(f'/appointments/{appointment_id}/complete', headers=headers, params=params)
             if response.status_code == 200:
                 messages.success(request, 'Cita completada exitosamente')
             else:
@@ -103,7 +103,37 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
 # FastAPI Backend Configuration
 FASTAPI_BASE_URL = os.getenv('FASTAPI_BASE_URL', 'http://127.0.0.1:8001')
+# Client settings (hospital_app/api_client.py)
+FASTAPI_CONNECT_TIMEOUT = float(os.getenv('FASTAPI_CONNECT_TIMEOUT', '3.05'))
+FASTAPI_READ_TIMEOUT = float(os.getenv('FASTAPI_READ_TIMEOUT', '10'))
+FASTAPI_RETRIES = int(os.getenv('FASTAPI_RETRIES', '2'))  # GET on errors and 502/503/504; any method when it cannot connect
+FASTAPI_RETRY_BACKOFF = float(os.getenv('FASTAPI_RETRY_BACKOFF', '0.2'))
+FASTAPI_POOL_MAXSIZE = int(os.getenv('FASTAPI_POOL_MAXSIZE', '10'))
+FASTAPI_SLOW_MS = float(os.getenv('FASTAPI_SLOW_MS', '1000'))  # calls slower than this are logged as warnings
+FASTAPI_CACHE_TIMEOUT = int(os.getenv('FASTAPI_CACHE_TIMEOUT', '3600'))  # cached=True GETs kept for revalidation
+FASTAPI_FANOUT_WORKERS = int(os.getenv('FASTAPI_FANOUT_WORKERS', '8'))  # threads for concurrent calls of one view
+
+# Cache (API responses fetched with cached=True); per process, point it at Redis/Memcached to share it
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'hospital-api',
+    }
+}
 
 # Crispy Forms Configuration
 CRISPY_ALLOWED_TEMPLATE_PACKS = "bootstrap5"
-CRISPY_TEMPLATE_PACK = "bootstrap5"
\ No newline at end of file
+CRISPY_TEMPLATE_PACK = "bootstrap5"
+
+# Logging
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {'class': 'logging.StreamHandler'},
+    },
+    'loggers': {
+        # DEBUG logs the latency of every API call
+        'hospital_app.api': {'handlers': ['console'], 'level': os.getenv('FASTAPI_LOG_LEVEL', 'WARNING')},
+    },
+}
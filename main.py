@@ -1,5 +1,5 @@
 import uvicorn
-from app.api.main import app
 
 if __name__ == "__main__":
-    uvicorn.run(app, host="0.0.0.0", port=8001)
\ No newline at end of file
+    # The factory builds the app inside the server process; nothing touches the database until a request needs it
+    uvicorn.run("app.api.main:create_app", factory=True, host="0.0.0.0", port=8001)